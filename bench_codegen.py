@@ -0,0 +1,127 @@
+"""tiempo y memoria de CodeGen para programas generados de tamanno creciente
+
+uso: python bench_codegen.py [-O0|-O1|-O2] [-j N] [--against REV] [tamanno ...]
+con -O0 casi todo el tiempo es la generacion de C, sin las pasadas de optimizacion.
+Con -j N compara la generacion secuencial con la de N procesos, etapa por etapa.
+Con --against REV compara este CodeGen con el de la revision REV de git, sacada a una carpeta temporal;
+a132049 es el que juntaba el C con += antes de las secciones de hulk_output
+"""
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import tracemalloc
+
+from hulk_parser import hulk_parse
+from hulk_semantic_check import semantic_check
+from hulk_code_gen import CodeGen
+from hulk_passes import standard_passes
+
+
+def generate(size):
+    "size tipos con atributos y metodos, uno de cada dos hereda del anterior, y size funciones globales"
+    code = ""
+    for i in range(size):
+        parent = f" inherits T{i - 1}(a{i})" if i % 2 else ""
+        callee = f"f{i - 1}(x)" if i else "x"
+        code += f"""type T{i}(a{i}: Number){parent} {{
+    a{i} = a{i};
+    get{i}(): Number => self.a{i} + {i};
+    scale{i}(k: Number): Number => if (k > {i}) self.a{i} * k else self.a{i};
+}}
+function f{i}(x: Number): Number => let y = x * {i} in y + {callee} + 1;
+"""
+    calls = " ".join(f"print(f{i}(1)); print(new T{i}({i}).get{i}());" for i in range(size))
+    return code + f"{{ {calls} }}"
+
+
+def measure(size, level, trace, workers=1):
+    """tiempo de CodeGen y de cada etapa, o su pico de memoria con trace;
+    el parser y el chequeo guardan estado global, cada medida va en su proceso"""
+    code = generate(size)
+    ast, parsing_errors, _ = hulk_parse(code)
+    ast, semantic_errors = semantic_check(ast, code)
+    assert not parsing_errors and not semantic_errors, parsing_errors + semantic_errors
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    # las revisiones de antes de -j no conocen workers
+    codegen = CodeGen(standard_passes(level), **({"workers": workers} if workers > 1 else {}))
+    codegen.visit(ast)
+    elapsed = time.perf_counter() - start
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+    return dict(getattr(codegen, "times", {}), total=elapsed)
+
+
+def run(size, level, trace, workers=1, tree=None):
+    "measure en otro proceso; con tree corre una copia de este script dentro de esa carpeta, con sus modulos"
+    script = __file__
+    if tree is not None:
+        script = os.path.join(tree, "bench_codegen.py")
+        shutil.copy(__file__, script)
+    args = [sys.executable, script, "--measure", str(size), f"-O{level}", "-j", str(workers)]
+    args += ["--trace"] if trace else []
+    return json.loads(subprocess.run(args, capture_output=True, text=True, check=True, cwd=tree).stdout)
+
+
+def checkout(revision, directory):
+    "los archivos de la revision en directory, sin tocar el arbol de trabajo"
+    repository = os.path.dirname(os.path.abspath(__file__))
+    archive = subprocess.run(["git", "archive", revision], capture_output=True, check=True, cwd=repository).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+
+
+def compare(sizes, level, workers):
+    "cada etapa de CodeGen secuencial y con workers procesos"
+    stages = ["ast passes", "main and headers", "functions and types", "write", "total"]
+    print(f"{'size':>6}{'stage':>22}{'sequential (s)':>16}{f'-j {workers} (s)':>12}")
+    for size in sizes:
+        sequential = run(size, level, False)
+        parallel = run(size, level, False, workers)
+        for stage in stages:
+            print(f"{size:>6}{stage:>22}{sequential[stage]:>16.3f}{parallel[stage]:>12.3f}")
+
+
+def compare_revision(sizes, level, revision):
+    "tiempo y pico de memoria de CodeGen en revision y en el arbol de trabajo, con los mismos programas"
+    print(f"{'size':>6}{f'{revision} (s)':>16}{f'{revision} (MB)':>17}{'now (s)':>10}{'now (MB)':>10}")
+    with tempfile.TemporaryDirectory() as tree:
+        checkout(revision, tree)
+        for size in sizes:
+            row = []
+            for where in [tree, None]:
+                row += [run(size, level, False, tree=where)["total"], run(size, level, True, tree=where) / (1 << 20)]
+            print(f"{size:>6}{row[0]:>16.3f}{row[1]:>17.1f}{row[2]:>10.3f}{row[3]:>10.1f}")
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[sys.argv.index("-j") + 1]) if "-j" in sys.argv else 1
+    if sys.argv[1:2] == ["--measure"]:
+        print(json.dumps(measure(int(sys.argv[2]), int(sys.argv[3][2]), "--trace" in sys.argv, workers)))
+        sys.exit(0)
+    level = 2
+    for arg in sys.argv[1:]:
+        if arg in ["-O0", "-O1", "-O2"]:
+            level = int(arg[2])
+    arguments = [arg for i, arg in enumerate(sys.argv[1:], 1) if sys.argv[i - 1] not in ["-j", "--against"]]
+    sizes = [int(arg) for arg in arguments if not arg.startswith("-")] or [50, 100, 200, 400, 800]
+    if workers > 1:
+        compare(sizes, level, workers)
+        sys.exit(0)
+    if "--against" in sys.argv:
+        compare_revision(sizes, level, sys.argv[sys.argv.index("--against") + 1])
+        sys.exit(0)
+    print(f"{'size':>6}{'codegen (s)':>14}{'peak (MB)':>12}")
+    for size in sizes:
+        elapsed = run(size, level, False)["total"]
+        peak = run(size, level, True)
+        print(f"{size:>6}{elapsed:>14.3f}{peak / (1 << 20):>12.1f}")
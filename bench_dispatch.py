@@ -0,0 +1,113 @@
+"""costo de visitor.on/when por nodo visitado
+
+uso: python bench_dispatch.py [tamanno]
+visita cada nodo de un programa generado con un visitor que no hace nada y lo compara con una llamada directa;
+los nodos sin handler propio se resuelven por el handler de Node. Al final mide el frontend y CodeGen completos
+"""
+import sys
+import time
+
+import visitor
+from bench_codegen import generate
+from hulk_ast import Node, Program, FunctionDef, TypeDef, Params, ID, BinOp, Num, Let, Assign, FunctionCall, TypeCall
+from hulk_parser import hulk_parse
+from hulk_semantic_check import semantic_check
+from hulk_code_gen import CodeGen
+from hulk_passes import standard_passes
+from misc import ast_walk
+
+REPEAT = 20
+# las clases con handler propio en Probe, las demas caen en el de Node
+TARGETS = {Program, FunctionDef, TypeDef, Params, ID, BinOp, Num, Let, Assign, FunctionCall, TypeCall}
+
+
+class Probe:
+    "un handler por clase, como los visitors del compilador"
+
+    @visitor.on("node")
+    def visit(self, node):
+        pass
+
+    @visitor.when(Program)
+    def visit(self, node):
+        pass
+
+    @visitor.when(FunctionDef)
+    def visit(self, node):
+        pass
+
+    @visitor.when(TypeDef)
+    def visit(self, node):
+        pass
+
+    @visitor.when(Params)
+    def visit(self, node):
+        pass
+
+    @visitor.when(ID)
+    def visit(self, node):
+        pass
+
+    @visitor.when(BinOp)
+    def visit(self, node):
+        pass
+
+    @visitor.when(Num)
+    def visit(self, node):
+        pass
+
+    @visitor.when(Let)
+    def visit(self, node):
+        pass
+
+    @visitor.when(Assign)
+    def visit(self, node):
+        pass
+
+    @visitor.when(FunctionCall)
+    def visit(self, node):
+        pass
+
+    @visitor.when(TypeCall)
+    def visit(self, node):
+        pass
+
+    @visitor.when(Node)
+    def visit(self, node):
+        pass
+
+    def direct(self, node):
+        pass
+
+
+def per_node(visit, nodes):
+    "nanosegundos por llamada"
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for node in nodes:
+            visit(node)
+    return (time.perf_counter() - start) / (REPEAT * len(nodes)) * 1e9
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    code = generate(size)
+    ast, _, _ = hulk_parse(code)
+    start = time.perf_counter()
+    ast, errors = semantic_check(ast, code)
+    checked = time.perf_counter() - start
+    assert not errors, errors
+    nodes = list(ast_walk(ast))
+    probe = Probe()
+    exact = [node for node in nodes if type(node) in TARGETS]
+    inherited = [node for node in nodes if type(node) not in TARGETS]
+    direct = per_node(probe.direct, nodes)
+    print(f"{len(nodes)} nodes, {len(exact)} with their own handler, {len(inherited)} through Node")
+    print(f"{'direct call':<28}{direct:>10.0f} ns")
+    for name, selected in [("dispatch, own handler", exact), ("dispatch, through Node", inherited)]:
+        cost = per_node(probe.visit, selected)
+        print(f"{name:<28}{cost:>10.0f} ns{cost - direct:>10.0f} ns over a direct call")
+    start = time.perf_counter()
+    CodeGen(standard_passes(0)).visit(ast)
+    print(f"{'semantic check':<28}{checked * 1000:>10.1f} ms")
+    print(f"{'codegen -O0':<28}{(time.perf_counter() - start) * 1000:>10.1f} ms")
@@ -1,11 +1,10 @@
-from hulk_lexer import errorList as lexerErrors
-from hulk_parser import hulk_parse
-from hulk_semantic_check import semantic_check
-from hulk_code_gen import CodeGen
-
 import sys
-from misc import typeof
 import io
+import os
+import shutil
+
+from hulk_build import Toolchain, build, binary_path, run
+from hulk_cache import BuildCache, compiler_fingerprint
 
 # if len(sys.argv)<=1:
 #     raise Exception("no input file entered")
@@ -14,7 +13,65 @@ import io
 
 CODE = io.open("grid.hulk").read()
 
-ast, parsingErrors, nodes = hulk_parse(CODE, create_graph=False)
+# -O0, -O1 o -O2 (por defecto) eligen las pasadas de optimizacion
+level = 2
+for arg in sys.argv:
+    if arg in ["-O0", "-O1", "-O2"]:
+        level = int(arg[2])
+# --memoize: las funciones globales puras sobre Number/Boolean/String usan una tabla memo
+memoize = "--memoize" in sys.argv
+# -o RUTA: donde escribir el C; --split: RUTA es una carpeta con una unidad por tipo y un Makefile
+split = "--split" in sys.argv
+output = sys.argv[sys.argv.index("-o") + 1] if "-o" in sys.argv else ("./out" if split else "./out.c")
+# --runtime-lib: el C generado incluye hulk_runtime.h y se enlaza con libhulk_runtime.a, compilada una vez
+runtime_library = "--runtime-lib" in sys.argv
+# build: compila el C a un ejecutable; run: ademas lo ejecuta y reporta tiempo y memoria
+command = sys.argv[1] if sys.argv[1:2] in [["build"], ["run"]] else None
+# --release: -O3 y LTO, --debug: -O0 -g; --cc COMPILADOR y --march ARQUITECTURA; --bin RUTA del ejecutable
+preset = "release" if "--release" in sys.argv else ("debug" if "--debug" in sys.argv else "default")
+cc = sys.argv[sys.argv.index("--cc") + 1] if "--cc" in sys.argv else None
+march = sys.argv[sys.argv.index("--march") + 1] if "--march" in sys.argv else None
+binary = sys.argv[sys.argv.index("--bin") + 1] if "--bin" in sys.argv else binary_path(output, split)
+# -j N: parsea las declaraciones, chequea los cuerpos y genera el C de cada tipo y funcion en N procesos
+jobs = int(sys.argv[sys.argv.index("-j") + 1]) if "-j" in sys.argv else 1
+
+
+def finish(binary):
+    print("BUILD OK:", binary)
+    if command == "run":
+        print(run(binary), file=sys.stderr)
+
+
+# build y run guardan el C y el ejecutable en la cache (HULK_CACHE_DIR, por defecto ~/.cache/hulk);
+# --shared-cache CARPETA o HULK_SHARED_CACHE la comparte entre maquinas, --no-cache no la usa.
+# Se mira antes de importar el parser, que arma sus tablas al importarse
+cache = None
+if command is not None and not split and "--no-cache" not in sys.argv and "--pass-stats" not in sys.argv:
+    toolchain = Toolchain(preset, cc, march)
+    shared = sys.argv[sys.argv.index("--shared-cache") + 1] if "--shared-cache" in sys.argv else None
+    cache = BuildCache(shared=shared)
+    key = cache.key(CODE, compiler_fingerprint(), toolchain.fingerprint(), level, memoize, runtime_library)
+    entry = cache.lookup(key)
+    if entry is not None:
+        shutil.copy2(os.path.join(entry, "out.c"), output)
+        shutil.copy2(os.path.join(entry, "program"), binary)
+        print("CACHED")
+        finish(binary)
+        sys.exit(0)
+
+from hulk_lexer import errorList as lexerErrors
+from hulk_parser import hulk_parse
+from hulk_incremental import parse_program
+from hulk_semantic_check import semantic_check
+from hulk_code_gen import CodeGen
+from hulk_passes import standard_passes
+from hulk_runtime import RUNTIME_DIR, build_runtime
+from misc import typeof
+
+if jobs > 1:
+    ast, parsingErrors = parse_program(CODE, workers=jobs)
+else:
+    ast, parsingErrors, nodes = hulk_parse(CODE, create_graph=False)
 
 print(
     "LEXER FOUND THE FOLLOWING ERRORS:" if len(
@@ -32,7 +89,7 @@ print(
     sep="\n - ",
 )
 if ast:
-    ast, semantic_check_errors = semantic_check(ast, CODE)
+    ast, semantic_check_errors = semantic_check(ast, CODE, jobs)
 
     print(
         (
@@ -45,4 +102,15 @@ if ast:
     )
     if len(semantic_check_errors) == 0:
         print("\nGlobal Expression returned:", typeof(ast.global_exp))
-        CodeGen().visit(ast)
\ No newline at end of file
+        passes = standard_passes(level, enable=["memoize"] if memoize else [])
+        CodeGen(passes, output=output, split=split, runtime_library=runtime_library, workers=jobs).visit(ast)
+        if command is None and runtime_library and not split:
+            print(f"gcc {output} -I{RUNTIME_DIR} {build_runtime()} -lm")
+        if command is not None:
+            binary = build(output, Toolchain(preset, cc, march), split, runtime_library, binary)
+            if cache is not None:
+                cache.store(key, {"out.c": output, "program": binary})
+            finish(binary)
+        # --pass-stats: tiempo y cambios de cada pasada
+        if "--pass-stats" in sys.argv:
+            print(passes.report())
@@ -1,25 +1,80 @@
 from typing import List
 
-nodes = {}
-global_definitions = {}
-hierarchy_tree = {}
-protocol_hierarchy = {}
+# con un diccionario aqui cada nodo nuevo se guarda con su etiqueta, para create_AST_graph; hulk_parse lo pone si se pide el grafo
+registry = None
+
+
+class Context:
+    "las tablas de un programa que comparten todos sus nodos"
+    __slots__ = ("global_definitions", "hierarchy_tree", "protocol_hierarchy")
+
+    def __init__(self):
+        self.global_definitions = {}
+        self.hierarchy_tree = {}
+        self.protocol_hierarchy = {}
+
 
 class Node:
+    __slots__ = ("parent", "variable_scope", "static_type", "ret_point", "tk", "program_context")
+
     def __init__(self, slf, nm):
-        nodes[slf] = nm
+        if registry is not None:
+            registry[slf] = nm
         self.parent : Node = None
-        self.global_definitions : dict = global_definitions
-        self.variable_scope :dict = {}
-        self.hierarchy_tree :dict = hierarchy_tree
-        self.protocol_hierarchy :dict = protocol_hierarchy
         self.static_type : str = "Object"
         self.ret_point :str = "ret_point"
         self.tk = None
+        self.program_context : Context = None
+
+    def __getattr__(self, name):
+        # la mayoria de los nodos nunca tiene un alcance propio, se crea la primera vez que se pide
+        if name == "variable_scope":
+            self.variable_scope = {}
+            return self.variable_scope
+        raise AttributeError(name)
+
+    @property
+    def context(self):
+        "el Context del Program del nodo"
+        context = self.program_context
+        return context if context is not None else self.find_context()
+
+    def find_context(self):
+        """sube por parent hasta un nodo que ya tenga el Context de su Program y lo guarda en todo el camino:
+        los chequeos bajan desde la raiz y cada nodo sube un paso"""
+        path = []
+        node = self
+        while node.program_context is None:
+            path.append(node)
+            node = node.parent
+            if node is None:
+                raise ValueError(f"{type(self).__name__} node is not part of a Program")
+        for item in path:
+            item.program_context = node.program_context
+        return node.program_context
+
+    # las tablas son las del Program de cada nodo, dos programas vivos en el mismo proceso no se mezclan
+    @property
+    def global_definitions(self):
+        return self.context.global_definitions
+
+    @property
+    def hierarchy_tree(self):
+        return self.context.hierarchy_tree
+
+    @property
+    def protocol_hierarchy(self):
+        return self.context.protocol_hierarchy
+
+    def number(self, prefix):
+        "el siguiente instance_id y el nombre del nodo en el C, numero_prefix"
+        Program.instance_count += 1
+        self.instance_id = Program.instance_count
+        self.name = f"{prefix}_{self.instance_id}"
 
 
 class Program(Node):
-    function_names = set()  # Class variable to keep track of function names
+    __slots__ = ("functions", "types", "protocols", "global_exp", "types_names", "input")
     instance_count = 0
 
     def __init__(self, functions_types, global_expression):
@@ -29,41 +84,37 @@ class Program(Node):
         self.protocols = list(filter(lambda x: type(x) is Protocol, functions_types))
         self.global_exp: Node = global_expression
         self.types_names = [type_def.id.name for type_def in self.types]
-
-    @classmethod
-    def add_function_name(cls, name):
-        if name in cls.function_names:
-            raise ValueError(f"Function {name} is already defined.")
-        cls.function_names.add(name)
-
-    @classmethod
-    def function_name_exists(cls, name):
-        return name in cls.function_names
+        self.program_context = Context()
 
 
 # region FunctionClasses
 class FunctionDef(Node):
+    __slots__ = ("func_id", "params", "body", "tail_recursive", "memoized")
+
     def __init__(self, func_id, params, body):
         super().__init__(self, "FUNC_DEF")
         self.func_id : ID = func_id
         self.params : Params = params
         self.body : Node = body
-        # Check if the function name already exists
-        if Program.function_name_exists(self.func_id):
-            raise ValueError(f"Function {self.func_id} is already defined.")
-        Program.add_function_name(self.func_id)  # Add the function name to the tracker
+        self.tail_recursive : bool = False
+        self.memoized : bool = False
 
 
 class FunctionCall(Node):
+    __slots__ = ("func_id", "params", "param_types", "tail_call")
+
     def __init__(self, func_id, params):
         super().__init__(self, "FUNC_CALL")
         self.func_id : ID = func_id
         self.params : Params = params
         self.param_types = []
+        self.tail_call : bool = False
 
 
 
 class Params(Node):
+    __slots__ = ("param_list",)
+
     def __init__(self, param_list):
         super().__init__(self, "params")
         self.param_list : List[Node] = param_list
@@ -71,36 +122,28 @@ class Params(Node):
 
 # endregion
 class ExpressionBlock(Node):
+    __slots__ = ("instance_id", "name", "exp_list")
+
     def __init__(self, exps):
         super().__init__(self, "EXP_BLOCK")
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"expression_block_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"expression_block_{self.instance_id}"
-        Program.add_function_name(self.name)  # Add the function name to the tracker
+        self.number("expression_block")
         self.exp_list : List[Node] = exps
 
 
 class Let(Node):
+    __slots__ = ("instance_id", "name", "assign", "body")
+
     def __init__(self, assign, body):
         super().__init__(self, "LET")
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"let_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"let_{self.instance_id}"
-        Program.add_function_name(self.name)  # Add the function name to the tracker
+        self.number("let")
 
         self.assign : List[Assign] = assign
         self.body : Node = body
 
 
 class Assign(Node):  # example: name = var a ,value = 4
+    __slots__ = ("name", "value")
+
     def __init__(self, name, value):
         super().__init__(self, "ASSIGN")
         self.name : ID = name
@@ -108,6 +151,8 @@ class Assign(Node):  # example: name = var a ,value = 4
 
 
 class ID(Node):
+    __slots__ = ("name", "annotated_type")
+
     def __init__(self, name, annotated_type):
         if annotated_type == "":
             super().__init__(self, "var " + name)
@@ -118,20 +163,17 @@ class ID(Node):
 
 
 class If(Node):
+    __slots__ = ("instance_id", "name", "case_list")
+
     def __init__(self, case_list):
         super().__init__(self, "IF")
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"if_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"if_{self.instance_id}"
-        Program.add_function_name(self.name)  # Add the function name to the tracker
+        self.number("if")
         self.case_list : List[Case] = case_list
 
 
 class Case(Node):
+    __slots__ = ("condition", "body", "branch")
+
     def __init__(self, condition, body, branch):
         super().__init__(self, "IF " + branch)
         self.condition:Node = condition
@@ -140,21 +182,22 @@ class Case(Node):
 
 
 class While(Node):
+    __slots__ = ("condition", "body", "for_let", "native_loop", "counter_loop", "bounds_guards", "instance_id", "name")
+
     def __init__(self, condition, body):
         super().__init__(self, "WHILE")
         self.condition: Node = condition
         self.body : Node = body
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"while_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"while_{self.instance_id}"
-        Program.add_function_name(self.name)  # Add the function name to the tracker
+        self.for_let : Let = None  # el let del iterador si el while viene de un for
+        self.native_loop = None
+        self.counter_loop = None
+        self.bounds_guards = []  # comprobaciones de limites que se hacen antes del ciclo
+        self.number("while")
 
 
 class For(Node):
+    __slots__ = ("iterator", "iterable", "body")
+
     def __init__(self, iterator, iterable, body):
         super().__init__(self, "FOR")
         self.iterator: ID = iterator
@@ -163,34 +206,24 @@ class For(Node):
 
 
 class TrueLiteral(Node):
+    __slots__ = ("instance_id", "name")
+
     def __init__(self):
         super().__init__(self, "TRUE")
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"true_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"true_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("true")
 
 
 class FalseLiteral(Node):
+    __slots__ = ("instance_id", "name")
+
     def __init__(self):
         super().__init__(self, "FALSE")
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"false_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"false_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("false")
 
 
 class TypeDef(Node):
+    __slots__ = ("id", "variables", "functions", "params", "inherits", "types_names")
+
     def __init__(self, id, params, members, inherits):
         super().__init__(self, "TYPE_DEF")
         self.id : ID = id 
@@ -205,23 +238,20 @@ class TypeDef(Node):
 
 
 class TypeCall(Node):
+    __slots__ = ("id", "params", "instance_id", "name", "param_types")
+
     def __init__(self, id, params):
         super().__init__(self, "TYPE_CALL")
         self.id : ID = id
         self.params : Params = params
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"{id.name.lower()}_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"{id.name.lower()}_{self.instance_id}"
-        Program.add_function_name(self.name)  # Add the function name to the tracker
+        self.number(id.name.lower())
         self.param_types = []
 
 
 # region temporal
 class Protocol(Node):
+    __slots__ = ("id", "functions", "extends")
+
     def __init__(self, id, methods, extends):
         super().__init__(self, "PROTOCOL")
         self.id : ID = id
@@ -230,87 +260,64 @@ class Protocol(Node):
 
 
 class VectorExt(Node):
+    __slots__ = ("items", "instance_id", "name")
+
     def __init__(self, items):
         super().__init__(self, "VECTOR_EXT")
         self.items = items
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"vector_ext_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"vector_ext_{self.instance_id}"
-        Program.add_function_name(self.name)  # Add the function name to the tracker
+        self.number("vector_ext")
 
 
 class VectorInt(Node):
+    __slots__ = ("instance_id", "name", "expression", "iterator", "iterable", "native_loop")
+
     def __init__(self, expression, iterator, iterable):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"vect_int_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"vect_int_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("vect_int")
         super().__init__(self, "VECTOR_INT")
         self.expression : Node = expression
         self.iterator : ID = iterator
         self.iterable : Node = iterable
+        self.native_loop = None
 
 
 class VectorCall(Node):
+    __slots__ = ("instance_id", "name", "id", "index", "bounds_guard")
+
     def __init__(self, id, index):
         super().__init__(self, "VECTOR_CALL")
+        self.number("vector_call")
         self.id : Node = id
         self.index : Node = index
+        self.bounds_guard = None
 
 
 class BinOp(Node):
+    __slots__ = ("instance_id", "name", "left", "op", "right")
 
     def __init__(self, left, op, right):
         super().__init__(self, op)
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"bin_op_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"bin_op_{self.instance_id}"
-        Program.add_function_name(self.name)  # Add the function name to the tracker
+        self.number("bin_op")
         self.left : Node = left
         self.op : str = op
         self.right :Node = right
 
 
 class UnaryOp(Node):
+    __slots__ = ("instance_id", "name", "op", "operand")
+
     def __init__(self, op, operand):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"unary_op_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"unary_op_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("unary_op")
         super().__init__(self, str(op))
         self.op = op
         self.operand : Node = operand
 
 
 class Num(Node):
+    __slots__ = ("instance_id", "name", "value")
+
     def __init__(self, value):
         super().__init__(self, str(value))
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"float_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"float_{self.instance_id}"
-        Program.add_function_name(self.name)  # Add the function name to the tracker
+        self.number("float")
         if isinstance(value, (int, float)):
             self.value = float(value)
         else:
@@ -318,16 +325,11 @@ class Num(Node):
 
 
 class StringLiteral(Node):
+    __slots__ = ("instance_id", "name", "value")
+
     def __init__(self, value):
         super().__init__(self, value)
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"string_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"string_{self.instance_id}"
-        Program.add_function_name(self.name)  # Add the function name to the tracker
+        self.number("string")
         # eliminate the ' ' from value
         if value[0] == "'" or value[0] == '"':
             value = value[1:-1]
@@ -335,30 +337,18 @@ class StringLiteral(Node):
 
 
 class Pi(Node):
+    __slots__ = ("instance_id", "name")
+
     def __init__(self):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"PI_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"PI_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("PI")
         super().__init__(self, "PI")
 
 
 class E(Node):
+    __slots__ = ("instance_id", "name")
+
     def __init__(self):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"E_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"E_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("E")
         super().__init__(self, "E")
 
 
@@ -366,108 +356,64 @@ class E(Node):
 class Print(
     Node
 ):  # most be modified to work with all literals, now only works with numbers, missing strings and booleans
+    __slots__ = ("instance_id", "name", "value")
     instance_count = 0  # Class variable to keep track of the number of instances
 
     def __init__(self, value):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"print_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"print_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("print")
         super().__init__(self, "PRINT")
         self.value : Node = value
 
 
 class Sqrt(Node):
+    __slots__ = ("instance_id", "name", "value")
+
     def __init__(self, value):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"sqrt_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"sqrt_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("sqrt")
         super().__init__(self, "SQRT")
         self.value : Node = value
 
 
 class Sin(Node):
+    __slots__ = ("instance_id", "name", "value")
+
     def __init__(self, value):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"sin_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"sin_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("sin")
         super().__init__(self, "SIN")
         self.value : Node = value
 
 
 class Cos(Node):
+    __slots__ = ("instance_id", "name", "value")
+
     def __init__(self, value):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"cos_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"cos_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("cos")
         super().__init__(self, "COS")
         self.value : Node = value
 
 
 class Exp(Node):
+    __slots__ = ("instance_id", "name", "value")
+
     def __init__(self, value):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"exp_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"exp_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("exp")
         super().__init__(self, "EXP")
         self.value : Node = value
 
 
 class Log(Node):
+    __slots__ = ("instance_id", "name", "base", "value")
+
     def __init__(self, value, base):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"log_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"log_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("log")
         super().__init__(self, "LOG")
         self.base : Node = base
         self.value : Node = value
 
 
 class Rand(Node):
+    __slots__ = ("instance_id", "name")
 
     def __init__(self):
-        Program.instance_count += 1  # Increment the counter for each new instance
-        self.instance_id = Program.instance_count
-        self.name = f"log_{self.instance_id}"
-        while Program.function_name_exists(self.name):
-            Program.instance_count += 1
-            self.instance_id = Program.instance_count
-            self.name = f"log_{self.instance_id}"
-        # Add the function name to the tracker
-        Program.add_function_name(self.name)
+        self.number("log")
         super().__init__(self, "RAND")
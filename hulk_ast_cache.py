@@ -0,0 +1,99 @@
+"""cache del ast ya chequeado, para herramientas que pasan muchas veces por el frontend
+
+uso: python hulk_ast_cache.py archivo.hulk ...
+chequea cada archivo, usando la cache si su fuente y el compilador no cambiaron
+"""
+import gc
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import zlib
+
+from hulk_cache import BuildCache, compiler_fingerprint, dumps, loads
+
+# el parser y el chequeo guardan estado global, despues del primer programa del proceso
+# cada fuente nueva se chequea en otro proceso que la deja en la cache
+frontend_used = False
+
+
+class ASTCache:
+    """guarda el Program despues de refact_ast y semantic_check, con sus errores, comprimido con dumps y zlib.
+    La clave es el hash de la fuente y del compilador; las entradas van en una BuildCache aparte"""
+
+    def __init__(self, directory=None, max_size=256 << 20):
+        self.cache = BuildCache(directory or os.path.join(BuildCache().directory, "ast"), max_size)
+
+    def key(self, code):
+        return BuildCache.key("ast", code, compiler_fingerprint())
+
+    def load(self, code):
+        "(ast, errors) o None si no esta"
+        entry = self.cache.lookup(self.key(code))
+        if entry is None:
+            return None
+        with open(os.path.join(entry, "ast"), "rb") as f:
+            data = zlib.decompress(f.read())
+        # son muchos objetos nuevos y ninguno es basura, el gc solo haria recorridos inutiles
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return loads(data)
+        finally:
+            if enabled:
+                gc.enable()
+
+    def store(self, code, ast, errors):
+        data = zlib.compress(dumps((ast, errors)))
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(data)
+        try:
+            self.cache.store(self.key(code), {"ast": f.name})
+        finally:
+            os.remove(f.name)
+
+
+def frontend(code, cache: ASTCache = None):
+    """parsea y chequea code, devuelve (ast, errores); ast es None si no parsea.
+    Con cache, si ya se chequeo esa fuente se carga el resultado guardado"""
+    global frontend_used
+    if cache is not None:
+        loaded = cache.load(code)
+        if loaded is not None:
+            return loaded
+        if frontend_used:
+            subprocess.run(
+                [sys.executable, __file__, "--store", cache.cache.directory], input=code, text=True, check=True
+            )
+            return cache.load(code)
+    frontend_used = True
+    # el parser arma sus tablas al importarse, con la cache llena no hace falta
+    from hulk_lexer import errorList as lexer_errors
+    from hulk_parser import hulk_parse
+    from hulk_semantic_check import semantic_check
+
+    seen = len(lexer_errors)
+    ast, errors, _ = hulk_parse(code)
+    errors = lexer_errors[seen:] + errors
+    if ast is not None and not errors:
+        ast, errors = semantic_check(ast, code)
+    if cache is not None:
+        cache.store(code, ast if not errors else None, errors)
+    return ast if not errors else None, errors
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--store"]:
+        frontend(sys.stdin.read(), ASTCache(sys.argv[2]))
+        sys.exit(0)
+    cache = ASTCache()
+    failed = False
+    for path in sys.argv[1:]:
+        _, errors = frontend(io.open(path).read(), cache)
+        if errors:
+            print(f"{path}: FOUND THE FOLLOWING ERRORS:", *errors, sep="\n - ")
+        else:
+            print(f"{path}: OK")
+        failed = failed or bool(errors)
+    sys.exit(1 if failed else 0)
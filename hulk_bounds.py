@@ -0,0 +1,121 @@
+from misc import ast_walk
+from hulk_ast import (
+    Program,
+    ExpressionBlock,
+    Let,
+    ID,
+    While,
+    VectorInt,
+    VectorCall,
+    BinOp,
+    Num,
+)
+from hulk_loops import RangeLoop
+
+
+class BoundsGuard:
+    "v[i] dentro de un ciclo donde i solo crece desde su valor inicial y no pasa de un limite fijo"
+
+    def __init__(self, loop: While, vector):
+        self.loop = loop
+        self.vector = vector
+
+    @property
+    def name(self):
+        # el ciclo se numera de nuevo antes de emitir el C
+        return f"in_bounds_{self.loop.instance_id}_{self.vector}"
+
+
+class CounterLoop:
+    "while (i < n) {...; i := i + k} con n fijo y k > 0: dentro del cuerpo i esta en [i0, n)"
+
+    def __init__(self, counter, limit, op):
+        self.counter = counter
+        self.limit = limit
+        self.op = op
+
+
+def bound_names(body):
+    "nombres que se declaran o se asignan con ':=' dentro de body"
+    declared = set()
+    assigned = set()
+    for node in ast_walk(body):
+        if type(node) is Let:
+            declared |= {assign.name.name for assign in node.assign}
+        elif type(node) is VectorInt:
+            declared.add(node.iterator.name)
+        elif type(node) is BinOp and node.op == "AD" and type(node.left) is ID:
+            assigned.add(node.left.name)
+    return declared, assigned
+
+
+def counter_increment(node, counter):
+    "True si node es counter := counter + k con k > 0"
+    return (
+        type(node) is BinOp
+        and node.op == "AD"
+        and type(node.left) is ID
+        and node.left.name == counter
+        and type(node.right) is BinOp
+        and node.right.op == "+"
+        and type(node.right.left) is ID
+        and node.right.left.name == counter
+        and type(node.right.right) is Num
+        and float(node.right.right.value) > 0
+    )
+
+
+class BoundsCheckElimination:
+    """busca los v[i] dentro de ciclos cuyo indice es una variable de induccion:
+    el for sobre un rango bajado a C y el while con un contador que solo se incrementa al final.
+    La comprobacion de limites se hace una vez antes del ciclo en lugar de en cada acceso"""
+
+    def run(self, program: Program):
+        for node in ast_walk(program):
+            if type(node) is not While:
+                continue
+            if isinstance(node.native_loop, RangeLoop):
+                counter = node.for_let.assign[0].name.name
+                body = node.for_let.body
+            else:
+                node.counter_loop = self.counter_loop(node)
+                if node.counter_loop is None:
+                    continue
+                counter = node.counter_loop.counter
+                body = node.body
+            self.guard_accesses(node, counter, body)
+        return program
+
+    def counter_loop(self, node: While):
+        condition = node.condition
+        if type(condition) is not BinOp or condition.op not in ["<", "<="] or type(condition.left) is not ID:
+            return None
+        counter = condition.left.name
+        if type(condition.right) not in [Num, ID]:
+            return None
+
+        body = node.body
+        if type(body) is not ExpressionBlock or not body.exp_list or not counter_increment(body.exp_list[-1], counter):
+            return None
+        # el resto del cuerpo no puede tocar el contador ni el limite
+        for expression in body.exp_list[:-1]:
+            declared, assigned = bound_names(expression)
+            if {counter, condition.right.name if type(condition.right) is ID else None} & (declared | assigned):
+                return None
+        return CounterLoop(counter, condition.right, condition.op)
+
+    def guard_accesses(self, loop: While, counter, body):
+        declared, assigned = bound_names(body)
+        if counter in declared or (loop.for_let is not None and counter in assigned):
+            return
+        guards = {}
+        for node in ast_walk(body):
+            if type(node) is not VectorCall or type(node.id) is not ID or type(node.index) is not ID:
+                continue
+            vector = node.id.name
+            if node.index.name != counter or vector in declared or vector in assigned or vector == counter:
+                continue
+            if vector not in guards:
+                guards[vector] = BoundsGuard(loop, vector)
+            node.bounds_guard = guards[vector]
+        loop.bounds_guards = list(guards.values())
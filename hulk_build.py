@@ -0,0 +1,119 @@
+import ast
+import os
+import shlex
+import subprocess
+import sys
+
+from hulk_runtime import RUNTIME_DIR, build_runtime
+
+# opciones de optimizacion de cada preset; --release agrega LTO, que tambien hace falta al enlazar
+PRESETS = {
+    "debug": ["-O0", "-g"],
+    "default": ["-O2"],
+    "release": ["-O3", "-flto"],
+}
+
+
+class Toolchain:
+    """el compilador de C con que se construye el programa generado.
+    cc, cflags y ldflags toman por defecto CC, CFLAGS y LDFLAGS del entorno, despues de las del preset"""
+
+    def __init__(self, preset="default", cc=None, march=None, cflags=(), ldflags=()):
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown build preset {preset}")
+        self.preset = preset
+        self.cc = cc or os.environ.get("CC", "gcc")
+        self.cflags = ["-w"] + PRESETS[preset] + shlex.split(os.environ.get("CFLAGS", "")) + list(cflags)
+        if march is not None:
+            self.cflags.append(f"-march={march}")
+        self.ldflags = shlex.split(os.environ.get("LDFLAGS", "")) + list(ldflags)
+
+    def command(self, sources, binary, include_dirs=(), libraries=()):
+        "un solo gcc que compila y enlaza, asi -flto ve todo el programa"
+        includes = [f"-I{include_dir}" for include_dir in include_dirs]
+        return [self.cc, *self.cflags, *includes, "-o", binary, *sources, *libraries, *self.ldflags, "-lm"]
+
+    def fingerprint(self):
+        "lo que decide el ejecutable ademas del C: la version del compilador y las opciones"
+        version = subprocess.run([self.cc, "--version"], capture_output=True, text=True, check=True).stdout
+        return [version, self.cflags, self.ldflags]
+
+    def make_variables(self):
+        "las mismas opciones para el Makefile de --split"
+        return [f"CC={self.cc}", f"CFLAGS={shlex.join(self.cflags)}", f"LDFLAGS={shlex.join(self.ldflags)}"]
+
+
+def binary_path(output, split):
+    "./out.c se construye como ./out y una carpeta de --split como carpeta/program"
+    if split:
+        return os.path.join(output, "program")
+    return os.path.splitext(output)[0]
+
+
+def build(output, toolchain: Toolchain, split=False, runtime_library=False, binary=None):
+    """compila lo que escribio CodeGen en output y devuelve la ruta del ejecutable.
+    libhulk_runtime.a se compila con las opciones de runtime/Makefile, no con las del preset"""
+    if split:
+        subprocess.run(["make", "-s", "-C", output, "program", *toolchain.make_variables()], check=True)
+        built = binary_path(output, True)
+        if binary is not None and os.path.abspath(binary) != os.path.abspath(built):
+            os.replace(built, binary)
+            return binary
+        return built
+    binary = binary or binary_path(output, False)
+    include_dirs = [RUNTIME_DIR] if runtime_library else []
+    libraries = [build_runtime()] if runtime_library else []
+    subprocess.run(toolchain.command([output], binary, include_dirs, libraries), check=True)
+    return binary
+
+
+class RunStats:
+    def __init__(self, exit_code, wall, user, system, max_rss):
+        self.exit_code = exit_code
+        self.wall = wall
+        self.user = user
+        self.system = system
+        # en KB, como lo da getrusage en Linux
+        self.max_rss = max_rss
+
+    def __str__(self):
+        return "\n".join([
+            f"exit code: {self.exit_code}",
+            f"wall time: {self.wall:.3f} s",
+            f"user time: {self.user:.3f} s",
+            f"sys time:  {self.system:.3f} s",
+            f"max RSS:   {self.max_rss / 1024:.1f} MB",
+        ])
+
+
+# el proceso intermedio de run: crea el programa con fork y le pasa a run por el descriptor fd lo que da wait4
+MEASURE = """
+import os, sys, time
+fd, binary, args = int(sys.argv[1]), sys.argv[2], sys.argv[2:]
+start = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    try:
+        os.execv(binary, args)
+    finally:
+        os._exit(127)
+_, status, usage = os.wait4(pid, 0)
+wall = time.perf_counter() - start
+os.write(fd, repr((os.waitstatus_to_exitcode(status), wall, usage.ru_utime, usage.ru_stime, usage.ru_maxrss)).encode())
+"""
+
+
+def run(binary, args=()):
+    """ejecuta el programa y mide solo ese proceso: wait4 da su uso de CPU y su pico de memoria.
+    Linux le pasa al hijo el pico de memoria del proceso que lo crea, asi que el programa no lo crea el
+    compilador sino un python -S chico; el max RSS incluye a lo sumo los pocos MB de ese proceso"""
+    binary = os.path.abspath(binary)
+    read, write = os.pipe()
+    try:
+        helper = subprocess.Popen([sys.executable, "-S", "-c", MEASURE, str(write), binary, *args], pass_fds=(write,))
+    finally:
+        os.close(write)
+    with os.fdopen(read) as f:
+        result = f.read()
+    helper.wait()
+    return RunStats(*ast.literal_eval(result))
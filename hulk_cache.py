@@ -0,0 +1,187 @@
+import functools
+import hashlib
+import io
+import os
+import pickle
+import shutil
+import tempfile
+
+from hulk_runtime import RUNTIME_DIR
+
+COMPILER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_fingerprint():
+    "hash de las fuentes del compilador y del runtime, si cambian no sirve nada de lo guardado; se calcula una vez por proceso"
+    digest = hashlib.sha256()
+    for directory, suffixes in [(COMPILER_DIR, (".py",)), (RUNTIME_DIR, (".c", ".h"))]:
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(suffixes) and name != "parsetab.py":
+                digest.update(name.encode())
+                with open(os.path.join(directory, name), "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def flat(cls):
+    "si pickle guarda las instancias de cls con su estado por defecto, el __dict__ y los slots"
+    return (
+        cls.__new__ is object.__new__
+        and cls.__reduce_ex__ is object.__reduce_ex__
+        and cls.__reduce__ is object.__reduce__
+        and getattr(cls, "__getstate__", None) is getattr(object, "__getstate__", None)
+        and not any(hasattr(cls, name) for name in ["__setstate__", "__getnewargs__", "__getnewargs_ex__"])
+    )
+
+
+class FlatPickler(pickle.Pickler):
+    "cada objeto con estado por defecto se guarda aparte y donde aparece va su indice"
+
+    def __init__(self, file):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.index = {}
+        self.objects = []
+
+    def persistent_id(self, obj):
+        if not flat(type(obj)):
+            return None
+        number = self.index.get(id(obj))
+        if number is not None:
+            return number
+        self.index[id(obj)] = len(self.objects)
+        self.objects.append(obj)
+        return type(obj)
+
+
+class FlatUnpickler(pickle.Unpickler):
+    def __init__(self, file):
+        super().__init__(file)
+        self.objects = []
+
+    def persistent_load(self, pid):
+        if type(pid) is int:
+            return self.objects[pid]
+        self.objects.append(pid.__new__(pid))
+        return self.objects[-1]
+
+
+def dumps(value):
+    """pickle de value sin recursion a traves de los objetos: el ast con sus punteros al padre
+    se recorreria entero con la pila de C. Cada objeto nuevo se guarda despues, en orden"""
+    f = io.BytesIO()
+    pickler = FlatPickler(f)
+    pickler.dump(value)
+    done = 0
+    while done < len(pickler.objects):
+        pickler.dump(pickler.objects[done].__reduce_ex__(pickle.HIGHEST_PROTOCOL)[2])
+        done += 1
+    return f.getvalue()
+
+
+def loads(data):
+    "lo que guardo dumps; los objetos se crean vacios donde aparecen y se llenan en el mismo orden"
+    unpickler = FlatUnpickler(io.BytesIO(data))
+    value = unpickler.load()
+    # la lista crece mientras se llenan los objetos
+    for obj in unpickler.objects:
+        state = unpickler.load()
+        slots = None
+        if type(state) is tuple:
+            state, slots = state
+        if state:
+            obj.__dict__.update(state)
+        for name, slot in (slots or {}).items():
+            setattr(obj, name, slot)
+    return value
+
+
+def directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    )
+
+
+class BuildCache:
+    """guarda el C generado y el ejecutable de cada compilacion bajo el hash de todo lo que los determina.
+    Cada entrada es una carpeta directory/ab/abcd...; su mtime es el ultimo uso y al pasar de max_size se borran
+    las menos usadas. shared es una carpeta comun a varias maquinas: se busca ahi si no esta en la local y
+    cada entrada nueva se copia tambien alli"""
+
+    def __init__(self, directory=None, max_size=512 << 20, shared=None):
+        self.directory = directory or os.environ.get(
+            "HULK_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "hulk")
+        )
+        self.max_size = max_size
+        self.shared = shared or os.environ.get("HULK_SHARED_CACHE")
+
+    @staticmethod
+    def key(*parts):
+        digest = hashlib.sha256()
+        for part in parts:
+            data = part.encode() if isinstance(part, str) else repr(part).encode()
+            # el largo separa las partes, "ab" + "c" no choca con "a" + "bc"
+            digest.update(f"{len(data)}:".encode() + data)
+        return digest.hexdigest()
+
+    def entry(self, directory, key):
+        return os.path.join(directory, key[:2], key)
+
+    def lookup(self, key):
+        "la carpeta de la entrada o None; una entrada del directorio compartido se trae a la local"
+        path = self.entry(self.directory, key)
+        if os.path.isdir(path):
+            os.utime(path)
+            return path
+        if self.shared is not None and os.path.isdir(self.entry(self.shared, key)):
+            return self.publish(self.directory, key, self.entry(self.shared, key))
+        return None
+
+    def store(self, key, files):
+        "files: nombre en la entrada -> archivo a copiar"
+        staging = tempfile.mkdtemp(dir=self.ensure(self.directory))
+        for name, path in files.items():
+            shutil.copy2(path, os.path.join(staging, name))
+        path = self.publish(self.directory, key, staging)
+        shutil.rmtree(staging, ignore_errors=True)
+        if self.shared is not None:
+            self.publish(self.shared, key, path)
+        self.evict()
+        return path
+
+    def ensure(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def publish(self, directory, key, source):
+        """copia source como la entrada key de directory; se copia aparte y se renombra de una vez,
+        asi otro proceso nunca ve una entrada a medias y si dos la escriben a la vez gana la primera"""
+        path = self.entry(directory, key)
+        staging = tempfile.mkdtemp(dir=self.ensure(os.path.dirname(path)))
+        shutil.copytree(source, staging, dirs_exist_ok=True)
+        try:
+            os.rename(staging, path)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+        return path
+
+    def entries(self):
+        for prefix in os.listdir(self.directory):
+            prefix_path = os.path.join(self.directory, prefix)
+            if len(prefix) == 2 and os.path.isdir(prefix_path):
+                for key in os.listdir(prefix_path):
+                    yield os.path.join(prefix_path, key)
+
+    def evict(self):
+        "borra las entradas usadas hace mas tiempo hasta que la cache quepa en max_size, devuelve cuantas borro"
+        entries = sorted((os.path.getmtime(path), directory_size(path), path) for path in self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
@@ -1,11 +1,14 @@
 from ast import List
+import io
+import multiprocessing
+import os
+import time
 from hulk_semantic_check import HierarchyNode, ScopeBuilder
-from misc import create_AST_graph, get_descendancy_set, typeof, ColumnFinder
+from misc import create_AST_graph, get_descendancy_set, typeof, ColumnFinder, trampoline
 import visitor
 import misc
 from hulk_parser import hulk_parse
 from hulk_ast import (
-    nodes,
     Node,
     Program,
     FunctionDef,
@@ -42,19 +45,51 @@ from hulk_ast import (
     Rand,
 )
 from hulk_lexer import errorList as lexerErrors
+from hulk_loops import RangeLoop, VectorLoop
+from hulk_passes import PassManager, PassStats, standard_passes
+from hulk_output import Section, write_parts, write_unit, makefile
+from hulk_runtime import RUNTIME_DIR, RUNTIME_INCLUDE, RUNTIME_HEADER, RUNTIME_SOURCE, VECTOR_SOURCE, MEMO_SOURCE
+from hulk_ir import IRBuilder, Unsupported
+from hulk_ir_emit import CEmitter
 
 
 class CodeGen:
-    def __init__(self):
+    def __init__(self, passes: PassManager = None, memo_size=4096, ir=True, output="./out.c", split=False, functions_per_unit=16, runtime_library=False, workers=1):
         self.errors = []
+        # con workers > 1 el C de cada funcion y de cada tipo se genera en un pool de procesos
+        self.workers = workers
+        # segundos de cada etapa de la ultima generacion
+        self.times = {}
+        # con runtime_library el C generado solo incluye hulk_runtime.h y se enlaza con libhulk_runtime.a
+        self.runtime_library = runtime_library
+        # con split output es una carpeta con un encabezado, un .c por tipo y por grupo de funciones y un Makefile
+        self.output = output
+        self.split = split
+        self.functions_per_unit = functions_per_unit
+        # las pasadas de optimizacion sobre el ast y el ir, por defecto las de -O2
+        self.passes = passes if passes is not None else standard_passes()
+        self.ir = ir
+        # funciones que el ir no pudo representar y se generaron por el camino viejo, con el motivo
+        self.ir_fallbacks = []
+        # la tabla de cada funcion memoizada se indexa con una mascara, su tamanno es potencia de 2
+        self.memo_size = 1 << max(memo_size - 1, 1).bit_length()
+        self.memoized_functions = []
+        self.uses_vectors = True
+        self.current_function: FunctionDef = None
         self.global_definitions = {}
-        self.types_definitions = ""
-        self.functions_headers = ""
-        self.types_function_definitions = ""
-        self.types_constructor = ""
-        self.function_definitions = ""
-        self.types_headers = ""
-        self.types_functions_and_constructor_headers = ""
+        # cada parte de out.c se llena por pedazos y se copia al archivo al final, en el orden de main
+        self.types_definitions = Section()
+        self.functions_headers = Section()
+        self.types_function_definitions = Section()
+        self.types_constructor = Section()
+        # (variables, metodos) de cada tipo con los heredados, ver type_members
+        self.type_members = {}
+        # (tipo, metodos, constructor) de cada tipo en el orden en que se generan
+        self.type_units = []
+        self.function_units = []
+        self.main_definitions = Section()
+        self.types_headers = Section()
+        self.types_functions_and_constructor_headers = Section()
 
     @visitor.on("node")
     def visit(self, node):
@@ -62,7 +97,20 @@ class CodeGen:
 
     @visitor.when(Program)
     def visit(self, node):
-        main_def, main_ret = self.visit(node.global_exp)
+        start = time.perf_counter()
+        self.passes.run_ast(node)
+        # las pasadas crean nodos con el contador global, se vuelve a numerar para que el C sea siempre el mismo
+        misc.number_nodes(node)
+        # los Vector solo salen de literales y comprensiones, sin ellos no hacen falta vector_get ni vector_value
+        self.uses_vectors = any(isinstance(item, (VectorExt, VectorInt)) for item in misc.ast_walk(node))
+        self.times["ast passes"] = time.perf_counter() - start
+        start = time.perf_counter()
+        main_body = self.ir_body("hulk_main", [], node.global_exp.static_type, node.global_exp)
+        if main_body is not None:
+            self.main_definitions += f"""{node.global_exp.static_type}* hulk_main(){{\n{main_body}\n}}\n\n"""
+            main_def = "hulk_main();"
+        else:
+            main_def, main_ret = yield node.global_exp
         if node.functions:
             for function in node.functions:
                 list_params = []
@@ -79,10 +127,10 @@ class CodeGen:
                     code = f"""{function.static_type}* p_{function.func_id.name}({params_c_code});\n"""
                 else:
                     code = f"""{function.static_type}* {function.func_id.name}({params_c_code});\n"""
+                if function.memoized:
+                    code += f"""{function.static_type}* {self.c_function_name(function)}_memo_compute({params_c_code});\n"""
 
                 self.functions_headers += code+"\n"
-            for function in node.functions:
-                self.function_definitions += f"{self.visit(function)[0]}\n\n"
 
         if node.types:
             # ordenando node.types segun la herencia
@@ -97,233 +145,175 @@ class CodeGen:
 
             for type in node.types:
                 type.types_names = node.types_names
-                self.visit(type)[0]
-
-        with open("./out.c", "w") as f:
-            f.write("#include <stdio.h>\n")
-            f.write("#include <math.h>\n")
-            f.write("#include <stdlib.h>\n")
-            f.write("#include <string.h>\n\n")
-            f.write("# include <time.h>\n#include <sys/time.h>\n\n")
-            f.write(
-                """
-unsigned long int memory_usage = 0;
-unsigned long int memory_limit = 1 * (16 * 1024 * 1024) / 8;
-//Concatenate two strings
-char* concatenate_strings(const char* str1, const char* str2) {
-    // Calculate the length needed for the concatenated string
-    size_t len1 = strlen(str1);
-    size_t len2 = strlen(str2);
-    size_t length = len1 + len2 + 1; // +1 for the null terminator
-
-    // Allocate memory for the concatenated string
-    memory_usage = memory_usage+(length * sizeof(char));
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        char* result = (char*)malloc(length * sizeof(char));
-    if (result == NULL) {
-        printf("Memory allocation failed");
-        exit(-1); // Exit if memory allocation fails
-    }
-
-    // Copy the first string and concatenate the second string
-    memcpy(result, str1, len1);
-    memcpy(result + len1, str2, len2 + 1); // Copy the null terminator as well
-
-    return result;
-}
-int check_types(char* value, char* type) {
-    if (strcmp(value, type) == 0) {
-        return 1;
-    }
-    return 0;
-}
-typedef struct {
-       char *type;
-       char* string;   
-}Object;
-Object* new_Object() {
-    memory_usage = memory_usage+(sizeof(Object));    
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        Object* obj = (Object*)malloc(sizeof(Object));    
-    int string_len = strlen("Object");
-    memory_usage = memory_usage+((string_len + 1) * sizeof(char));
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        obj->type = (char*)malloc((string_len + 1) * sizeof(char));
-    strcpy(obj->type, "Object");
-    memory_usage = memory_usage+((string_len+1+30)*sizeof(char));
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        obj->string = (char*)malloc((string_len+1+30)*sizeof(char));
-    char memory_address_str[20]; // Assuming a maximum of 20 characters for the address string
-    sprintf(memory_address_str, "%p", (void *)obj);
-    strcpy(obj->string, concatenate_strings(concatenate_strings("<Object at ", memory_address_str), ">"));
-    return obj;
-}
-typedef struct {
-    char* type;
-    char* string;
-    int value;
-} Boolean;
-Boolean* new_Boolean(int value) {
-    memory_usage = memory_usage+(sizeof(Boolean));    
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        Boolean* obj = (Boolean*)malloc(sizeof(Boolean));    
-    int string_len = strlen("bool");
-    memory_usage = memory_usage+((string_len + 1) * sizeof(char));
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        obj->type = (char*)malloc((string_len + 1) * sizeof(char));
-    strcpy(obj->type, "bool");
-
-    obj->value = value;
+        self.type_members = type_members(node)
+        self.times["main and headers"] = time.perf_counter() - start
 
-    if (value == 1) {
-        memory_usage = memory_usage+((strlen("TRUE")+1) * sizeof(char));
-        if (memory_usage > memory_limit) {
-            printf("STACK OVERFLOW");
-            exit(-1);
-        }
-                obj->string = (char *)malloc((strlen("TRUE")+1) * sizeof(char));
-        
-        strcpy(obj->string, "TRUE");
-    } else {
-        memory_usage = memory_usage+((strlen("FALSE")+1) * sizeof(char));
-        if (memory_usage > memory_limit) {
-            printf("STACK OVERFLOW");
-            exit(-1);
-        }
-                obj->string = (char *)malloc((strlen("FALSE")+1) * sizeof(char));
-        strcpy(obj->string, "FALSE");
-    }
-    
-    return obj;
-}
-
-typedef struct {
-    char* type;
-    char* string;
-    float value;
-} Number;
-Number* new_Number(float value) {
-    memory_usage = memory_usage+(sizeof(Number));    
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        Number* obj = (Number*)malloc(sizeof(Number));    
-    int string_len = strlen("Number");
-    memory_usage = memory_usage+((string_len + 1) * sizeof(char));
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        obj->type = (char*)malloc((string_len + 1) * sizeof(char));
-    strcpy(obj->type, "Number");
-    
-    obj->value = value;
-    char buff[32];
-    sprintf(buff, "%.7f", value);
-    int value_len = strlen(buff);
-    memory_usage = memory_usage+((value_len + 1) * sizeof(char));
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        obj->string = (char *)malloc((value_len + 1) * sizeof(char));
-    strcpy(obj->string, buff);
-    return obj;
-}
-
-typedef struct {
-    char* type;
-    char* string;
-    char* value;
-} String;
-String* new_String(char* value) {
-    memory_usage = memory_usage+(sizeof(String));    
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        String* obj = (String*)malloc(sizeof(String));    
-    int string_len = strlen("string");
-    memory_usage = memory_usage+((string_len + 1) * sizeof(char));
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        obj->type = (char*)malloc((string_len + 1) * sizeof(char));
-    strcpy(obj->type, "string");
-    int value_len = strlen(value);
-    memory_usage = memory_usage+((value_len + 1) * sizeof(char));
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        obj->value = (char*)malloc((value_len + 1) * sizeof(char));
-    strcpy(obj->value, value);
-    memory_usage = memory_usage+((value_len+1) * sizeof(char));
-    if (memory_usage > memory_limit) {
-        printf("STACK OVERFLOW");
-        exit(-1);
-    }
-        obj->string = (char *)malloc((value_len+1) * sizeof(char));
-    strcpy(obj->string,obj->value);
-    return obj;
-}
-
-typedef struct {
-    char* type;
-    char* string;
-    void** data;
-    int len;
-} Vector;\n\n""")
-            f.write("//TYPE HEADERS\n")
-            f.write(self.types_headers+"\n")
-            f.write(self.types_definitions+"\n")
-            f.write("//FUNCTION HEADERS\n")
-            f.write(self.functions_headers+"\n")
-            f.write(self.types_functions_and_constructor_headers+"\n")
-            f.write("//TYPES AND FUNCTION DEFINITIONS\n")
-            f.write(self.types_function_definitions+"\n")
-            f.write("//TYPE CONSTRUCTORS\n")
-            f.write(self.types_constructor + "\n")
-            f.write("//FUNCTION DEFINITION\n")
-            f.write(self.function_definitions + "\n")
-            f.write("//MAAAAAAIIIIIIIINNNNN\n")
-            f.write("int main() {\n\n")
-            f.write("""struct timeval tv;
+        # con los miembros heredados ya armados el C de cada funcion y cada tipo no depende de los demas
+        start = time.perf_counter()
+        generated = self.generate(
+            [(generate_function, function) for function in node.functions] + [(generate_type, type) for type in node.types]
+        )
+        for i, function_code in enumerate(generated[:len(node.functions)]):
+            if i % self.functions_per_unit == 0:
+                self.function_units.append(Section())
+            self.function_units[-1] += f"{function_code}\n\n"
+        for definitions, headers, method_headers, unit in generated[len(node.functions):]:
+            self.types_definitions += definitions
+            self.types_headers += headers
+            self.types_functions_and_constructor_headers += method_headers
+            self.type_units.append(unit)
+        self.times["functions and types"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if self.split:
+            self.write_units(main_def)
+        else:
+            self.write_single(main_def)
+        self.times["write"] = time.perf_counter() - start
+
+    def generate(self, tasks):
+        """el resultado de cada (generate_item, funcion o tipo) de tasks, en orden; con workers > 1 en un pool de
+        procesos que heredan este CodeGen con fork. Las funciones memoizadas, los fallbacks del ir y las
+        estadisticas de las pasadas de cada proceso se juntan en las de este"""
+        global parallel_codegen, parallel_tasks
+        if self.workers <= 1 or len(tasks) <= 1:
+            return [generate_item(self, item) for generate_item, item in tasks]
+        parallel_codegen, parallel_tasks = self, tasks
+        try:
+            with multiprocessing.get_context("fork").Pool(self.workers) as pool:
+                chunksize = max(1, len(tasks) // (self.workers * 4))
+                results = pool.map(generate_in_worker, range(len(tasks)), chunksize)
+        finally:
+            parallel_codegen, parallel_tasks = None, []
+        generated = []
+        for code, memoized_functions, ir_fallbacks, stats in results:
+            generated.append(code)
+            self.memoized_functions.extend(memoized_functions)
+            self.ir_fallbacks.extend(ir_fallbacks)
+            for name, pass_stats in stats.items():
+                total = self.passes.stats.setdefault(name, PassStats())
+                total.runs += pass_stats.runs
+                total.seconds += pass_stats.seconds
+                total.changed += pass_stats.changed
+        return generated
+
+    def program_header(self):
+        "structs y prototipos del programa, lo que comparten todas las unidades"
+        memo_counters = "".join(
+            f"extern unsigned long int memo_hits_{c_name}, memo_misses_{c_name}, memo_evictions_{c_name};\n"
+            for c_name in self.memoized_functions
+        )
+        return [
+            "//TYPE HEADERS\n", self.types_headers, "\n", self.types_definitions, "\n",
+            "//FUNCTION HEADERS\n", self.functions_headers, "\n", self.types_functions_and_constructor_headers, "\n",
+            memo_counters,
+        ]
+
+    def main_source(self, main_def):
+        return f"""//RUNTIME STATS
+{self.runtime_stats()}
+//MAAAAAAIIIIIIIINNNNN
+int main() {{
+
+struct timeval tv;
     gettimeofday(&tv, NULL);
     unsigned long long seed = tv.tv_sec * 1000000 + tv.tv_usec;
-    srand(seed);""")
-            f.write(f"{main_def}\n\n")
-            f.write("return 0;\n")
-            f.write("}\n")
+    srand(seed);
+    if (getenv("HULK_STATS"))
+        atexit(hulk_runtime_stats);{main_def}
+
+return 0;
+}}
+"""
+
+    def runtime_parts(self):
+        "el runtime pegado en el programa, o solo su #include si se enlaza libhulk_runtime.a"
+        if self.runtime_library:
+            return [RUNTIME_INCLUDE], []
+        sources = [RUNTIME_SOURCE]
+        if self.uses_vectors:
+            sources.append(VECTOR_SOURCE)
+        if self.memoized_functions:
+            sources.append(MEMO_SOURCE)
+        return [RUNTIME_HEADER], sources
+
+    def write_single(self, main_def):
+        "todo el programa en el archivo output"
+        header, sources = self.runtime_parts()
+        with open(self.output, "w") as f:
+            write_parts(f, header + sources + self.program_header())
+            write_parts(f, ["//TYPES AND FUNCTION DEFINITIONS\n"] + [functions for _, functions, _ in self.type_units])
+            write_parts(f, ["//TYPE CONSTRUCTORS\n"] + [constructor for _, _, constructor in self.type_units])
+            write_parts(f, ["//FUNCTION DEFINITION\n"] + self.function_units + [self.main_definitions])
+            f.write(self.main_source(main_def))
+
+    def write_units(self, main_def):
+        "hulk.h, runtime.c, un .c por tipo, uno por cada functions_per_unit funciones, main.c y el Makefile"
+        os.makedirs(self.output, exist_ok=True)
+        include = '#include "hulk.h"\n'
+        header = io.StringIO()
+        runtime_header, runtime_sources = self.runtime_parts()
+        write_parts(header, ["#ifndef HULK_H\n#define HULK_H\n"] + runtime_header + self.program_header() + ["#endif\n"])
+        units = {"hulk.h": header.getvalue()}
+        if runtime_sources:
+            units["runtime.c"] = include + "".join(runtime_sources)
+        for type_name, functions, constructor in self.type_units:
+            units[f"type_{type_name}.c"] = include + str(functions) + "\n" + str(constructor) + "\n"
+        for i, functions in enumerate(self.function_units):
+            units[f"functions_{i}.c"] = include + str(functions)
+        units["main.c"] = include + str(self.main_definitions) + self.main_source(main_def)
+        sources = [name for name in units if name.endswith(".c")]
+        units["Makefile"] = makefile(sources, RUNTIME_DIR if self.runtime_library else None)
+        for name, content in units.items():
+            write_unit(os.path.join(self.output, name), content)
+
+    def runtime_stats(self):
+        "con la variable de entorno HULK_STATS el programa reporta en stderr su consumo al terminar"
+        code = """void hulk_runtime_stats() {
+    fprintf(stderr, "memory usage: %lu bytes\\n", memory_usage);
+"""
+        for c_name in self.memoized_functions:
+            code += f"""    fprintf(stderr, "memo {c_name}: %lu hits, %lu misses, %lu evictions, hit rate %.2f%%\\n",
+        memo_hits_{c_name}, memo_misses_{c_name}, memo_evictions_{c_name},
+        memo_hits_{c_name} + memo_misses_{c_name} ? 100.0 * memo_hits_{c_name} / (memo_hits_{c_name} + memo_misses_{c_name}) : 0.0);
+"""
+        code += "}\n"
+        return code
 
     @visitor.when(FunctionDef)
     def visit(self, node):
         # node.static_type = "Number"
         node.ret_point = "ret_point_" + node.func_id.name
         list_params = []
-        body_def, body_ret = self.visit(node.body)
+        self.current_function = node
         for param in node.params.param_list:
             list_params.append((param.static_type+"*", param.name))
+        ir_body = self.ir_body(node.func_id.name, node.params.param_list, node.static_type, node.body)
+        if ir_body is not None:
+            # en el ir las llamadas en cola ya son un salto al bloque de entrada
+            body_def, body_ret = ir_body, None
+        else:
+            body_def, body_ret = yield node.body
+
+        if node.tail_recursive and ir_body is None:
+            # las llamadas en cola dejan los nuevos argumentos en tail_arg_* y activan la bandera,
+            # asi la recursion se convierte en un ciclo que no consume pila
+            tail_vars = ""
+            tail_rebind = ""
+            for param_type, param_name in list_params:
+                tail_vars += f"{param_type} tail_arg_{param_name};\n"
+                tail_rebind += f"{param_name} = tail_arg_{param_name};\n"
+            body_def = f"""int tail_call_{node.func_id.name} = 1;
+{tail_vars}{node.static_type}* tail_ret_{node.func_id.name};
+while (tail_call_{node.func_id.name}) {{
+tail_call_{node.func_id.name} = 0;
+{body_def}
+tail_ret_{node.func_id.name} = ({node.static_type}*){body_ret};
+if (tail_call_{node.func_id.name}) {{
+{tail_rebind}}}
+}}"""
+            body_ret = f"tail_ret_{node.func_id.name}"
+
         params_c_code = ""
         for param_code in list_params:
             params_c_code += f"{param_code[0]} {param_code[1]},"
@@ -331,13 +321,17 @@ typedef struct {
         if params_c_code != "":
             params_c_code = params_c_code[:-1]
 
-        if node.func_id.name == "tan":
-            code = f"""{node.static_type}* p_{node.func_id.name}({params_c_code}){{\n{body_def}
-            return ({node.static_type}*){body_ret};
-        }}"""
+        c_name = self.c_function_name(node)
+        if body_ret is not None:
+            body_def += f"""
+            return ({node.static_type}*){body_ret};"""
+        if node.memoized:
+            # el cuerpo original pasa a ser _memo_compute y c_name consulta la tabla antes de llamarlo
+            code = f"""{node.static_type}* {c_name}_memo_compute({params_c_code}){{\n{body_def}
+        }}
+{self.memo_wrapper(node, c_name, params_c_code)}"""
         else:
-            code = f"""{node.static_type}* {node.func_id.name}({params_c_code}){{\n{body_def}
-            return ({node.static_type}*){body_ret};
+            code = f"""{node.static_type}* {c_name}({params_c_code}){{\n{body_def}
         }}"""
 
         params_name_c_code = ""
@@ -350,11 +344,94 @@ typedef struct {
 
         return code, ret_code
 
+    def ir_body(self, name, params, return_type, body, self_type=None):
+        "el cuerpo en C de una funcion generado desde el ir, None si el ir no soporta algo de body"
+        if not self.ir:
+            return None
+        try:
+            function = IRBuilder(self.c_function_name).build(name, params, return_type, body, self_type)
+        except Unsupported as error:
+            self.ir_fallbacks.append((name, str(error)))
+            return None
+        self.passes.run_ir(function)
+        return CEmitter().emit(function)
+
+    def c_function_name(self, function: FunctionDef):
+        if function.func_id.name == "tan":
+            return f"p_{function.func_id.name}"
+        return function.func_id.name
+
+    def memo_wrapper(self, node: FunctionDef, c_name, params_c_code):
+        "tabla hash de tamanno fijo por funcion, una colision desaloja la entrada anterior"
+        self.memoized_functions.append(c_name)
+        key_fields = ""
+        hash_code = ""
+        same_key = []
+        store_keys = ""
+        free_entry = ""
+        args = []
+        for i, param in enumerate(node.params.param_list):
+            args.append(param.name)
+            if param.static_type == "String":
+                key_fields += f"char* key_{i};\n"
+                hash_code += f"memo_hash = memo_hash_string(memo_hash, {param.name}->value);\n"
+                same_key.append(f"strcmp(memo_entry->key_{i}, {param.name}->value) == 0")
+                store_keys += f"memo_entry->key_{i} = memo_copy_string({param.name}->value);\n"
+                free_entry += f"free(memo_entry->key_{i});\n"
+            elif param.static_type == "Number":
+                key_fields += f"float key_{i};\n"
+                hash_code += f"memo_hash = memo_hash_float(memo_hash, {param.name}->value);\n"
+                same_key.append(f"memo_same_float(memo_entry->key_{i}, {param.name}->value)")
+                store_keys += f"memo_entry->key_{i} = {param.name}->value;\n"
+            else:
+                key_fields += f"int key_{i};\n"
+                hash_code += f"memo_hash = memo_hash_int(memo_hash, {param.name}->value);\n"
+                same_key.append(f"memo_entry->key_{i} == {param.name}->value")
+                store_keys += f"memo_entry->key_{i} = {param.name}->value;\n"
+
+        # se guarda el valor y no el objeto, en cada acierto se devuelve una copia nueva
+        if node.static_type == "String":
+            value_field = "char* value;"
+            store_value = "memo_entry->value = memo_copy_string(memo_result->value);"
+            free_entry += "free(memo_entry->value);\n"
+        elif node.static_type == "Number":
+            value_field = "float value;"
+            store_value = "memo_entry->value = memo_result->value;"
+        else:
+            value_field = "int value;"
+            store_value = "memo_entry->value = memo_result->value;"
+
+        hit_condition = " && ".join(["memo_entry->used"] + same_key)
+        return f"""typedef struct {{
+int used;
+{key_fields}{value_field}
+}} memo_entry_{c_name};
+memo_entry_{c_name} memo_table_{c_name}[{self.memo_size}];
+unsigned long int memo_hits_{c_name} = 0;
+unsigned long int memo_misses_{c_name} = 0;
+unsigned long int memo_evictions_{c_name} = 0;
+{node.static_type}* {c_name}({params_c_code}){{
+unsigned long int memo_hash = 14695981039346656037UL;
+{hash_code}memo_entry_{c_name}* memo_entry = &memo_table_{c_name}[memo_hash & {self.memo_size - 1}];
+if ({hit_condition}) {{
+memo_hits_{c_name}++;
+return new_{node.static_type}(memo_entry->value);
+}}
+memo_misses_{c_name}++;
+{node.static_type}* memo_result = {c_name}_memo_compute({", ".join(args)});
+if (memo_entry->used) {{
+memo_evictions_{c_name}++;
+{free_entry}}}
+memo_entry->used = 1;
+{store_keys}{store_value}
+return memo_result;
+}}"""
+
     @visitor.when(FunctionCall)
     def visit(self, node):
         def_ret_list_params = []
         for param in node.params.param_list:
-            construct_params = self.visit(param)
+            construct_params = yield param
             def_ret_list_params.append(construct_params)
 
         params_def_code = ""
@@ -370,6 +447,13 @@ typedef struct {
         if params_ret_c_code:
             params_ret_c_code = params_ret_c_code[:-1]
 
+        if node.tail_call:
+            function = self.current_function
+            for param, param_ret_code, static_type_param in zip(function.params.param_list, def_ret_list_params, node.param_types):
+                params_def_code += f"tail_arg_{param.name} = ({static_type_param}*){param_ret_code[1]};\n"
+            params_def_code += f"tail_call_{function.func_id.name} = 1;\n"
+            return f"{params_def_code}", "NULL"
+
         if node.func_id.name == "tan":
             return f"{params_def_code}", f"""p_{node.func_id.name}({params_ret_c_code})"""
 
@@ -382,7 +466,7 @@ typedef struct {
         code = f"""{node.static_type}* {node.name}() {{
         """
         for exp, i in zip(node.exp_list, range(len(node.exp_list))):
-            body_def, body_ret = self.visit(exp)
+            body_def, body_ret = yield exp
             code += body_def + "\n"
 
             if i == len(node.exp_list) - 1:
@@ -400,11 +484,11 @@ typedef struct {
     def visit(self, node):
         # node.static_type = "Number"
         # print(node.assign[0].value)
-        assign_def, assign_ret = self.visit(node.assign[0].value)
+        assign_def, assign_ret = yield node.assign[0].value
         var_name = node.assign[0].name.name
         var_type = node.assign[0].name.static_type
         # var_type = "Number"  # temporal
-        body_def, body_ret = self.visit(node.body)
+        body_def, body_ret = yield node.body
         node.ret_point = "ret_point_let_" + str(
             node.instance_id
         )  # analizar instance id
@@ -430,7 +514,7 @@ typedef struct {
             str(node.instance_id)  # analizar id blabla
         c_code = f"""{node.static_type}* if_{node.instance_id}(){{"""
         for case in node.case_list:
-            def_case, ret_case = self.visit(case)
+            def_case, ret_case = yield case
             c_code += f"{def_case}"
             c_code += "\n"
         c_code += "}\n"
@@ -441,8 +525,8 @@ typedef struct {
     def visit(self, node):
         c_code = ""
 
-        def_condition, ret_condition = self.visit(node.condition)
-        def_body, ret_body = self.visit(node.body)
+        def_condition, ret_condition = yield node.condition
+        def_body, ret_body = yield node.body
         c_code += f"""{def_condition}"""
         c_code += f"""if ((int){ret_condition}->value){{
             {def_body}
@@ -454,11 +538,53 @@ typedef struct {
     def visit(self, node):
         # node.static_type = "Number"
         node.ret_point = "ret_point_while_" + str(node.instance_id)
-        def_condition, ret_condition = self.visit(node.condition)
-        def_body, ret_body = self.visit(node.body)
+        loop_setup = ""
+        if node.native_loop is not None:
+            # for bajado a un ciclo de C: ni next() ni current(), el iterador se enlaza directo
+            iterable = node.parent.assign[-1].name.name
+            iterator = node.for_let.assign[0].name
+            def_body, ret_body = yield node.for_let.body
+            if isinstance(node.native_loop, RangeLoop):
+                loop = node.native_loop
+                counter = f"for_counter_{node.instance_id}"
+                limit = f"for_limit_{node.instance_id}"
+                loop_setup = f"""float {counter} = (({loop.type_name}*){iterable})->{loop.counter}->value;
+            float {limit} = (({loop.type_name}*){iterable})->{loop.limit}->value;"""
+                def_condition = f"{counter} = {counter} + (float){loop.step};"
+                condition = f"{counter} {loop.op} {limit}"
+                item = f"new_Number({counter})"
+            else:
+                index = f"for_index_{node.instance_id}"
+                loop_setup = f"int {index} = -1;"
+                def_condition = f"{index}++;"
+                condition = f"{index} < {iterable}->len"
+                item = f"vector_get({iterable}, {index})"
+            def_body = f"{iterator.static_type}* {iterator.name} = ({iterator.static_type}*){item};\n{def_body}"
+        else:
+            def_condition, ret_condition = yield node.condition
+            condition = f"(int){ret_condition}->value"
+            def_body, ret_body = yield node.body
+
+        for guard in node.bounds_guards:
+            # el indice empieza en start y no pasa de limit: si eso cabe en el vector no hace falta comprobar cada acceso
+            if isinstance(node.native_loop, RangeLoop):
+                start = f"for_counter_{node.instance_id} + (float){node.native_loop.step}"
+                limit = f"for_limit_{node.instance_id}"
+                op = node.native_loop.op
+            else:
+                start = f"{node.counter_loop.counter}->value"
+                if type(node.counter_loop.limit) is Num:
+                    limit = f"(float){node.counter_loop.limit.value}"
+                else:
+                    limit = f"{node.counter_loop.limit.name}->value"
+                op = node.counter_loop.op
+            fits = "<=" if op == "<" else "<"
+            loop_setup += f"""
+            int {guard.name} = ({start} > -1) && ({limit} {fits} (float){guard.vector}->len);"""
 
         c_code = f"""{node.static_type}* while_{node.instance_id}(){{
             int while_body_executed = 0;
+            {loop_setup}
             memory_usage = memory_usage+(sizeof({node.static_type}));
             if (memory_usage > memory_limit) {{
     
@@ -471,7 +597,7 @@ typedef struct {
             """
         c_code += f"{def_condition}"
         c_code += f"""
-            if ((int){ret_condition}->value){{
+            if ({condition}){{
             while_body_executed = 1;
             {def_body}
             {node.static_type}* temporal = {node.ret_point};
@@ -500,6 +626,10 @@ typedef struct {
     @visitor.when(TypeDef)
     def visit(self, node):
 
+        # los metodos y el constructor de cada tipo se juntan en sus propias secciones, una unidad si se divide la salida
+        self.types_function_definitions = Section()
+        self.types_constructor = Section()
+        self.type_units.append((node.static_type, self.types_function_definitions, self.types_constructor))
         # node.static_type = node.id.annotated_type
         list_func_id_polymorphism = []
         parent_inherited = None
@@ -510,7 +640,8 @@ typedef struct {
         self.types_definitions += "\nchar* type;\nchar* string;\n"
         if node.inherits:
             parent_inherited = node.global_definitions[node.inherits.id.name]
-            for func in parent_inherited.functions:  # preparando una lista para definir las funciones debajo del struct
+            parent_variables, parent_functions = self.type_members[parent_inherited.id.name]
+            for func in parent_functions:  # preparando una lista para definir las funciones debajo del struct
                 founded_polymorphism = False
                 for own_func in node.functions:
                     if own_func.func_id.name == func.func_id.name:
@@ -524,7 +655,7 @@ typedef struct {
                 # luego del for estaran todas las funciones del padre pero con el polimorfismo aplicado
                 own_plus_parent_functions.append(func)
 
-            for var in parent_inherited.variables:  # definiendo variables del padre en el struct
+            for var in parent_variables:  # definiendo variables del padre en el struct
                 # ========================================================================check
                 if var.static_type in node.types_names:
                     self.types_definitions += f"struct {var.static_type}* {var.name.name};\n"
@@ -535,7 +666,7 @@ typedef struct {
             # declarando las funciones del padre en el struct pero con el polimorfismo aplicado
             for func in own_plus_parent_functions:
                 self.types_definitions += f"""{func.static_type}* (*{func.func_id.name})(void* self"""
-                self.types_functions_and_constructor_headers += f"""{func.static_type}* (*{func.func_id.name})(void* self"""
+                self.types_functions_and_constructor_headers += f"""extern {func.static_type}* (*{func.func_id.name})(void* self"""
 
                 if func.params.param_list:
                     for function_params in func.params.param_list:
@@ -561,7 +692,7 @@ typedef struct {
                 if func.func_id.name in list_func_id_polymorphism:
                     continue
                 self.types_definitions += f"""{func.static_type}* (*{func.func_id.name})(void* self"""
-                self.types_functions_and_constructor_headers += f"""{func.static_type}* (*{func.func_id.name})(void* self"""
+                self.types_functions_and_constructor_headers += f"""extern {func.static_type}* (*{func.func_id.name})(void* self"""
                 if func.params.param_list:
                     for function_params in func.params.param_list:
                         self.types_definitions += f", {function_params.static_type}* {function_params.name}"
@@ -580,7 +711,7 @@ typedef struct {
 
             for func in node.functions:
                 self.types_definitions += f"""{func.static_type}* (*{func.func_id.name})(void* self"""
-                self.types_functions_and_constructor_headers += f"""{func.static_type}* (*{func.func_id.name})(void* self"""
+                self.types_functions_and_constructor_headers += f"""extern {func.static_type}* (*{func.func_id.name})(void* self"""
                 if func.params.param_list:
                     for function_params in func.params.param_list:
                         # ===================================================================check
@@ -602,32 +733,31 @@ typedef struct {
 
         # functions definition
         for func in own_plus_parent_functions:
-            def_func, ret_func = self.visit(func)
             self.types_function_definitions += f"""{func.static_type}* {node.static_type}_{func.func_id.name}(void* self"""
             if func.params.param_list:
                 for function_params in func.params.param_list:
                     self.types_function_definitions += f", {function_params.static_type}* {function_params.name}"
+            ir_body = self.ir_body(f"{node.static_type}_{func.func_id.name}", func.params.param_list, func.static_type, func.body, node.static_type)
+            if ir_body is not None:
+                self.types_function_definitions += f"""){{\n{ir_body}\n}}\n\n"""
+                continue
+            def_func, ret_func = yield func
             self.types_function_definitions += f"""){{\n{def_func}\nreturn {ret_func};\n}}\n\n"""
 
         # constructor definition
         self.types_constructor += f"""{node.static_type}* new_{node.static_type}("""
         self.types_functions_and_constructor_headers += f"""{node.static_type}* new_{node.static_type}("""
 
-        for param in node.params.param_list:
-            self.types_constructor += f"{param.static_type}* {param.name},"
-            self.types_functions_and_constructor_headers += f"{param.static_type}* {param.name},"
-        if node.params.param_list:
-            self.types_constructor = self.types_constructor[:-1]
-            self.types_functions_and_constructor_headers = self.types_functions_and_constructor_headers[
-                :-1]
+        constructor_params = ",".join(f"{param.static_type}* {param.name}" for param in node.params.param_list)
+        self.types_constructor += constructor_params
+        self.types_functions_and_constructor_headers += constructor_params
         self.types_constructor += f"""){{"""
         self.types_functions_and_constructor_headers += ");\n"
 
         # TypeCall inherence definition
         ret_type_call_of_parent = ""
         if node.inherits:
-            def_type_call_inherits, ret_type_call_inherits = self.visit(
-                node.inherits)
+            def_type_call_inherits, ret_type_call_inherits = yield node.inherits
             ret_type_call_of_parent = ret_type_call_inherits
             self.types_constructor += def_type_call_inherits+"\n"
             self.types_constructor += f"""memory_usage = memory_usage+(sizeof({node.static_type}));
@@ -648,19 +778,16 @@ typedef struct {
 
             self.types_constructor += f"""{node.static_type}* obj = ({node.static_type}*)malloc(sizeof({node.static_type}));\n"""
 
-        parent_variables = []
-        if node.inherits:
-            parent_variables = parent_inherited.variables
-
-        all_variables = parent_variables+node.variables
+        if not node.inherits:
+            parent_variables = []
         for var in parent_variables:
-            def_variable_value, ret_variable_value = self.visit(var.value)
+            def_variable_value, ret_variable_value = yield var.value
             self.types_constructor += f"""{def_variable_value}"""
             if node.inherits:
                 self.types_constructor += f"""obj->{var.name.name} = ({var.static_type}*)({ret_type_call_of_parent}->{ret_variable_value});\n"""
 
         for var in node.variables:
-            def_variable_value, ret_variable_value = self.visit(var.value)
+            def_variable_value, ret_variable_value = yield var.value
             self.types_constructor += f"""{def_variable_value}"""
             self.types_constructor += f"""obj->{var.name.name} = ({var.static_type}*)({ret_variable_value});\n"""
 
@@ -688,17 +815,14 @@ typedef struct {
         strcpy(obj -> string, concatenate_strings(concatenate_strings("<{node.static_type} at ", memory_address_str), ">"));"""
         self.types_constructor += f"""return obj;"""
         self.types_constructor += f"""}}"""
-        # adding variables and functions of parent to self for the descendants to have it
-        node.variables = all_variables
-        node.functions = own_plus_parent_functions
-        return self.types_constructor, ""
+        return "", ""
 
     @visitor.when(TypeCall)
     def visit(self, node: TypeCall):
         params_c_code = ""
         def_call = ""
         for param, static_param in zip(node.params.param_list, node.param_types):
-            def_param, ret_param = self.visit(param)
+            def_param, ret_param = yield param
             def_call += def_param + "\n"
             params_c_code += f"""({static_param}*){ret_param},"""
         if node.params.param_list:
@@ -707,13 +831,24 @@ typedef struct {
         ret_call = f"""{node.name}"""
         return def_call, ret_call
 
+    def unboxed_kind(self, vector_type):
+        "los Vector de Number y Boolean se guardan sin caja en un arreglo de float"
+        element_type = getattr(vector_type, "T", None)
+        if element_type == "Number":
+            return "VECTOR_NUMBER"
+        if element_type == "Boolean":
+            return "VECTOR_BOOLEAN"
+        return None
+
     @visitor.when(VectorExt)
     def visit(self, node: VectorExt):
         size_of_vect = 0
         if node.items:
             if node.items.param_list:
                 size_of_vect = len(node.items.param_list)
-        # implement this with an array of pointers in C
+        unboxed = self.unboxed_kind(node.static_type)
+        # implement this with an array of pointers in C, or of floats for Number and Boolean
+        element_type = "float" if unboxed else "void*"
         def_vect = f"""{node.static_type}* {node.name}(){{
                 memory_usage = memory_usage+(sizeof({node.static_type}));
                 if (memory_usage > memory_limit) {{
@@ -723,20 +858,28 @@ typedef struct {
                 }}
                 {node.static_type}* vector = ({node.static_type}*)malloc(sizeof({node.static_type}));
                 
-                memory_usage = memory_usage+({size_of_vect}*sizeof(void*));
+                memory_usage = memory_usage+({size_of_vect}*sizeof({element_type}));
                 if (memory_usage > memory_limit) {{
         
                     printf("STACK OVERFLOW");
                     exit(-1);
                 }}
-                void** array = (void**)malloc({size_of_vect}*sizeof(void*));\n"""
+                {element_type}* array = ({element_type}*)malloc({size_of_vect}*sizeof({element_type}));\n"""
 
         for i in range(size_of_vect):
-            def_item, ret_item = self.visit(node.items.param_list[i])
+            def_item, ret_item = yield node.items.param_list[i]
             def_vect += def_item + "\n"
-            def_vect += f"""array[{i}] = {ret_item};\n"""
-
-        def_vect += f"""vector -> data = array;\n"""
+            if unboxed:
+                def_vect += f"""array[{i}] = (float){ret_item}->value;\n"""
+            else:
+                def_vect += f"""array[{i}] = {ret_item};\n"""
+
+        if unboxed:
+            def_vect += f"""vector -> data = NULL;\nvector -> values = array;\n"""
+            def_vect += f"""vector -> unboxed = {unboxed};\n"""
+        else:
+            def_vect += f"""vector -> data = array;\nvector -> values = NULL;\n"""
+            def_vect += f"""vector -> unboxed = VECTOR_BOXED;\n"""
         def_vect += f"vector -> len = {size_of_vect};\n"
 
         def_vect += f"""return vector;"""
@@ -745,29 +888,149 @@ typedef struct {
         ret_vect = f"{node.ret_point}_{node.instance_id}"
         return def_vect, ret_vect
 
+    def scalar_expression(self, node, iterator, element):
+        "la expresion como aritmetica de float en C si solo usa el iterador, numeros y + - * /, si no None (generador para trampoline)"
+        if type(node) is ExpressionBlock and len(node.exp_list) == 1:
+            return (yield self.scalar_expression(node.exp_list[0], iterator, element))
+        if type(node) is ID and node.name == iterator:
+            return element
+        if type(node) is Num:
+            return f"(float){node.value}"
+        if type(node) is UnaryOp and node.op == "-":
+            operand = yield self.scalar_expression(node.operand, iterator, element)
+            return None if operand is None else f"(-{operand})"
+        if type(node) is BinOp and node.op in ["+", "-", "*", "/"]:
+            left = yield self.scalar_expression(node.left, iterator, element)
+            right = yield self.scalar_expression(node.right, iterator, element)
+            if left is None or right is None:
+                return None
+            return f"({left} {node.op} {right})"
+        return None
+
+    @visitor.when(VectorInt)
+    def visit(self, node: VectorInt):
+        node.ret_point = "ret_point_vect_int_" + str(node.instance_id)
+        def_iterable, ret_iterable = yield node.iterable
+        def_expression, ret_expression = yield node.expression
+        source_type = node.iterable.static_type
+        source = f"source_{node.instance_id}"
+        iterator = node.iterator
+        unboxed = self.unboxed_kind(node.static_type)
+        element_type = "float" if unboxed else "void*"
+        store = f"(float){ret_expression}->value" if unboxed else ret_expression
+        # el resultado se reserva de una vez si se conoce la cantidad de elementos, si no crece al doble
+        grow = f"""if (len == capacity) {{
+                    memory_usage = memory_usage+(capacity*sizeof({element_type}));
+                    if (memory_usage > memory_limit) {{
+                        printf("STACK OVERFLOW");
+                        exit(-1);
+                    }}
+                    capacity = capacity * 2;
+                    array = ({element_type}*)realloc(array, capacity*sizeof({element_type}));
+                }}"""
+        fast_path = ""
+        if isinstance(node.native_loop, VectorLoop):
+            capacity = f"{source}->len"
+            grow = ""
+            loop = f"""for (int index = 0; index < {source}->len; index++){{
+                {iterator.static_type}* {iterator.name} = ({iterator.static_type}*)vector_get({source}, index);"""
+            scalar = trampoline(self.scalar_expression(node.expression, iterator.name, "input[index]"))
+            if unboxed == "VECTOR_NUMBER" and iterator.static_type == "Number" and scalar is not None:
+                # aritmetica pura sobre un Vector sin caja: un ciclo de float que el compilador de C vectoriza
+                fast_path = f"""if ({source}->unboxed == VECTOR_NUMBER) {{
+                float* input = {source}->values;
+                for (int index = 0; index < {source}->len; index++) array[index] = {scalar};
+                len = {source}->len;
+            }} else """
+        elif isinstance(node.native_loop, RangeLoop):
+            range_loop = node.native_loop
+            # solo una estimacion: sumar el paso en float puede dar una vuelta mas que la division
+            capacity = f"(int)((limit - counter) / (float){range_loop.step}) + 1"
+            loop = f"""while (1){{
+                counter = counter + (float){range_loop.step};
+                if (!(counter {range_loop.op} limit)) break;
+                {iterator.static_type}* {iterator.name} = ({iterator.static_type}*)new_Number(counter);"""
+        else:
+            capacity = "8"
+            loop = f"""while ((int)(({source_type}*){source})->next({source})->value){{
+                {iterator.static_type}* {iterator.name} = ({iterator.static_type}*)(({source_type}*){source})->current({source});"""
+
+        range_setup = ""
+        if isinstance(node.native_loop, RangeLoop):
+            range_setup = f"""float counter = (({source_type}*){source})->{node.native_loop.counter}->value;
+            float limit = (({source_type}*){source})->{node.native_loop.limit}->value;"""
+
+        if unboxed:
+            fields = f"""vector -> data = NULL;
+            vector -> values = array;
+            vector -> unboxed = {unboxed};"""
+        else:
+            fields = """vector -> data = array;
+            vector -> values = NULL;
+            vector -> unboxed = VECTOR_BOXED;"""
+
+        c_code = f"""Vector* {node.name}(){{
+            {def_iterable}
+            {source_type}* {source} = ({source_type}*){ret_iterable};
+            {range_setup}
+            int capacity = {capacity};
+            if (capacity < 1) capacity = 1;
+            memory_usage = memory_usage+(sizeof(Vector)+capacity*sizeof({element_type}));
+            if (memory_usage > memory_limit) {{
+                printf("STACK OVERFLOW");
+                exit(-1);
+            }}
+            Vector* vector = (Vector*)malloc(sizeof(Vector));
+            {element_type}* array = ({element_type}*)malloc(capacity*sizeof({element_type}));
+            int len = 0;
+            {fast_path}{{
+            {loop}
+                {def_expression}
+                {grow}
+                array[len++] = {store};
+            }}
+            }}
+            {fields}
+            vector -> len = len;
+            return vector;
+        }}
+        Vector* {node.ret_point} = {node.name}();"""
+        return c_code, node.ret_point
+
     @visitor.when(VectorCall)
     def visit(self, node: VectorCall):
-        def_index, ret_index = self.visit(node.index)
+        def_index, ret_index = yield node.index
         def_call = def_index
-        def_id, ret_id = self.visit(node.id)
+        def_id, ret_id = yield node.id
+        index = f"vector_index_{node.instance_id}"
+        guard = node.bounds_guard
+        if guard is not None and isinstance(guard.loop.native_loop, RangeLoop):
+            # el indice es el contador nativo del for, no hace falta leerlo de la caja
+            index_value = f"(int)for_counter_{guard.loop.instance_id}"
+        else:
+            index_value = f"(int){ret_index}->value"
+        in_bounds = f"{guard.name} || " if guard is not None else ""
 
         def_call += f"""{def_id}
-        if ({ret_id}->len < (int){ret_index}->value){{
-                printf("Index out of bounds: %d, length: %d\\n", {ret_index}, {ret_id}->len);
+        int {index} = {index_value};
+        if (!({in_bounds}({index} >= 0 && {index} < {ret_id}->len))){{
+                printf("Index out of bounds: %d, length: %d\\n", {index}, {ret_id}->len);
                 exit(-1);
                 }}\n"""
-        return def_call, f"""(({node.static_type}*)({ret_id}->data[(int){ret_index}->value]))"""
+        return def_call, f"""(({node.static_type}*)vector_get({ret_id}, {index}))"""
 
     @visitor.when(BinOp)
     def visit(self, node):
         # node.static_type = "Number"
-        left_def, left_ret = self.visit(node.left)
-        right_def, right_ret = self.visit(node.right)
+        left_def, left_ret = yield node.left
+        right_def, right_ret = yield node.right
         node.ret_point = "ret_point_bin_op_" + str(node.instance_id)
 
         if node.op == ".":
             # node.static_type = "Point"
             # node.right.static_type = "Number"
+            if isinstance(node.right, FunctionCall) and node.right.tail_call:
+                return f"{left_def}\n{right_def}\n", right_ret
             if isinstance(node.right, FunctionCall):
                 inicio = right_ret.index("(")
                 fin = right_ret.index(")")
@@ -822,6 +1085,22 @@ typedef struct {
             ret_code = f"""{left_ret}"""
             return code, ret_code
 
+        if node.op in ["&", "|"]:
+            # el operando derecho solo se evalua si el izquierdo no decide el resultado
+            decided = "!" if node.op == "&" else ""
+            code = f"""{node.static_type}* bin_op_{node.instance_id}(){{
+        {left_def}
+        if ({decided}{left_ret}->value)
+        return new_{node.static_type}({0 if node.op == "&" else 1});
+        {right_def}
+        if ({right_ret}->value)
+        return new_{node.static_type}(1);
+        else
+        return new_{node.static_type}(0);
+        }}
+        {node.static_type}* {node.ret_point} = bin_op_{node.instance_id}();"""
+            return code, node.ret_point
+
         code = f"""{node.static_type}* bin_op_{node.instance_id}(){{
         {left_def}
         {right_def}\n"""
@@ -851,7 +1130,7 @@ typedef struct {
     @visitor.when(UnaryOp)
     def visit(self, node):
         if node.op == "-":
-            child_def, child_ret = self.visit(node.operand)
+            child_def, child_ret = yield node.operand
             node.ret_point = "ret_point_unary_op_" + str(node.instance_id)
             code = f"""{node.static_type}* unary_op_{node.instance_id}() {{
 {child_def}
@@ -862,7 +1141,7 @@ return new_{node.static_type}(-({child_ret}->value));
             return code, node.ret_point
 
         elif node.op == "!":
-            child_def, child_ret = self.visit(node.operand)
+            child_def, child_ret = yield node.operand
             node.ret_point = "ret_point_unary_op_" + str(node.instance_id)
             code = f"""{node.static_type}* unary_op_{node.instance_id}() {{
 {child_def}
@@ -906,7 +1185,7 @@ return new_{node.static_type}(!({child_ret}->value));
 
     @visitor.when(Print)
     def visit(self, node):
-        child_def, child_ret = self.visit(node.value)
+        child_def, child_ret = yield node.value
         # node.static_type = "Object"  # ?????????????????????????
         node.ret_point = "ret_point_print_" + str(node.instance_id)
         code = f"""{node.static_type}* print_{node.instance_id}() {{
@@ -922,7 +1201,7 @@ return new_{node.static_type}(!({child_ret}->value));
 
     @visitor.when(Sqrt)
     def visit(self, node):
-        child_def, child_ret = self.visit(node.value)
+        child_def, child_ret = yield node.value
         # node.static_type = "Number"
         node.ret_point = "ret_point_sqrt_" + str(node.instance_id)
 
@@ -931,7 +1210,7 @@ return new_{node.static_type}(!({child_ret}->value));
 
     @visitor.when(Sin)
     def visit(self, node):
-        child_def, child_ret = self.visit(node.value)
+        child_def, child_ret = yield node.value
         # node.static_type = "Number"
         node.ret_point = "ret_point_sin_" + str(node.instance_id)
         code = f"""{child_def}\n{node.static_type}* {node.ret_point} = new_Number(sin({child_ret}->value));"""
@@ -939,7 +1218,7 @@ return new_{node.static_type}(!({child_ret}->value));
 
     @visitor.when(Cos)
     def visit(self, node):
-        child_def, child_ret = self.visit(node.value)
+        child_def, child_ret = yield node.value
         # node.static_type = "Number"
         node.ret_point = "ret_point_cos_" + str(node.instance_id)
         code = f"""{child_def}\n{node.static_type}* {node.ret_point} = new_Number(cos({child_ret}->value));"""
@@ -947,7 +1226,7 @@ return new_{node.static_type}(!({child_ret}->value));
 
     @visitor.when(Exp)
     def visit(self, node):
-        child_def, child_ret = self.visit(node.value)
+        child_def, child_ret = yield node.value
         # node.static_type = "Number"
         node.ret_point = "ret_point_exp_" + str(node.instance_id)
         code = f"""{child_def}\n{node.static_type}* {node.ret_point} = new_Number(exp({child_ret}->value));"""
@@ -955,8 +1234,8 @@ return new_{node.static_type}(!({child_ret}->value));
 
     @visitor.when(Log)
     def visit(self, node):
-        child_def_base, child_ret_base = self.visit(node.base)
-        child_def_value, child_ret_value = self.visit(node.value)
+        child_def_base, child_ret_base = yield node.base
+        child_def_value, child_ret_value = yield node.value
         # node.static_type = "Number"  # 3
         node.ret_point = "ret_point_log_" + str(node.instance_id)
         code = f"""{child_def_base}\n{child_def_value}\n{node.static_type}* {node.ret_point} = new_Number(log({child_ret_value}->value)/log({child_ret_base}->value));"""
@@ -971,6 +1250,59 @@ return new_{node.static_type}(!({child_ret}->value));
 
 
 # endregion
+
+
+def generate_function(codegen: CodeGen, function: FunctionDef):
+    return codegen.visit(function)[0]
+
+
+def type_members(program: Program):
+    """(variables, metodos) de cada tipo con los que hereda: primero los del padre, con los metodos redefinidos
+    en su lugar, y despues los propios. Se arman antes de generar, asi el C de un tipo no depende de que se
+    haya generado antes el de su padre en el mismo proceso; program.types ya esta ordenado por herencia"""
+    members = {}
+    for type_def in program.types:
+        if not type_def.inherits:
+            members[type_def.id.name] = (list(type_def.variables), list(type_def.functions))
+            continue
+        parent_variables, parent_functions = members[type_def.inherits.id.name]
+        own = {}
+        for function in type_def.functions:
+            own.setdefault(function.func_id.name, function)
+        inherited = {function.func_id.name for function in parent_functions}
+        functions = [own.get(function.func_id.name, function) for function in parent_functions]
+        functions += [function for function in type_def.functions if function.func_id.name not in inherited]
+        members[type_def.id.name] = (parent_variables + type_def.variables, functions)
+    return members
+
+
+def generate_type(codegen: CodeGen, type_def: TypeDef):
+    "(struct, encabezado, prototipos de metodos y constructor, (tipo, metodos, constructor)) de un tipo"
+    definitions, headers, method_headers = Section(), Section(), Section()
+    previous = codegen.types_definitions, codegen.types_headers, codegen.types_functions_and_constructor_headers
+    codegen.types_definitions, codegen.types_headers, codegen.types_functions_and_constructor_headers = definitions, headers, method_headers
+    try:
+        codegen.visit(type_def)
+    finally:
+        codegen.types_definitions, codegen.types_headers, codegen.types_functions_and_constructor_headers = previous
+    type_name, functions, constructor = codegen.type_units.pop()
+    return str(definitions), str(headers), str(method_headers), (type_name, str(functions), str(constructor))
+
+
+# el CodeGen y lo que generan los procesos del pool, los heredan con fork
+parallel_codegen: CodeGen = None
+parallel_tasks = []
+
+
+def generate_in_worker(index):
+    "el C de una funcion o tipo en un proceso del pool, con lo que su generacion agrego al estado del CodeGen"
+    generate_item, item = parallel_tasks[index]
+    codegen = parallel_codegen
+    codegen.memoized_functions, codegen.ir_fallbacks, codegen.passes.stats = [], [], {}
+    code = generate_item(codegen, item)
+    return code, codegen.memoized_functions, codegen.ir_fallbacks, codegen.passes.stats
+
+
 if __name__ == "__main__":
     code = """function cot(x:Number):Number => 1 / tan(x);
 function tan(x:Number):Number => sin(x) / cos(x);
@@ -0,0 +1,307 @@
+from misc import ast_walk, ast_children, ast_parents, replace_child, trampoline
+from hulk_effects import EffectAnalysis, VALUE_TYPES
+from hulk_ast import (
+    Program,
+    FunctionDef,
+    FunctionCall,
+    ExpressionBlock,
+    Let,
+    Assign,
+    ID,
+    If,
+    While,
+    TypeDef,
+    VectorInt,
+    BinOp,
+    UnaryOp,
+    Num,
+    StringLiteral,
+    TrueLiteral,
+    FalseLiteral,
+    Pi,
+    E,
+    Sqrt,
+    Sin,
+    Cos,
+    Exp,
+    Log,
+)
+
+ARITHMETIC = ["+", "-", "*", "/", "%", "^", "**", "@", "@@"]
+COMPARISON = [">", "<", ">=", "<=", "==", "!=", "&", "|"]
+MATH = {Sqrt: "sqrt", Sin: "sin", Cos: "cos", Exp: "exp"}
+
+
+class Candidate:
+    "una expresion pura que termina: su clave estructural, las variables y atributos que lee y si vale la pena guardarla"
+
+    def __init__(self, key, variables, fields, work):
+        self.key = key
+        self.variables = variables
+        self.fields = fields
+        self.work = work
+
+
+def declared_and_assigned(bodies):
+    "variables declaradas con let o en una comprension y variables asignadas con ':=' dentro de bodies"
+    declared = set()
+    assigned = set()
+    for body in bodies:
+        for node in ast_walk(body):
+            if type(node) is Let:
+                declared |= {assign.name.name for assign in node.assign}
+            elif type(node) is VectorInt:
+                declared.add(node.iterator.name)
+            elif type(node) is BinOp and node.op == "AD" and type(node.left) is ID:
+                assigned.add(node.left.name)
+    return declared, assigned
+
+
+def result_positions(body):
+    "ids de los nodos cuyo valor es el valor de body"
+    positions = set()
+    stack = [body]
+    while stack:
+        node = stack.pop()
+        positions.add(id(node))
+        if type(node) is ExpressionBlock and node.exp_list:
+            stack.append(node.exp_list[-1])
+        elif type(node) is Let:
+            stack.append(node.body)
+        elif type(node) is If:
+            stack.extend(case.body for case in node.case_list)
+    return positions
+
+
+class RedundancyElimination:
+    """elimina calculos repetidos de expresiones puras usando los efectos de EffectAnalysis:
+    las que se repiten en una funcion o metodo se calculan una vez al inicio (cse)
+    y las que no cambian dentro de un while se calculan antes del ciclo (licm).
+    Solo se reutilizan valores Number, Boolean y String, que no se modifican"""
+
+    def __init__(self, effects: EffectAnalysis):
+        self.effects = effects
+        self.program: Program = None
+        self.stats = {"cse": 0, "licm": 0}
+        self.loop_results = set()
+        self.count = 0
+        self.taken = set()
+
+    def run(self, program: Program):
+        self.program = program
+        # los nombres nuevos se cuentan en cada corrida y evitan los del programa, asi el C no depende del proceso
+        self.count = 0
+        self.taken = {node.name for node in ast_walk(program) if type(node) is ID}
+        # CodeGen libera el valor de cada vuelta de un while en la siguiente, ese valor no puede ser compartido
+        self.loop_results = set()
+        for node in ast_walk(program):
+            if type(node) is While:
+                self.loop_results |= result_positions(node.body)
+                if node.for_let is not None:
+                    self.loop_results |= result_positions(node.for_let.body)
+        for function in program.functions:
+            self.common_subexpressions(function, [param.name for param in function.params.param_list])
+        for type_def in program.types:
+            type_def: TypeDef
+            for method in type_def.functions:
+                self.common_subexpressions(method, ["self"] + [param.name for param in method.params.param_list])
+
+        loops = [node for node in ast_walk(program) if type(node) is While]
+        for loop in loops:
+            self.loop_invariants(loop)
+        return program
+
+    def candidate(self, node):
+        "Candidate de node si es una expresion pura que termina con valor inmutable, si no None"
+        if node.static_type not in VALUE_TYPES:
+            return None
+        return trampoline(self.describe(node))
+
+    def describe(self, node):
+        "generador para trampoline: la descripcion de cada hijo se pide con yield, una expresion profunda no crece la pila"
+        node_type = type(node)
+        if node_type is Num:
+            return Candidate(("num", str(node.value)), set(), set(), 0)
+        if node_type is StringLiteral:
+            return Candidate(("string", node.value), set(), set(), 0)
+        if node_type in [TrueLiteral, FalseLiteral, Pi, E]:
+            return Candidate((node_type.__name__,), set(), set(), 0)
+        if node_type is ID:
+            return Candidate(("id", node.name), {node.name}, set(), 0)
+        if node_type is UnaryOp:
+            return (yield self.combine((node.op,), [node.operand], 1))
+        if node_type in MATH:
+            return (yield self.combine((MATH[node_type],), [node.value], 1))
+        if node_type is Log:
+            return (yield self.combine(("log",), [node.base, node.value], 1))
+        if node_type is FunctionCall:
+            if node.func_id.name == "base":
+                return None
+            key = self.effects.resolve_function(node)
+            return (yield self.call(("call", key), key and [key], node.params.param_list, set()))
+        if node_type is not BinOp:
+            return None
+        if node.op in ARITHMETIC or node.op in COMPARISON:
+            return (yield self.combine((node.op,), [node.left, node.right], 1))
+        if node.op != ".":
+            return None
+        receiver = yield self.describe(node.left)
+        if receiver is None:
+            return None
+        if type(node.right) is ID:
+            return Candidate((".", receiver.key, node.right.name), receiver.variables, receiver.fields | {node.right.name}, receiver.work)
+        if type(node.right) is not FunctionCall or node.left.static_type == "Vector":
+            return None
+        keys = self.effects.resolve_method(node.left.static_type, node.right)
+        name = (node.left.static_type, node.right.func_id.name)
+        call = yield self.call(("method", name), keys and sorted(keys), node.right.params.param_list, receiver.fields)
+        if call is None:
+            return None
+        return Candidate((".", receiver.key, call.key), receiver.variables | call.variables, call.fields, receiver.work + call.work)
+
+    def call(self, key, keys, args, fields):
+        if not keys:
+            return None
+        effects = self.effects.call_effects(keys)
+        if effects is None or not effects.side_effect_free():
+            return None
+        candidate = yield self.combine(key, args, 1)
+        if candidate is None:
+            return None
+        candidate.fields |= effects.reads_fields | fields
+        return candidate
+
+    def combine(self, key, children, work):
+        variables = set()
+        fields = set()
+        keys = []
+        for child in children:
+            described = yield self.describe(child)
+            if described is None:
+                return None
+            keys.append(described.key)
+            variables |= described.variables
+            fields |= described.fields
+            work += described.work
+        return Candidate(key + tuple(keys), variables, fields, work)
+
+    def stable(self, candidate: Candidate, bodies, available, extra=None):
+        "el valor de la expresion no cambia en bodies: sus variables no se tocan y nadie escribe lo que lee"
+        if not candidate.variables <= available:
+            return False
+        declared, assigned = declared_and_assigned(bodies)
+        if candidate.variables & (declared | assigned):
+            return False
+        region = self.effects.region_effects(bodies)
+        if extra is not None:
+            region.merge(extra)
+        return not region.unknown and not (candidate.fields & region.writes_fields)
+
+    def occurrences(self, bodies):
+        "nodos candidatos de bodies agrupados por clave, incluidos los que estan dentro de otro candidato"
+        groups = {}
+        candidates = {}
+        stack = list(reversed(bodies))
+        while stack:
+            node = stack.pop()
+            candidate = self.candidate(node) if id(node) not in self.loop_results else None
+            if candidate is not None and candidate.work > 0:
+                groups.setdefault(candidate.key, []).append(node)
+                candidates[candidate.key] = candidate
+            if type(node) is BinOp and node.op == ".":
+                # el lado derecho de un '.' es un atributo o un metodo, no una variable ni una funcion global
+                children = [node.left]
+                if type(node.right) is FunctionCall:
+                    children += node.right.params.param_list
+            else:
+                children = list(ast_children(node))
+            stack.extend(reversed(children))
+        return groups, candidates
+
+    def fresh_name(self, prefix):
+        self.count += 1
+        while f"{prefix}_{self.count}" in self.taken:
+            self.count += 1
+        return f"{prefix}_{self.count}"
+
+    def bind(self, value, body, prefix):
+        "let name = value in body, con los tipos que espera CodeGen"
+        variable = ID(self.fresh_name(prefix), "")
+        variable.static_type = value.static_type
+        let = Let([Assign(variable, value)], body)
+        let.static_type = body.static_type
+        variable.parent = let.assign[0]
+        value.parent = let.assign[0]
+        let.assign[0].parent = let
+        body.parent = let
+        return let, variable
+
+    def substitute(self, root, nodes, variable: ID):
+        parents = ast_parents(root)
+        for node in nodes:
+            use = ID(variable.name, "")
+            use.static_type = variable.static_type
+            replace_child(parents[id(node)], node, use)
+
+    def common_subexpressions(self, function: FunctionDef, params):
+        # los parametros y self son lo unico que seguro existe y vale lo mismo en todo el cuerpo
+        while True:
+            groups, candidates = self.occurrences([function.body])
+            repeated = [
+                key for key, nodes in groups.items()
+                if len(nodes) > 1 and self.stable(candidates[key], [function.body], set(params))
+            ]
+            if not repeated:
+                return
+            key = max(repeated, key=lambda item: candidates[item].work)
+            nodes = groups[key]
+            body = function.body
+            let, variable = self.bind(nodes[0], body, "cse")
+            self.substitute(body, nodes, variable)
+            function.body = let
+            let.parent = function
+            self.stats["cse"] += len(nodes) - 1
+
+    def loop_invariants(self, loop: While):
+        extra = None
+        if loop.for_let is not None:
+            # el let del iterable tiene que seguir siendo el padre del while, se saca el codigo por encima de el
+            iterable = loop.parent.assign[-1]
+            keys = set()
+            for name in ["next/0", "current/0"]:
+                found = self.effects.resolve_method_name(iterable.value.static_type, name)
+                if found is None:
+                    return
+                keys |= found
+            extra = self.effects.call_effects(keys)
+            if extra is None:
+                return
+            bodies = [loop.for_let.body]
+            target = loop.parent
+            hidden = {iterable.name.name, loop.for_let.assign[0].name.name}
+        else:
+            bodies = [loop.condition, loop.body]
+            target = loop
+            hidden = set()
+
+        declared, _ = declared_and_assigned(bodies)
+        while True:
+            groups, candidates = self.occurrences(bodies)
+            invariant = [
+                key for key in groups
+                if self.stable(candidates[key], bodies, candidates[key].variables - declared - hidden, extra)
+            ]
+            if not invariant:
+                return
+            key = max(invariant, key=lambda item: candidates[item].work)
+            nodes = groups[key]
+            parents = ast_parents(self.program)
+            outer = parents[id(target)]
+            let, variable = self.bind(nodes[0], target, "licm")
+            replace_child(outer, target, let)
+            for node in nodes:
+                use = ID(variable.name, "")
+                use.static_type = variable.static_type
+                replace_child(parents[id(node)], node, use)
+            target = let
+            self.stats["licm"] += len(nodes)
@@ -0,0 +1,72 @@
+import hashlib
+import re
+
+from hulk_lexer import OurString
+
+# lo que no cambia el programa: comentarios de linea y espacios fuera de los strings
+TOKEN = re.compile(rf"(?P<string>{OurString})|(?P<comment>//[^\n]*)|(?P<space>\s+)|(?P<word>[A-Za-z_][A-Za-z0-9_]*)|(?P<other>=>|.)")
+KEYWORDS = ["function", "type", "protocol"]
+
+
+class Declaration:
+    """una funcion, tipo o protocolo del nivel superior, o la expresion global (kind 'global').
+    start y end son posiciones en el codigo, digest no cambia si solo cambian comentarios o espacios"""
+
+    def __init__(self, kind, name, start, end, digest):
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.end = end
+        self.digest = digest
+
+    def __repr__(self):
+        return f"{self.kind} {self.name} [{self.start}:{self.end}]"
+
+
+def declarations(code):
+    """separa code en sus declaraciones sin parsearlo: una declaracion empieza con function, type o protocol
+    fuera de todo parentesis y termina en su '}' o, si es 'function ... => expr', en el ';' del mismo nivel.
+    Lo que queda al final es la expresion global"""
+    found = []
+    tokens = [match for match in TOKEN.finditer(code) if match.lastgroup not in ["comment", "space"]]
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token.group() not in KEYWORDS or index + 1 >= len(tokens):
+            break
+        end = declaration_end(tokens, index)
+        found.append(make_declaration(code, tokens, index, end, token.group(), tokens[index + 1].group()))
+        index = end
+    if index < len(tokens):
+        found.append(make_declaration(code, tokens, index, len(tokens), "global", "main"))
+    return found
+
+
+def declaration_end(tokens, index):
+    """indice del token que sigue a la declaracion que empieza en tokens[index].
+    Despues de '=>' el cuerpo es una expresion y un bloque puede seguir en ella ('=> { x; } + 2;'), asi que
+    termina en el ';' del mismo nivel o en un '}' seguido de otra declaracion; si no, va hasta el final"""
+    depth = 0
+    inline = False
+    while index < len(tokens):
+        text = tokens[index].group()
+        index += 1
+        if text in ["(", "{", "["]:
+            depth += 1
+        elif text in [")", "}", "]"]:
+            depth -= 1
+            if depth == 0 and text == "}" and (not inline or index < len(tokens) and tokens[index].group() in KEYWORDS):
+                break
+        elif text == "=>" and depth == 0:
+            inline = True
+        elif text == ";" and depth == 0 and inline:
+            return index
+    # un ';' despues del bloque es parte de la declaracion
+    if index < len(tokens) and tokens[index].group() == ";":
+        index += 1
+    return index
+
+
+def make_declaration(code, tokens, first, last, kind, name):
+    digest = hashlib.sha256(" ".join(token.group() for token in tokens[first:last]).encode()).hexdigest()
+    return Declaration(kind, name, tokens[first].start(), tokens[last - 1].end(), digest)
@@ -0,0 +1,212 @@
+from misc import ast_walk, get_descendancy_set, method_name_getter
+from hulk_ast import (
+    Program,
+    FunctionDef,
+    FunctionCall,
+    ID,
+    While,
+    TypeDef,
+    TypeCall,
+    BinOp,
+    Print,
+    Rand,
+)
+
+VALUE_TYPES = ["Number", "Boolean", "String"]
+
+
+class Effects:
+    "resumen de los efectos de una funcion, metodo o constructor"
+
+    def __init__(self):
+        self.io = False  # print
+        self.rand = False
+        self.assigns = False  # algun ':=' sobre variable o atributo
+        self.writes_fields = set()  # atributos escritos con self.x := ...
+        self.reads_fields = set()
+        self.loops = False
+        self.calls = set()  # claves de las funciones, metodos y constructores invocados
+        self.unknown = False  # llamada que no se pudo resolver
+
+    def merge(self, other: "Effects"):
+        "une los efectos de other en self, devuelve True si algo cambio"
+        before = (self.io, self.rand, self.assigns, len(self.writes_fields),
+                  len(self.reads_fields), self.loops, len(self.calls), self.unknown)
+        self.io |= other.io
+        self.rand |= other.rand
+        self.assigns |= other.assigns
+        self.writes_fields |= other.writes_fields
+        self.reads_fields |= other.reads_fields
+        self.loops |= other.loops
+        self.calls |= other.calls
+        self.unknown |= other.unknown
+        after = (self.io, self.rand, self.assigns, len(self.writes_fields),
+                 len(self.reads_fields), self.loops, len(self.calls), self.unknown)
+        return before != after
+
+    def side_effect_free(self):
+        "no imprime, no usa rand y no modifica objetos; puede leer atributos y asignar sus locales"
+        return not (self.io or self.rand or self.writes_fields or self.unknown)
+
+    def pure(self):
+        "ademas de no tener efectos tampoco usa ':='"
+        return self.side_effect_free() and not self.assigns
+
+
+class EffectAnalysis:
+    """calcula los efectos locales de cada funcion global, metodo y constructor
+    y luego los propaga por el grafo de llamadas hasta el punto fijo"""
+
+    def __init__(self):
+        self.program: Program = None
+        self.local = {}
+        self.summary = {}
+        self.definitions = {}
+
+    def run(self, program: Program):
+        self.program = program
+        for function in program.functions:
+            key = method_name_getter(function)
+            self.definitions[key] = function
+            self.local[key] = self.body_effects([function.body])
+
+        for type_def in program.types:
+            type_def: TypeDef
+            for method in type_def.functions:
+                key = self.method_key(type_def.id.name, method)
+                self.definitions[key] = method
+                self.local[key] = self.body_effects([method.body])
+            constructor_parts = [var.value for var in type_def.variables]
+            if type_def.inherits:
+                constructor_parts.append(type_def.inherits)
+            self.local["new " + type_def.id.name] = self.body_effects(constructor_parts)
+
+        for key, effects in self.local.items():
+            summary = Effects()
+            summary.merge(effects)
+            self.summary[key] = summary
+
+        changed = True
+        while changed:
+            changed = False
+            for key, summary in self.summary.items():
+                for callee in list(summary.calls):
+                    if callee in self.summary and summary.merge(self.summary[callee]):
+                        changed = True
+        return self
+
+    def method_key(self, type_name, method: FunctionDef):
+        return type_name + "." + method_name_getter(method)
+
+    def recursive(self, key):
+        return key in self.summary[key].calls
+
+    def may_diverge(self, key):
+        "una funcion con ciclos o recursion puede no terminar"
+        summary = self.summary[key]
+        if summary.loops or summary.unknown:
+            return True
+        return any(self.recursive(callee) for callee in summary.calls if callee in self.summary)
+
+    def region_effects(self, bodies):
+        "efectos de un fragmento de codigo sumando los de todo lo que llama"
+        effects = self.body_effects(bodies)
+        for callee in list(effects.calls):
+            if callee in self.summary:
+                effects.merge(self.summary[callee])
+        return effects
+
+    def call_effects(self, keys):
+        "efectos de una llamada que puede ejecutar cualquiera de keys, None si alguna no se conoce"
+        effects = Effects()
+        for key in keys:
+            if key not in self.summary or self.may_diverge(key):
+                return None
+            effects.merge(self.summary[key])
+        return effects
+
+    def body_effects(self, bodies):
+        effects = Effects()
+        method_calls = set()
+        for body in bodies:
+            for node in ast_walk(body):
+                node_type = type(node)
+                if node_type is Print:
+                    effects.io = True
+                elif node_type is Rand:
+                    effects.rand = True
+                elif node_type is While:
+                    effects.loops = True
+                elif node_type is TypeCall:
+                    effects.calls.add("new " + node.id.name)
+                elif node_type is BinOp:
+                    if node.op == "AD":
+                        effects.assigns = True
+                        if type(node.left) is BinOp and type(node.left.right) is ID:
+                            effects.writes_fields.add(node.left.right.name)
+                    elif node.op == ".":
+                        if type(node.right) is FunctionCall:
+                            method_calls.add(id(node.right))
+                            keys = self.resolve_method(node.left.static_type, node.right)
+                            if keys is None:
+                                effects.unknown = True
+                            else:
+                                effects.calls |= keys
+                        else:
+                            effects.reads_fields.add(node.right.name)
+                elif node_type is FunctionCall and id(node) not in method_calls:
+                    key = self.resolve_function(node)
+                    if key is None:
+                        effects.unknown = True
+                    else:
+                        effects.calls.add(key)
+        return effects
+
+    def resolve_function(self, call: FunctionCall):
+        name = method_name_getter(call)
+        definition = self.program.global_definitions.get(name)
+        if type(definition) is FunctionDef:
+            return name
+        if call.func_id.name == "base":
+            parent_method = call.variable_scope.get(name)
+            for key, method in self.definitions.items():
+                if method is parent_method:
+                    return key
+        return None
+
+    def resolve_method(self, type_name, call: FunctionCall):
+        "todas las implementaciones que puede ejecutar x.m(...) si x tiene tipo estatico type_name"
+        if type_name == "Vector":
+            return set()
+        return self.resolve_method_name(type_name, method_name_getter(call))
+
+    def resolve_method_name(self, type_name, name):
+        if type_name == "Vector":
+            return set()
+        if type_name not in self.program.hierarchy_tree:
+            return None
+        keys = set()
+        current = type_name
+        while current is not None:
+            type_def = self.program.global_definitions.get(current)
+            if type(type_def) is TypeDef and self.own_method(type_def, name):
+                keys.add(current + "." + name)
+                break
+            current = self.program.hierarchy_tree[current].parent
+        for desc in get_descendancy_set(self.program, type_name, set()):
+            type_def = self.program.global_definitions.get(desc)
+            if type(type_def) is TypeDef and self.own_method(type_def, name):
+                keys.add(desc + "." + name)
+        return keys if keys else None
+
+    def own_method(self, type_def: TypeDef, name):
+        return any(method_name_getter(method) == name for method in type_def.functions)
+
+    def memoizable(self, function: FunctionDef):
+        "funcion global pura sobre valores Number, Boolean o String"
+        key = method_name_getter(function)
+        if key not in self.summary or not self.summary[key].pure():
+            return False
+        if function.static_type not in VALUE_TYPES:
+            return False
+        return all(param.static_type in VALUE_TYPES for param in function.params.param_list)
@@ -0,0 +1,215 @@
+import gc
+import hashlib
+import multiprocessing
+import os
+import pickle
+
+import hulk_cache
+from hulk_ast import Program, ID
+from hulk_cache import compiler_fingerprint, dumps
+from hulk_lexer import errorList as lexer_errors
+from hulk_parser import parse_span, parse_whole, syntax_errors, sErrorList
+from hulk_declarations import declarations
+from misc import ast_walk, refact_ast, number_nodes
+
+
+def loads(data):
+    # todos los objetos que se crean siguen vivos, el gc solo haria recorridos inutiles
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return hulk_cache.loads(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def fields(node):
+    "los valores de los atributos de un nodo, lo mismo que guarda pickle: los slots con valor y el __dict__ si se creo"
+    state = node.__reduce_ex__(pickle.HIGHEST_PROTOCOL)[2]
+    for part in state if type(state) is tuple else [state]:
+        if part:
+            yield from part.values()
+
+
+def tokens(nodes):
+    "los tokens con posicion que cuelgan de los nodos, cada uno una vez"
+    found = {}
+    for root in nodes:
+        for node in ast_walk(root):
+            for value in fields(node):
+                for item in value if type(value) is list else [value]:
+                    # el ID del nombre de una funcion o de un tipo no es hijo, ast_walk no pasa por el
+                    for token in fields(item) if type(item) is ID else [item]:
+                        if hasattr(token, "lexpos"):
+                            found[id(token)] = token
+    return list(found.values())
+
+
+class DeclarationCache:
+    """el ast recien parseado de cada declaracion, por el hash de su texto exacto, en un archivo.
+    Guarda la posicion donde se parseo y la lista de sus tokens; si la declaracion se movio, se corren al cargarla"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            # los nodos se guardan con la forma que les da esta version del compilador, de otra no sirven
+            try:
+                with open(path, "rb") as f:
+                    fingerprint, entries = pickle.load(f)
+                if fingerprint == compiler_fingerprint():
+                    self.entries = entries
+            except (pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError):
+                pass
+        self.used = {}
+
+    def load(self, key, start, lineno):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.used[key] = entry
+        old_start, old_lineno, data = entry
+        items, global_exp, moved = loads(data)
+        if (old_start, old_lineno) != (start, lineno):
+            for token in moved:
+                token.lexpos += start - old_start
+                token.lineno += lineno - old_lineno
+        return items, global_exp
+
+    def store(self, key, start, lineno, data):
+        "data es lo que devuelve pack"
+        self.used[key] = (start, lineno, data)
+
+    def save(self):
+        "escribe solo las declaraciones de esta version del archivo"
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "wb") as f:
+            pickle.dump((compiler_fingerprint(), self.used), f, pickle.HIGHEST_PROTOCOL)
+
+
+def pack(nodes):
+    "una declaracion parseada, con la lista de sus tokens, lista para la cache o para pasar entre procesos"
+    items, global_exp = nodes
+    roots = items + ([global_exp] if global_exp is not None else [])
+    return dumps((items, global_exp, tokens(roots)))
+
+
+def parse_declaration(code, start, end, lineno):
+    "(funciones, tipos y protocolos, expresion global o None) de una declaracion"
+    program = parse_span(code, start, end, lineno)
+    if program is None:
+        return [], None
+    return program.functions + program.types + program.protocols, program.global_exp
+
+
+def parse_spans(code, spans):
+    "parsea cada (start, end, lineno) y reescribe sus for y let; devuelve (declaraciones, errores de sintaxis)"
+    del sErrorList[:]
+    parsed = [parse_declaration(code, start, end, lineno) for start, end, lineno in spans]
+    if sErrorList:
+        return None, syntax_errors(code)
+    # los cargados de la cache ya vienen reescritos
+    refact_ast(*[node for items, global_exp in parsed for node in items + [global_exp] if node is not None])
+    return parsed, []
+
+
+# el codigo que parsean los procesos del pool, se pasa una vez a cada uno
+worker_code = None
+
+
+def start_worker(code):
+    global worker_code
+    worker_code = code
+
+
+def parse_batch(spans):
+    "(datos de pack de cada declaracion o None, errores de sintaxis, errores del lexer)"
+    seen = len(lexer_errors)
+    parsed, errors = parse_spans(worker_code, spans)
+    return [pack(nodes) for nodes in parsed] if parsed is not None else None, errors, lexer_errors[seen:]
+
+
+def batches(spans, count):
+    "count grupos de declaraciones consecutivas con mas o menos el mismo largo de texto"
+    total = sum(end - start for start, end, _ in spans)
+    groups = [[]]
+    size = 0
+    for span in spans:
+        if size >= total * len(groups) / count and groups[-1]:
+            groups.append([])
+        groups[-1].append(span)
+        size += span[1] - span[0]
+    return groups
+
+
+def parse_in_pool(code, spans, workers):
+    """parsea spans repartidos en un pool de procesos; devuelve (datos de pack de cada uno, errores).
+    Los errores del lexer de los procesos se agregan a los de este, como si se hubiera parseado aqui"""
+    with multiprocessing.Pool(workers, initializer=start_worker, initargs=(code,)) as pool:
+        results = pool.map(parse_batch, batches(spans, workers * 4))
+    for _, _, batch_lexer_errors in results:
+        lexer_errors.extend(batch_lexer_errors)
+    errors = [error for _, batch_errors, _ in results for error in batch_errors]
+    if errors:
+        return None, errors
+    return [data for batch_data, _, _ in results for data in batch_data], []
+
+
+def parse_program(code, cache: DeclarationCache = None, workers=1):
+    """como hulk_parse pero declaracion por declaracion: las que estan en cache no se vuelven a parsear
+    y con workers > 1 las demas se parsean en un pool de procesos. Devuelve (ast, errores).
+    Si alguna declaracion no parsea se parsea el archivo entero, que da los errores; un programa valido
+    nunca se rechaza porque declarations lo separo mal"""
+    seen = len(lexer_errors)
+    found = declarations(code)
+    parsed = [None] * len(found)
+    missing = []
+    lineno = 1
+    position = 0
+    for index, declaration in enumerate(found):
+        lineno += code.count("\n", position, declaration.start)
+        position = declaration.start
+        key = hashlib.sha256(code[declaration.start:declaration.end].encode()).hexdigest()
+        if cache is not None:
+            parsed[index] = cache.load(key, declaration.start, lineno)
+        if parsed[index] is None:
+            missing.append((index, key, (declaration.start, declaration.end, lineno)))
+
+    spans = [span for _, _, span in missing]
+    if workers > 1 and len(missing) > 1:
+        packed, errors = parse_in_pool(code, spans, workers)
+        if errors:
+            return fallback(code, seen)
+        for (index, _, _), data in zip(missing, packed):
+            items, global_exp, _ = loads(data)
+            parsed[index] = (items, global_exp)
+    else:
+        fresh, errors = parse_spans(code, spans)
+        if errors:
+            return fallback(code, seen)
+        for (index, _, _), nodes in zip(missing, fresh):
+            parsed[index] = nodes
+        packed = [pack(nodes) for nodes in fresh] if cache is not None else []
+    if cache is not None:
+        for (_, key, (start, _, lineno)), data in zip(missing, packed):
+            cache.store(key, start, lineno, data)
+        cache.save()
+
+    top_level = [item for items, _ in parsed for item in items]
+    global_exp = next((global_exp for _, global_exp in parsed if global_exp is not None), None)
+    program = Program(top_level, global_exp)
+    for item in top_level:
+        item.parent = program
+    if global_exp is not None:
+        global_exp.parent = program
+    number_nodes(program)
+    program.input = code
+    return program, []
+
+
+def fallback(code, seen):
+    "el archivo entero con parse_whole; los errores del lexer de los pedazos se reemplazan por los de todo el archivo"
+    del lexer_errors[seen:]
+    ast, errors = parse_whole(code)
+    return (ast, []) if not errors else (None, errors)
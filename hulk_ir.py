@@ -0,0 +1,718 @@
+import visitor
+from misc import get_descendancy_set
+from hulk_ast import (
+    FunctionCall,
+    ExpressionBlock,
+    Let,
+    ID,
+    If,
+    While,
+    TrueLiteral,
+    FalseLiteral,
+    TypeCall,
+    VectorExt,
+    VectorCall,
+    BinOp,
+    UnaryOp,
+    Num,
+    StringLiteral,
+    Pi,
+    E,
+    Print,
+    Sqrt,
+    Sin,
+    Cos,
+    Exp,
+    Log,
+    Rand,
+)
+from hulk_loops import RangeLoop, VectorLoop
+
+RAW_TYPES = ["float", "int"]
+
+
+class Unsupported(Exception):
+    "el ast usa algo que el ir todavia no representa, CodeGen usa el camino viejo para esa funcion"
+
+
+# region Values
+class Temp:
+    "un valor del ir: una variable de C con tipo, boxed (Number, Point, ...) o raw (float, int)"
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+    def raw(self):
+        return self.type in RAW_TYPES
+
+    def __repr__(self):
+        return f"{self.name}:{self.type}"
+
+
+# endregion
+# region Instructions
+class Instruction:
+    "dest = ... ; uses son los Temp que lee"
+
+    dest: Temp = None
+
+    def uses(self):
+        return []
+
+
+class Const(Instruction):
+    "literal: Number, String, Boolean, Object, float o int"
+
+    def __init__(self, dest, value):
+        self.dest = dest
+        self.value = value
+
+
+class Move(Instruction):
+    def __init__(self, dest, source):
+        self.dest = dest
+        self.source = source
+
+    def uses(self):
+        return [self.source]
+
+
+class Binary(Instruction):
+    "aritmetica, comparaciones y concatenacion, sobre valores boxed o raw segun el tipo de dest"
+
+    def __init__(self, dest, op, left, right):
+        self.dest = dest
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def uses(self):
+        return [self.left, self.right]
+
+
+class Unary(Instruction):
+    def __init__(self, dest, op, operand):
+        self.dest = dest
+        self.op = op
+        self.operand = operand
+
+    def uses(self):
+        return [self.operand]
+
+
+class Math(Instruction):
+    "sqrt, sin, cos, exp, log(base, value) y rand"
+
+    def __init__(self, dest, function, args):
+        self.dest = dest
+        self.function = function
+        self.args = args
+
+    def uses(self):
+        return list(self.args)
+
+
+class Box(Instruction):
+    def __init__(self, dest, source):
+        self.dest = dest
+        self.source = source
+
+    def uses(self):
+        return [self.source]
+
+
+class Unbox(Instruction):
+    def __init__(self, dest, source):
+        self.dest = dest
+        self.source = source
+
+    def uses(self):
+        return [self.source]
+
+
+class Call(Instruction):
+    def __init__(self, dest, function, args, arg_types):
+        self.dest = dest
+        self.function = function
+        self.args = args
+        self.arg_types = arg_types
+
+    def uses(self):
+        return list(self.args)
+
+
+class MethodCall(Instruction):
+    def __init__(self, dest, receiver, receiver_type, method, args, arg_types):
+        self.dest = dest
+        self.receiver = receiver
+        self.receiver_type = receiver_type
+        self.method = method
+        self.args = args
+        self.arg_types = arg_types
+
+    def uses(self):
+        return [self.receiver] + list(self.args)
+
+
+class New(Instruction):
+    def __init__(self, dest, type_name, args, arg_types):
+        self.dest = dest
+        self.type_name = type_name
+        self.args = args
+        self.arg_types = arg_types
+
+    def uses(self):
+        return list(self.args)
+
+
+class GetField(Instruction):
+    def __init__(self, dest, obj, obj_type, field):
+        self.dest = dest
+        self.obj = obj
+        self.obj_type = obj_type
+        self.field = field
+
+    def uses(self):
+        return [self.obj]
+
+
+class SetField(Instruction):
+    def __init__(self, obj, obj_type, field, value, field_type):
+        self.obj = obj
+        self.obj_type = obj_type
+        self.field = field
+        self.value = value
+        self.field_type = field_type
+
+    def uses(self):
+        return [self.obj, self.value]
+
+
+class TypeTest(Instruction):
+    "dest = value is T, types son T y sus descendientes"
+
+    def __init__(self, dest, value, types):
+        self.dest = dest
+        self.value = value
+        self.types = types
+
+    def uses(self):
+        return [self.value]
+
+
+class Downcast(Instruction):
+    "dest = value as T, termina el programa si el tipo dinamico no conforma"
+
+    def __init__(self, dest, value, types):
+        self.dest = dest
+        self.value = value
+        self.types = types
+
+    def uses(self):
+        return [self.value]
+
+
+class PrintValue(Instruction):
+    def __init__(self, dest, value):
+        self.dest = dest
+        self.value = value
+
+    def uses(self):
+        return [self.value]
+
+
+class VectorLiteral(Instruction):
+    def __init__(self, dest, items, unboxed):
+        self.dest = dest
+        self.items = items
+        self.unboxed = unboxed
+
+    def uses(self):
+        return list(self.items)
+
+
+class VectorGet(Instruction):
+    "dest = vector[index] comprobando los limites salvo que guard ya lo haya hecho antes del ciclo"
+
+    def __init__(self, dest, vector, index, guard):
+        self.dest = dest
+        self.vector = vector
+        self.index = index
+        self.guard = guard
+
+    def uses(self):
+        return [self.vector, self.index] + ([self.guard] if self.guard is not None else [])
+
+
+class VectorLength(Instruction):
+    def __init__(self, dest, vector):
+        self.dest = dest
+        self.vector = vector
+
+    def uses(self):
+        return [self.vector]
+
+
+class InBounds(Instruction):
+    "dest = todos los indices en [start, limit) o [start, limit] caben en vector"
+
+    def __init__(self, dest, start, limit, op, vector):
+        self.dest = dest
+        self.start = start
+        self.limit = limit
+        self.op = op
+        self.vector = vector
+
+    def uses(self):
+        return [self.start, self.limit, self.vector]
+
+
+class NoValue(Instruction):
+    "el valor de un while que nunca ejecuto su cuerpo"
+
+    def __init__(self, dest):
+        self.dest = dest
+
+
+# endregion
+# region Terminators
+class Jump:
+    def __init__(self, target):
+        self.target = target
+
+    def uses(self):
+        return []
+
+
+class Branch:
+    def __init__(self, condition, if_true, if_false):
+        self.condition = condition
+        self.if_true = if_true
+        self.if_false = if_false
+
+    def uses(self):
+        return [self.condition]
+
+
+class Return:
+    def __init__(self, value):
+        self.value = value
+
+    def uses(self):
+        return [self.value]
+
+
+# endregion
+class BasicBlock:
+    def __init__(self, label):
+        self.label = label
+        self.instructions = []
+        self.terminator = None
+
+
+class IRFunction:
+    "una funcion, metodo o la expresion global en bloques basicos; blocks[0] es la entrada"
+
+    def __init__(self, name, params, return_type):
+        self.name = name
+        self.params = params
+        self.return_type = return_type
+        self.blocks = []
+        self.temps = []
+
+    def successors(self, block: BasicBlock):
+        terminator = block.terminator
+        if type(terminator) is Jump:
+            return [terminator.target]
+        if type(terminator) is Branch:
+            return [terminator.if_true, terminator.if_false]
+        return []
+
+
+class IRBuilder:
+    """baja el ast ya chequeado (y marcado por las pasadas de CodeGen) a codigo de tres direcciones:
+    cada visit emite instrucciones en el bloque actual y devuelve el Temp con el valor del nodo"""
+
+    def __init__(self, c_function_name):
+        self.c_function_name = c_function_name
+        self.function: IRFunction = None
+        self.block: BasicBlock = None
+        self.scopes = []
+        self.counter = 0
+        self.loop_counters = {}
+        self.guards = {}
+
+    def build(self, name, params, return_type, body, self_type=None):
+        "params son los ID de la funcion; con self_type se agrega self como primer parametro"
+        param_temps = []
+        scope = {}
+        if self_type is not None:
+            scope["self"] = Temp("self", self_type)
+        for param in params:
+            temp = Temp(param.name, param.static_type)
+            scope[param.name] = temp
+            param_temps.append(temp)
+        self.function = IRFunction(name, param_temps, return_type)
+        self.scopes = [scope]
+        self.block = self.new_block()
+        result = self.checked(body, self.visit(body))
+        self.terminate(Return(result))
+        return self.function
+
+    # region helpers
+    def temp(self, type, hint="tmp"):
+        self.counter += 1
+        temp = Temp(f"{hint}_{self.counter}", type)
+        self.function.temps.append(temp)
+        return temp
+
+    def new_block(self):
+        block = BasicBlock(f"block_{len(self.function.blocks)}")
+        self.function.blocks.append(block)
+        return block
+
+    def emit(self, instruction):
+        if self.block.terminator is None:
+            self.block.instructions.append(instruction)
+        return instruction.dest
+
+    def terminate(self, terminator):
+        if self.block.terminator is None:
+            self.block.terminator = terminator
+
+    def switch(self, block):
+        self.block = block
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        raise Unsupported(f"variable {name}")
+
+    def checked(self, node, result):
+        if not isinstance(result, Temp):
+            raise Unsupported(type(node).__name__)
+        return result
+
+    def value(self, node):
+        "los handlers son generadores, se usa como 'yield from self.value(node)' y node se visita sin recursion"
+        return self.checked(node, (yield node))
+
+    def const(self, type, value):
+        return self.emit(Const(self.temp(type), value))
+
+    def copy(self, source: Temp):
+        "un Temp nuevo con el valor actual de source, para que una asignacion posterior no lo cambie"
+        return self.emit(Move(self.temp(source.type), source))
+
+    def arguments(self, params):
+        args = []
+        for param in params.param_list:
+            args.append((yield from self.value(param)))
+        return args
+
+    # endregion
+
+    @visitor.on("node")
+    def visit(self, node):
+        pass
+
+    @visitor.when(Num)
+    def visit(self, node: Num):
+        return self.const("Number", str(node.value))
+
+    @visitor.when(StringLiteral)
+    def visit(self, node: StringLiteral):
+        return self.const("String", node.value)
+
+    @visitor.when(TrueLiteral)
+    def visit(self, node: TrueLiteral):
+        return self.const("Boolean", "1")
+
+    @visitor.when(FalseLiteral)
+    def visit(self, node: FalseLiteral):
+        return self.const("Boolean", "0")
+
+    @visitor.when(Pi)
+    def visit(self, node: Pi):
+        return self.const("Number", "M_PI")
+
+    @visitor.when(E)
+    def visit(self, node: E):
+        return self.const("Number", "M_E")
+
+    @visitor.when(ID)
+    def visit(self, node: ID):
+        return self.lookup(node.name)
+
+    @visitor.when(ExpressionBlock)
+    def visit(self, node: ExpressionBlock):
+        if not node.exp_list:
+            return self.const("Object", None)
+        result = None
+        for expression in node.exp_list:
+            result = yield from self.value(expression)
+        return result
+
+    @visitor.when(Let)
+    def visit(self, node: Let):
+        value = yield from self.value(node.assign[0].value)
+        name = node.assign[0].name
+        variable = self.temp(name.static_type, name.name)
+        self.emit(Move(variable, value))
+        self.scopes.append({name.name: variable})
+        result = yield from self.value(node.body)
+        self.scopes.pop()
+        return result
+
+    @visitor.when(If)
+    def visit(self, node: If):
+        result = self.temp(node.static_type)
+        end = BasicBlock(None)
+        for case in node.case_list:
+            condition = yield from self.value(case.condition)
+            then_block = self.new_block()
+            next_block = self.new_block()
+            self.terminate(Branch(condition, then_block, next_block))
+            self.switch(then_block)
+            self.emit(Move(result, (yield from self.value(case.body))))
+            self.terminate(Jump(end))
+            self.switch(next_block)
+        self.terminate(Jump(end))
+        end.label = f"block_{len(self.function.blocks)}"
+        self.function.blocks.append(end)
+        self.switch(end)
+        return result
+
+    @visitor.when(While)
+    def visit(self, node: While):
+        result = self.temp(node.static_type)
+        executed = self.const("int", "0")
+        setup = self.loop_setup(node)
+
+        head = self.new_block()
+        self.terminate(Jump(head))
+        self.switch(head)
+        body = self.new_block()
+        exit = BasicBlock(None)
+        condition = yield from self.loop_condition(node, setup)
+        self.terminate(Branch(condition, body, exit))
+
+        self.switch(body)
+        self.emit(Const(executed, "1"))
+        if node.native_loop is not None:
+            iterator = node.for_let.assign[0].name
+            item = self.loop_item(node, setup)
+            variable = self.temp(iterator.static_type, iterator.name)
+            self.emit(Move(variable, item))
+            self.scopes.append({iterator.name: variable})
+            self.emit(Move(result, (yield from self.value(node.for_let.body))))
+            self.scopes.pop()
+        else:
+            self.emit(Move(result, (yield from self.value(node.body))))
+        self.terminate(Jump(head))
+
+        exit.label = f"block_{len(self.function.blocks)}"
+        self.function.blocks.append(exit)
+        self.switch(exit)
+        no_value = self.new_block()
+        done = self.new_block()
+        self.terminate(Branch(executed, done, no_value))
+        self.switch(no_value)
+        self.emit(NoValue(result))
+        self.terminate(Jump(done))
+        self.switch(done)
+        return result
+
+    def loop_setup(self, node: While):
+        "lo que un ciclo nativo y sus comprobaciones de limites calculan una vez antes de empezar"
+        setup = {}
+        if isinstance(node.native_loop, RangeLoop):
+            loop = node.native_loop
+            iterable = self.lookup(node.parent.assign[-1].name.name)
+            counter = self.temp("float", "for_counter")
+            limit = self.temp("float", "for_limit")
+            self.emit(Unbox(counter, self.emit(GetField(self.temp("Number"), iterable, loop.type_name, loop.counter))))
+            self.emit(Unbox(limit, self.emit(GetField(self.temp("Number"), iterable, loop.type_name, loop.limit))))
+            setup.update(counter=counter, limit=limit, step=self.const("float", str(loop.step)))
+            self.loop_counters[id(node)] = counter
+            start = self.emit(Binary(self.temp("float"), "+", counter, setup["step"]))
+            op = loop.op
+        elif isinstance(node.native_loop, VectorLoop):
+            setup["vector"] = self.lookup(node.parent.assign[-1].name.name)
+            setup["index"] = self.const("int", "-1")
+            setup["one"] = self.const("int", "1")
+            # el indice nunca sale de [0, len)
+            setup["in_bounds"] = setup["one"]
+        if node.counter_loop is not None and node.bounds_guards:
+            counter_loop = node.counter_loop
+            start = self.emit(Unbox(self.temp("float"), self.lookup(counter_loop.counter)))
+            limit = counter_loop.limit
+            if type(limit) is Num:
+                limit = self.const("float", str(limit.value))
+            else:
+                limit = self.emit(Unbox(self.temp("float"), self.lookup(limit.name)))
+            setup["limit"] = limit
+            op = counter_loop.op
+        for guard in node.bounds_guards:
+            vector = self.lookup(guard.vector)
+            self.guards[guard.name] = self.emit(InBounds(self.temp("int", "in_bounds"), start, setup["limit"], op, vector))
+        return setup
+
+    def loop_condition(self, node: While, setup):
+        if isinstance(node.native_loop, RangeLoop):
+            counter = setup["counter"]
+            self.emit(Binary(counter, "+", counter, setup["step"]))
+            return self.emit(Binary(self.temp("int"), node.native_loop.op, counter, setup["limit"]))
+        if isinstance(node.native_loop, VectorLoop):
+            index = setup["index"]
+            self.emit(Binary(index, "+", index, setup["one"]))
+            length = self.emit(VectorLength(self.temp("int"), setup["vector"]))
+            return self.emit(Binary(self.temp("int"), "<", index, length))
+        return (yield from self.value(node.condition))
+
+    def loop_item(self, node: While, setup):
+        if isinstance(node.native_loop, RangeLoop):
+            return self.emit(Box(self.temp("Number"), setup["counter"]))
+        iterator = node.for_let.assign[0].name
+        return self.emit(VectorGet(self.temp(iterator.static_type), setup["vector"], setup["index"], setup["in_bounds"]))
+
+    @visitor.when(BinOp)
+    def visit(self, node: BinOp):
+        if node.op == ".":
+            return (yield from self.member(node))
+        if node.op == "AD":
+            value = yield from self.value(node.right)
+            if type(node.left) is ID:
+                variable = self.lookup(node.left.name)
+                self.emit(Move(variable, value))
+                return variable
+            if type(node.left) is BinOp and node.left.op == "." and type(node.left.right) is ID:
+                obj = yield from self.value(node.left.left)
+                self.emit(SetField(obj, node.left.left.static_type, node.left.right.name, value, node.left.static_type))
+                return self.emit(Move(self.temp(node.left.static_type), value))
+            raise Unsupported("assignment target")
+        if node.op in ["&", "|"]:
+            # el operando derecho solo se evalua si el izquierdo no decide el resultado
+            result = self.temp(node.static_type)
+            left = yield from self.value(node.left)
+            decided = self.new_block()
+            evaluate = self.new_block()
+            end = BasicBlock(None)
+            if node.op == "&":
+                self.terminate(Branch(left, evaluate, decided))
+            else:
+                self.terminate(Branch(left, decided, evaluate))
+            self.switch(decided)
+            self.emit(Const(result, "0" if node.op == "&" else "1"))
+            self.terminate(Jump(end))
+            self.switch(evaluate)
+            self.emit(Move(result, (yield from self.value(node.right))))
+            self.terminate(Jump(end))
+            end.label = f"block_{len(self.function.blocks)}"
+            self.function.blocks.append(end)
+            self.switch(end)
+            return result
+        if node.op in ["is", "as"]:
+            value = yield from self.value(node.left)
+            types = sorted(get_descendancy_set(node, node.right.static_type, set()))
+            if node.op == "is":
+                return self.emit(TypeTest(self.temp("Boolean"), value, types))
+            return self.emit(Downcast(self.temp(node.right.static_type), value, types))
+        left = yield from self.value(node.left)
+        right = yield from self.value(node.right)
+        return self.emit(Binary(self.temp(node.static_type), node.op, left, right))
+
+    def member(self, node: BinOp):
+        receiver_type = node.left.static_type
+        if type(node.right) is ID:
+            obj = yield from self.value(node.left)
+            return self.emit(GetField(self.temp(node.static_type), obj, receiver_type, node.right.name))
+        call: FunctionCall = node.right
+        if type(call) is not FunctionCall or receiver_type == "Vector":
+            raise Unsupported("member")
+        receiver = yield from self.value(node.left)
+        args = yield from self.arguments(call.params)
+        if call.tail_call:
+            return self.tail_call(args)
+        return self.emit(MethodCall(self.temp(node.static_type), receiver, receiver_type, call.func_id.name, args, list(call.param_types)))
+
+    def tail_call(self, args):
+        # los argumentos se copian antes de reasignar los parametros: f(b, a) no debe pisar a antes de leerlo
+        copies = [self.copy(arg) for arg in args]
+        for param, arg in zip(self.function.params, copies):
+            self.emit(Move(param, arg))
+        self.terminate(Jump(self.function.blocks[0]))
+        self.switch(self.new_block())
+        return self.temp(self.function.return_type)
+
+    @visitor.when(FunctionCall)
+    def visit(self, node: FunctionCall):
+        if node.func_id.name == "base":
+            raise Unsupported("base")
+        args = yield from self.arguments(node.params)
+        if node.tail_call:
+            return self.tail_call(args)
+        return self.emit(Call(self.temp(node.static_type), self.c_function_name(node), args, list(node.param_types)))
+
+    @visitor.when(TypeCall)
+    def visit(self, node: TypeCall):
+        args = yield from self.arguments(node.params)
+        return self.emit(New(self.temp(node.static_type), node.id.name, args, list(node.param_types)))
+
+    @visitor.when(UnaryOp)
+    def visit(self, node: UnaryOp):
+        operand = yield from self.value(node.operand)
+        return self.emit(Unary(self.temp(node.static_type), node.op, operand))
+
+    @visitor.when(Print)
+    def visit(self, node: Print):
+        value = yield from self.value(node.value)
+        return self.emit(PrintValue(self.temp(node.static_type), value))
+
+    @visitor.when(Sqrt)
+    def visit(self, node: Sqrt):
+        return self.emit(Math(self.temp("Number"), "sqrt", [(yield from self.value(node.value))]))
+
+    @visitor.when(Sin)
+    def visit(self, node: Sin):
+        return self.emit(Math(self.temp("Number"), "sin", [(yield from self.value(node.value))]))
+
+    @visitor.when(Cos)
+    def visit(self, node: Cos):
+        return self.emit(Math(self.temp("Number"), "cos", [(yield from self.value(node.value))]))
+
+    @visitor.when(Exp)
+    def visit(self, node: Exp):
+        return self.emit(Math(self.temp("Number"), "exp", [(yield from self.value(node.value))]))
+
+    @visitor.when(Log)
+    def visit(self, node: Log):
+        base = yield from self.value(node.base)
+        value = yield from self.value(node.value)
+        return self.emit(Math(self.temp("Number"), "log", [base, value]))
+
+    @visitor.when(Rand)
+    def visit(self, node: Rand):
+        return self.emit(Math(self.temp("Number"), "rand", []))
+
+    @visitor.when(VectorExt)
+    def visit(self, node: VectorExt):
+        items = (yield from self.arguments(node.items)) if node.items else []
+        element_type = getattr(node.static_type, "T", None)
+        unboxed = element_type if element_type in ["Number", "Boolean"] else None
+        return self.emit(VectorLiteral(self.temp("Vector"), items, unboxed))
+
+    @visitor.when(VectorCall)
+    def visit(self, node: VectorCall):
+        index = yield from self.value(node.index)
+        vector = yield from self.value(node.id)
+        guard = None
+        if node.bounds_guard is not None:
+            guard = self.guards.get(node.bounds_guard.name)
+            counter = self.loop_counters.get(id(node.bounds_guard.loop))
+            if counter is not None:
+                # el indice es el contador nativo del for, no hace falta leerlo de la caja
+                index = counter
+        return self.emit(VectorGet(self.temp(node.static_type), vector, index, guard))
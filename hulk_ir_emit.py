@@ -0,0 +1,266 @@
+import visitor
+from hulk_ir import (
+    Temp,
+    IRFunction,
+    Const,
+    Move,
+    Binary,
+    Unary,
+    Math,
+    Box,
+    Unbox,
+    Call,
+    MethodCall,
+    New,
+    GetField,
+    SetField,
+    TypeTest,
+    Downcast,
+    PrintValue,
+    VectorLiteral,
+    VectorGet,
+    VectorLength,
+    InBounds,
+    NoValue,
+    Jump,
+    Branch,
+    Return,
+)
+
+ARITHMETIC = ["+", "-", "*", "/"]
+COMPARISON = [">", "<", ">=", "<=", "==", "!=", "&", "|"]
+
+
+def c_type(temp: Temp):
+    return temp.type if temp.raw() else f"{temp.type}*"
+
+
+def c_cast(type_name, value: Temp):
+    return f"({type_name}*){value.name}"
+
+
+def c_value(temp: Temp):
+    "el valor escalar de un Temp, desempaquetando si hace falta"
+    return temp.name if temp.raw() else f"{temp.name}->value"
+
+
+class CEmitter:
+    "escribe una IRFunction como el cuerpo de una funcion de C: declaraciones, bloques con etiquetas y goto"
+
+    def emit(self, function: IRFunction):
+        params = {id(param) for param in function.params}
+        lines = []
+        for temp in function.temps:
+            if id(temp) in params:
+                continue
+            lines.append(f"{c_type(temp)} {temp.name} = {'0' if temp.raw() else 'NULL'};")
+        self.function = function
+        for block in function.blocks:
+            lines.append(f"{block.label}:;")
+            for instruction in block.instructions:
+                lines.append(self.visit(instruction))
+            lines.append(self.visit(block.terminator))
+        return "\n".join(lines)
+
+    @visitor.on("instruction")
+    def visit(self, instruction):
+        pass
+
+    @visitor.when(Const)
+    def visit(self, instruction: Const):
+        dest = instruction.dest
+        value = instruction.value
+        if dest.raw():
+            code = f"{value}"
+        elif dest.type == "Number":
+            code = f"new_Number((float){value})"
+        elif dest.type == "Boolean":
+            code = f"new_Boolean({value})"
+        elif dest.type == "String":
+            code = f'new_String("{value}")'
+        else:
+            code = "new_Object()"
+        return f"{dest.name} = {code};"
+
+    @visitor.when(Move)
+    def visit(self, instruction: Move):
+        dest = instruction.dest
+        if dest.raw():
+            return f"{dest.name} = {instruction.source.name};"
+        return f"{dest.name} = {c_cast(dest.type, instruction.source)};"
+
+    @visitor.when(Binary)
+    def visit(self, instruction: Binary):
+        dest, op = instruction.dest, instruction.op
+        left, right = c_value(instruction.left), c_value(instruction.right)
+        if op in ["^", "**"]:
+            value = f"pow({left}, {right})"
+        elif op == "%":
+            value = f"(float)fmodf({left}, {right})"
+        elif op == "@":
+            value = f"concatenate_strings({instruction.left.name}->string,{instruction.right.name}->string)"
+        elif op == "@@":
+            value = f'concatenate_strings(concatenate_strings({instruction.left.name}->string," "),{instruction.right.name}->string)'
+        elif op in ARITHMETIC:
+            value = f"({left} {op} {right})"
+        elif op in COMPARISON:
+            value = f"(({left} {op} {right}) ? 1 : 0)"
+        else:
+            raise TypeError(f"Unknown operator {op}")
+        if dest.raw():
+            return f"{dest.name} = {value};"
+        return f"{dest.name} = new_{dest.type}({value});"
+
+    @visitor.when(Unary)
+    def visit(self, instruction: Unary):
+        dest = instruction.dest
+        if instruction.op == "-":
+            value = f"-({c_value(instruction.operand)})"
+        elif instruction.op == "!":
+            value = f"!({c_value(instruction.operand)})"
+        else:
+            raise TypeError(f"Unknown unary operator {instruction.op}")
+        if dest.raw():
+            return f"{dest.name} = {value};"
+        return f"{dest.name} = new_{dest.type}({value});"
+
+    @visitor.when(Math)
+    def visit(self, instruction: Math):
+        args = [c_value(arg) for arg in instruction.args]
+        if instruction.function == "log":
+            value = f"log({args[1]})/log({args[0]})"
+        elif instruction.function == "rand":
+            value = "(float)rand()/(float)RAND_MAX"
+        else:
+            value = f"{instruction.function}({args[0]})"
+        return f"{instruction.dest.name} = new_Number({value});"
+
+    @visitor.when(Box)
+    def visit(self, instruction: Box):
+        return f"{instruction.dest.name} = new_{instruction.dest.type}({instruction.source.name});"
+
+    @visitor.when(Unbox)
+    def visit(self, instruction: Unbox):
+        return f"{instruction.dest.name} = {instruction.source.name}->value;"
+
+    def arguments(self, args, arg_types):
+        return [c_cast(arg_type, arg) for arg, arg_type in zip(args, arg_types)]
+
+    @visitor.when(Call)
+    def visit(self, instruction: Call):
+        args = ", ".join(self.arguments(instruction.args, instruction.arg_types))
+        return f"{instruction.dest.name} = {instruction.function}({args});"
+
+    @visitor.when(MethodCall)
+    def visit(self, instruction: MethodCall):
+        receiver = instruction.receiver.name
+        args = ", ".join([receiver] + self.arguments(instruction.args, instruction.arg_types))
+        return f"{instruction.dest.name} = (({instruction.receiver_type}*){receiver})->{instruction.method}({args});"
+
+    @visitor.when(New)
+    def visit(self, instruction: New):
+        args = ", ".join(self.arguments(instruction.args, instruction.arg_types))
+        return f"{instruction.dest.name} = new_{instruction.type_name}({args});"
+
+    @visitor.when(GetField)
+    def visit(self, instruction: GetField):
+        dest = instruction.dest
+        return f"{dest.name} = ({dest.type}*)(({instruction.obj_type}*){instruction.obj.name})->{instruction.field};"
+
+    @visitor.when(SetField)
+    def visit(self, instruction: SetField):
+        return f"(({instruction.obj_type}*){instruction.obj.name})->{instruction.field} = {c_cast(instruction.field_type, instruction.value)};"
+
+    def type_test(self, value: Temp, types):
+        tests = [f'check_types({value.name}->type,"{type_name}")' for type_name in types]
+        return " || ".join(tests) if tests else "0"
+
+    @visitor.when(TypeTest)
+    def visit(self, instruction: TypeTest):
+        return f"{instruction.dest.name} = new_Boolean({self.type_test(instruction.value, instruction.types)});"
+
+    @visitor.when(Downcast)
+    def visit(self, instruction: Downcast):
+        dest = instruction.dest
+        return f"""if (!({self.type_test(instruction.value, instruction.types)}))
+            {{printf("%s\\n","AS operator could not be done");
+            exit(-1);}}
+{dest.name} = {c_cast(dest.type, instruction.value)};"""
+
+    @visitor.when(PrintValue)
+    def visit(self, instruction: PrintValue):
+        dest = instruction.dest
+        return f"""printf("%s\\n",{instruction.value.name}->string);
+{dest.name} = {c_cast(dest.type, instruction.value)};"""
+
+    @visitor.when(VectorLiteral)
+    def visit(self, instruction: VectorLiteral):
+        dest = instruction.dest
+        size = len(instruction.items)
+        element_type = "float" if instruction.unboxed else "void*"
+        code = f"""memory_usage = memory_usage+(sizeof(Vector)+{size}*sizeof({element_type}));
+if (memory_usage > memory_limit) {{
+    printf("STACK OVERFLOW");
+    exit(-1);
+}}
+{dest.name} = (Vector*)malloc(sizeof(Vector));
+{{
+{element_type}* array = ({element_type}*)malloc({size}*sizeof({element_type}));
+"""
+        for index, item in enumerate(instruction.items):
+            if instruction.unboxed:
+                code += f"array[{index}] = (float){item.name}->value;\n"
+            else:
+                code += f"array[{index}] = {item.name};\n"
+        if instruction.unboxed:
+            kind = "VECTOR_NUMBER" if instruction.unboxed == "Number" else "VECTOR_BOOLEAN"
+            code += f"{dest.name}->data = NULL;\n{dest.name}->values = array;\n{dest.name}->unboxed = {kind};\n"
+        else:
+            code += f"{dest.name}->data = array;\n{dest.name}->values = NULL;\n{dest.name}->unboxed = VECTOR_BOXED;\n"
+        code += f"{dest.name}->len = {size};\n}}"
+        return code
+
+    @visitor.when(VectorGet)
+    def visit(self, instruction: VectorGet):
+        dest = instruction.dest
+        vector = instruction.vector.name
+        index = f"(int){c_value(instruction.index)}"
+        in_bounds = f"{instruction.guard.name} || " if instruction.guard is not None else ""
+        return f"""{{
+int vector_index = {index};
+if (!({in_bounds}(vector_index >= 0 && vector_index < {vector}->len))){{
+    printf("Index out of bounds: %d, length: %d\\n", vector_index, {vector}->len);
+    exit(-1);
+}}
+{dest.name} = ({dest.type}*)vector_get({vector}, vector_index);
+}}"""
+
+    @visitor.when(VectorLength)
+    def visit(self, instruction: VectorLength):
+        return f"{instruction.dest.name} = {instruction.vector.name}->len;"
+
+    @visitor.when(InBounds)
+    def visit(self, instruction: InBounds):
+        fits = "<=" if instruction.op == "<" else "<"
+        return f"{instruction.dest.name} = ({instruction.start.name} > -1) && ({instruction.limit.name} {fits} (float){instruction.vector.name}->len);"
+
+    @visitor.when(NoValue)
+    def visit(self, instruction: NoValue):
+        dest = instruction.dest
+        if dest.type == "Object":
+            return f"""{dest.name} = new_Object();
+strcpy({dest.name}->string, "None");"""
+        return f"""printf("While body not executed,None type does not match {dest.type} type\\n");
+exit(-1);"""
+
+    @visitor.when(Jump)
+    def visit(self, terminator: Jump):
+        return f"goto {terminator.target.label};"
+
+    @visitor.when(Branch)
+    def visit(self, terminator: Branch):
+        return f"if ({c_value(terminator.condition)}) goto {terminator.if_true.label}; else goto {terminator.if_false.label};"
+
+    @visitor.when(Return)
+    def visit(self, terminator: Return):
+        return f"return {c_cast(self.function.return_type, terminator.value)};"
@@ -0,0 +1,118 @@
+from hulk_ir import (
+    IRFunction,
+    Const,
+    Move,
+    Binary,
+    Unary,
+    Box,
+    Unbox,
+    GetField,
+    TypeTest,
+    VectorLength,
+    InBounds,
+    Jump,
+    Branch,
+)
+
+# instrucciones sin efectos: si nadie lee dest se pueden quitar
+PURE = (Const, Move, Binary, Unary, Box, Unbox, GetField, TypeTest, VectorLength, InBounds)
+
+
+def definitions(function: IRFunction):
+    "id de cada Temp -> instrucciones que lo escriben"
+    defined = {}
+    for block in function.blocks:
+        for instruction in block.instructions:
+            if instruction.dest is not None:
+                defined.setdefault(id(instruction.dest), []).append(instruction)
+    return defined
+
+
+def predecessors(function: IRFunction):
+    "label de cada bloque -> cantidad de saltos que llegan a el"
+    count = {block.label: 0 for block in function.blocks}
+    for block in function.blocks:
+        for successor in function.successors(block):
+            count[successor.label] += 1
+    return count
+
+
+def fold_constant_branches(function: IRFunction, state):
+    "if sobre una constante, como el else de un if (su condicion es true): el salto pasa a ser incondicional"
+    defined = definitions(function)
+    folded = 0
+    for block in function.blocks:
+        terminator = block.terminator
+        if type(terminator) is not Branch:
+            continue
+        writes = defined.get(id(terminator.condition), [])
+        if len(writes) != 1 or type(writes[0]) is not Const or writes[0].value not in ["0", "1"]:
+            continue
+        block.terminator = Jump(terminator.if_true if writes[0].value == "1" else terminator.if_false)
+        folded += 1
+    return folded
+
+
+def remove_unreachable_blocks(function: IRFunction, state):
+    reachable = set()
+    stack = [function.blocks[0]]
+    while stack:
+        block = stack.pop()
+        if id(block) in reachable:
+            continue
+        reachable.add(id(block))
+        stack.extend(function.successors(block))
+    before = len(function.blocks)
+    function.blocks = [block for block in function.blocks if id(block) in reachable]
+    return before - len(function.blocks)
+
+
+def merge_blocks(function: IRFunction, state):
+    "un bloque al que solo se llega con un goto desde el anterior se pega al final de ese"
+    merged = 0
+    count = predecessors(function)
+    changed = True
+    while changed:
+        changed = False
+        for block in function.blocks:
+            terminator = block.terminator
+            if type(terminator) is not Jump:
+                continue
+            target = terminator.target
+            # el bloque de entrada es el destino de las llamadas en cola
+            if target is block or target is function.blocks[0] or count[target.label] != 1:
+                continue
+            block.instructions += target.instructions
+            block.terminator = target.terminator
+            function.blocks.remove(target)
+            merged += 1
+            changed = True
+            break
+    return merged
+
+
+def remove_dead_temps(function: IRFunction, state):
+    "quita las instrucciones puras cuyo resultado nadie lee y los Temp que ya no aparecen"
+    removed = 0
+    while True:
+        used = set()
+        for block in function.blocks:
+            for instruction in block.instructions:
+                used |= {id(temp) for temp in instruction.uses()}
+            used |= {id(temp) for temp in block.terminator.uses()}
+        dead = 0
+        for block in function.blocks:
+            alive = [
+                instruction for instruction in block.instructions
+                if not isinstance(instruction, PURE) or id(instruction.dest) in used
+            ]
+            dead += len(block.instructions) - len(alive)
+            block.instructions = alive
+        removed += dead
+        if not dead:
+            break
+    present = used | {id(param) for param in function.params}
+    for block in function.blocks:
+        present |= {id(instruction.dest) for instruction in block.instructions if instruction.dest is not None}
+    function.temps = [temp for temp in function.temps if id(temp) in present]
+    return removed
@@ -0,0 +1,132 @@
+from misc import ast_walk, method_name_getter
+from hulk_ast import (
+    Program,
+    FunctionDef,
+    ExpressionBlock,
+    ID,
+    While,
+    VectorInt,
+    TypeDef,
+    TypeCall,
+    BinOp,
+    Num,
+)
+
+
+class RangeLoop:
+    "un for sobre un objeto nuevo cuyo next/current es un contador: current := current + step; current < limit"
+
+    def __init__(self, type_name, counter, limit, step, op):
+        self.type_name = type_name
+        self.counter = counter
+        self.limit = limit
+        self.step = step
+        self.op = op
+
+
+class VectorLoop:
+    "un for sobre un Vector, se recorre por indice"
+
+
+def single_expression(body):
+    while type(body) is ExpressionBlock and len(body.exp_list) == 1:
+        body = body.exp_list[0]
+    return body
+
+
+def self_field(node):
+    "nombre del atributo si node es self.x"
+    if (
+        type(node) is BinOp
+        and node.op == "."
+        and type(node.left) is ID
+        and node.left.name == "self"
+        and type(node.right) is ID
+    ):
+        return node.right.name
+    return None
+
+
+def find_method(program: Program, type_name, name):
+    "el metodo que ejecuta un objeto de tipo exactamente type_name"
+    while type_name is not None:
+        type_def = program.global_definitions.get(type_name)
+        if type(type_def) is not TypeDef:
+            return None
+        for method in type_def.functions:
+            if method_name_getter(method) == name:
+                return method
+        type_name = program.hierarchy_tree[type_name].parent
+    return None
+
+
+def counter_pattern(program: Program, type_name):
+    """reconoce next(): Boolean => (self.c := self.c + k) < self.m; current() => self.c;
+    devuelve el RangeLoop equivalente o None"""
+    next_def: FunctionDef = find_method(program, type_name, "next/0")
+    current_def: FunctionDef = find_method(program, type_name, "current/0")
+    if next_def is None or current_def is None:
+        return None
+
+    counter = self_field(single_expression(current_def.body))
+    condition = single_expression(next_def.body)
+    if counter is None or type(condition) is not BinOp or condition.op not in ["<", "<="]:
+        return None
+
+    limit = self_field(condition.right)
+    step = single_expression(condition.left)
+    if (
+        limit is None
+        or limit == counter
+        or type(step) is not BinOp
+        or step.op != "AD"
+        or self_field(step.left) != counter
+    ):
+        return None
+
+    increment = step.right
+    if (
+        type(increment) is not BinOp
+        or increment.op != "+"
+        or self_field(increment.left) != counter
+        or type(increment.right) is not Num
+        or float(increment.right.value) <= 0
+    ):
+        return None
+    return RangeLoop(type_name, counter, limit, float(increment.right.value), condition.op)
+
+
+class ForLoopLowering:
+    """marca los while que vienen de un for y las comprensiones que se pueden compilar como un ciclo de C:
+    sobre un Vector por indice y sobre un rango nuevo (new Range(...)) con un contador nativo"""
+
+    def __init__(self):
+        self.program: Program = None
+        self.patterns = {}
+
+    def run(self, program: Program):
+        self.program = program
+        for node in ast_walk(program):
+            if type(node) is While and node.for_let is not None:
+                iterable = node.parent.assign[-1]
+                if iterable.value.static_type != "Vector" and any(
+                    type(item) is ID and item.name == iterable.name.name for item in ast_walk(node.for_let.body)
+                ):
+                    continue
+                node.native_loop = self.lower(iterable.value)
+            elif type(node) is VectorInt:
+                # el iterable de una comprension no tiene nombre, el cuerpo no lo puede ver
+                node.native_loop = self.lower(node.iterable)
+        return program
+
+    def lower(self, iterable):
+        if iterable.static_type == "Vector":
+            # el protocolo next/current no existe en el runtime de Vector, siempre se baja
+            return VectorLoop()
+        if type(iterable) is not TypeCall:
+            # solo un objeto recien creado no puede ser observado desde el cuerpo
+            return None
+        type_name = iterable.static_type
+        if type_name not in self.patterns:
+            self.patterns[type_name] = counter_pattern(self.program, type_name)
+        return self.patterns[type_name]
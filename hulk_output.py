@@ -0,0 +1,103 @@
+import os
+import tempfile
+import shutil
+
+
+class Section:
+    """una parte de out.c que CodeGen va llenando por pedazos con +=, sin volver a copiar lo ya escrito.
+    Cuando lo acumulado pasa de spill_size se vuelca a un archivo temporal, asi la memoria no crece con el programa"""
+
+    def __init__(self, spill_size=1 << 20):
+        self.spill_size = spill_size
+        self.chunks = []
+        self.size = 0
+        self.file = None
+
+    def __iadd__(self, chunk):
+        self.write(chunk)
+        return self
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        if self.size > self.spill_size:
+            self.spill()
+
+    def spill(self):
+        if self.file is None:
+            self.file = tempfile.TemporaryFile("w+")
+        self.file.write("".join(self.chunks))
+        self.chunks = []
+        self.size = 0
+
+    def write_to(self, output):
+        "copia la seccion completa en output"
+        if self.file is not None:
+            self.file.seek(0)
+            shutil.copyfileobj(self.file, output)
+            self.file.close()
+            self.file = None
+        output.write("".join(self.chunks))
+        self.chunks = []
+        self.size = 0
+
+    def __str__(self):
+        if self.file is not None:
+            self.file.seek(0)
+            return self.file.read() + "".join(self.chunks)
+        return "".join(self.chunks)
+
+
+def write_parts(output, parts):
+    "escribe en orden textos y secciones"
+    for part in parts:
+        if isinstance(part, Section):
+            part.write_to(output)
+        else:
+            output.write(part)
+
+
+def write_unit(path, content):
+    "no toca un archivo que no cambio, asi make solo recompila las unidades editadas"
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == content:
+                return
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def makefile(sources, runtime_dir=None):
+    "cada unidad es un objeto aparte, make -j los compila en paralelo; con runtime_dir se enlaza libhulk_runtime.a"
+    objects = " ".join(source[:-2] + ".o" for source in sources)
+    runtime = ""
+    libraries = ""
+    if runtime_dir is not None:
+        runtime = f"""RUNTIME = {runtime_dir}
+override CFLAGS += -I$(RUNTIME)
+"""
+        libraries = " $(RUNTIME)/libhulk_runtime.a"
+    rules = f"""CC ?= gcc
+CFLAGS ?= -O2 -w
+{runtime}LDLIBS = -lm
+OBJECTS = {objects}
+
+program: $(OBJECTS){libraries}
+\t$(CC) $(CFLAGS) -o $@ $(OBJECTS){libraries} $(LDFLAGS) $(LDLIBS)
+
+%.o: %.c hulk.h
+\t$(CC) $(CFLAGS) -c $< -o $@
+"""
+    if runtime_dir is not None:
+        rules += """
+$(RUNTIME)/libhulk_runtime.a: FORCE
+\t$(MAKE) -C $(RUNTIME)
+
+FORCE:
+"""
+    return rules + """
+clean:
+\trm -f $(OBJECTS) program
+
+.PHONY: clean
+"""
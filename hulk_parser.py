@@ -1,5 +1,5 @@
 from traceback import print_tb
-from misc import refact_ast, create_AST_graph, find_column, StringToken
+from misc import refact_ast, number_nodes, create_AST_graph, find_column, StringToken
 
 import hulk_lexer
 from hulk_lexer import lex, tokens
@@ -1575,8 +1575,9 @@ def p_error(p):
     # return tok 
 
 def hulk_parse(code, create_graph = False):
-    "parsea el codigo de hulk, retornando la raiz del ast"
-    nodes = hulk_ast.nodes
+    """parsea el codigo de hulk, retornando la raiz del ast.
+    Con create_graph los nodos se registran con su etiqueta para el grafo, el tercer valor es ese registro"""
+    hulk_ast.registry = {} if create_graph else None
     
     parser = yacc.yacc(start="program", method="LALR")
     pf.parser = parser
@@ -1584,15 +1585,54 @@ def hulk_parse(code, create_graph = False):
     
     errors = []
     if len(sErrorList) == 0:
-        nodes = refact_ast(nodes)
+        refact_ast(AST)
+        number_nodes(AST)
+        nodes = hulk_ast.registry
+        hulk_ast.registry = None
         if create_graph:
             create_AST_graph(nodes, "AST")
         AST.input = code
         return AST, sErrorList, nodes
     else:
-        for i in sErrorList:
-            if i:
-                errors.append(f"Syntax error near '{i.value}' at line {i.lineno}, column {find_column(code,i)}")
-            else:
-                errors.append("Syntax error at EOF")
-        return None, errors, None
\ No newline at end of file
+        hulk_ast.registry = None
+        return None, syntax_errors(code), None
+
+
+def syntax_errors(code):
+    errors = []
+    for i in sErrorList:
+        if i:
+            errors.append(f"Syntax error near '{i.value}' at line {i.lineno}, column {find_column(code,i)}")
+        else:
+            errors.append("Syntax error at EOF")
+    return errors
+
+
+def span_parser():
+    "el primer yacc.yacc del proceso lee las tablas de parsetab.py, despues se reutiliza el mismo parser"
+    if pf.parser is None:
+        pf.parser = yacc.yacc(start="program", method="LALR")
+    return pf.parser
+
+
+def parse_span(code, start, end, lineno):
+    """parsea solo code[start:end], que empieza en la linea lineno, como un programa entero.
+    El lexer recorre code desde start, asi lexpos y lineno de los tokens son los de todo el archivo
+    y find_column sigue funcionando. No corre refact_ast, los errores quedan en sErrorList"""
+    parser = span_parser()
+    lexer.input(code)
+    lexer.lexpos = start
+    lexer.lexlen = end
+    lexer.lineno = lineno
+    lexer.parenthesisCount = 0
+    return parser.parse(lexer=lexer)
+
+
+def parse_whole(code):
+    """hulk_parse de todo el archivo despues de haber parseado pedazos con parse_span:
+    el lexer vuelve a la linea 1 y los errores de los pedazos se olvidan. Devuelve (ast, errores)"""
+    del sErrorList[:]
+    lexer.lineno = 1
+    lexer.parenthesisCount = 0
+    ast, errors, _ = hulk_parse(code)
+    return ast, errors
\ No newline at end of file
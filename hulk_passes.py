@@ -0,0 +1,187 @@
+import time
+from misc import ast_walk
+from hulk_ast import Program, FunctionCall, While, VectorInt, VectorCall
+from hulk_effects import EffectAnalysis
+from hulk_cse import RedundancyElimination
+from hulk_tail_calls import TailCallMarker
+from hulk_loops import ForLoopLowering
+from hulk_bounds import BoundsCheckElimination
+from hulk_tree_shaking import TreeShaking
+from hulk_ir_passes import (
+    fold_constant_branches,
+    remove_unreachable_blocks,
+    merge_blocks,
+    remove_dead_temps,
+)
+
+# una pasada con este nivel solo corre si se pide por nombre
+OPT_IN = None
+
+
+class Pass:
+    """una transformacion registrada en el PassManager: kind 'ast' recibe el Program, kind 'ir' cada IRFunction.
+    run(target, state) devuelve cuantos nodos o instrucciones cambio; state lo comparten todas las pasadas"""
+
+    def __init__(self, name, kind, level, run, requires):
+        self.name = name
+        self.kind = kind
+        self.level = level
+        self.run = run
+        self.requires = requires
+
+
+class PassStats:
+    def __init__(self):
+        self.runs = 0
+        self.seconds = 0.0
+        self.changed = 0
+
+
+class PassManager:
+    """elige las pasadas segun el nivel de optimizacion (0, 1 o 2), agrega las que estas requieren
+    y las corre en el orden de registro, midiendo el tiempo y los cambios de cada una"""
+
+    def __init__(self, level=2, enable=(), disable=()):
+        self.level = level
+        self.enable = set(enable)
+        self.disable = set(disable)
+        self.passes = []
+        self.state = {}
+        self.stats = {}
+
+    def register(self, name, kind, level, run, requires=()):
+        self.passes.append(Pass(name, kind, level, run, list(requires)))
+        return self
+
+    def find(self, name):
+        for registered in self.passes:
+            if registered.name == name:
+                return registered
+        raise ValueError(f"Pass {name} is not registered")
+
+    def pipeline(self, kind=None):
+        "las pasadas seleccionadas y sus dependencias, cada una despues de las que requiere"
+        selected = set()
+        pending = [
+            registered.name for registered in self.passes
+            if registered.name in self.enable
+            or (registered.level is not OPT_IN and registered.level <= self.level and registered.name not in self.disable)
+        ]
+        while pending:
+            name = pending.pop()
+            if name in self.disable:
+                raise ValueError(f"Pass {name} is disabled but another pass requires it")
+            if name in selected:
+                continue
+            selected.add(name)
+            pending.extend(self.find(name).requires)
+
+        ordered = []
+        done = set()
+        visiting = set()
+
+        def place(registered: Pass):
+            if registered.name in done:
+                return
+            if registered.name in visiting:
+                raise ValueError(f"Pass {registered.name} depends on itself")
+            visiting.add(registered.name)
+            for required in registered.requires:
+                place(self.find(required))
+            visiting.remove(registered.name)
+            done.add(registered.name)
+            ordered.append(registered)
+
+        for registered in self.passes:
+            if registered.name in selected:
+                place(registered)
+        return [registered for registered in ordered if kind is None or registered.kind == kind]
+
+    def run(self, registered: Pass, target):
+        stats = self.stats.setdefault(registered.name, PassStats())
+        start = time.perf_counter()
+        changed = registered.run(target, self.state)
+        stats.seconds += time.perf_counter() - start
+        stats.runs += 1
+        stats.changed += changed
+        return target
+
+    def run_ast(self, program: Program):
+        for registered in self.pipeline("ast"):
+            self.run(registered, program)
+        return program
+
+    def run_ir(self, function):
+        for registered in self.pipeline("ir"):
+            self.run(registered, function)
+        return function
+
+    def report(self):
+        lines = [f"{'pass':<24}{'kind':<6}{'runs':>6}{'time (ms)':>12}{'changed':>10}"]
+        for registered in self.pipeline():
+            stats = self.stats.get(registered.name, PassStats())
+            lines.append(
+                f"{registered.name:<24}{registered.kind:<6}{stats.runs:>6}{stats.seconds * 1000:>12.3f}{stats.changed:>10}"
+            )
+        return "\n".join(lines)
+
+
+def count(program: Program, node_type, marked):
+    return sum(1 for node in ast_walk(program) if type(node) is node_type and marked(node))
+
+
+def tree_shaking(program: Program, state):
+    return TreeShaking().run(program)
+
+
+def effect_analysis(program: Program, state):
+    state["effects"] = EffectAnalysis().run(program)
+    return 0
+
+
+def redundancy_elimination(program: Program, state):
+    redundancy = RedundancyElimination(state["effects"])
+    redundancy.run(program)
+    return sum(redundancy.stats.values())
+
+
+def tail_calls(program: Program, state):
+    TailCallMarker().visit(program)
+    return count(program, FunctionCall, lambda node: node.tail_call)
+
+
+def for_loops(program: Program, state):
+    ForLoopLowering().run(program)
+    return count(program, While, lambda node: node.native_loop is not None) + count(
+        program, VectorInt, lambda node: node.native_loop is not None
+    )
+
+
+def bounds_checks(program: Program, state):
+    BoundsCheckElimination().run(program)
+    return count(program, VectorCall, lambda node: node.bounds_guard is not None)
+
+
+def memoize(program: Program, state):
+    for function in program.functions:
+        function.memoized = state["effects"].memoizable(function)
+    return sum(1 for function in program.functions if function.memoized)
+
+
+def standard_passes(level=2, enable=(), disable=()):
+    "el pipeline de CodeGen: -O0 solo lo necesario, -O1 agrega las pasadas baratas, -O2 todas; memoize hay que pedirla"
+    return (
+        PassManager(level, enable, disable)
+        .register("tree-shaking", "ast", 1, tree_shaking)
+        .register("effects", "ast", 2, effect_analysis)
+        .register("redundancy", "ast", 2, redundancy_elimination, requires=["effects"])
+        .register("tail-calls", "ast", 1, tail_calls)
+        # los Vector no tienen next() ni current() en el runtime, sus for siempre se bajan
+        .register("for-loops", "ast", 0, for_loops)
+        .register("bounds-checks", "ast", 2, bounds_checks, requires=["for-loops"])
+        .register("memoize", "ast", OPT_IN, memoize, requires=["effects"])
+        .register("constant-branches", "ir", 1, fold_constant_branches)
+        .register("unreachable-blocks", "ir", 1, remove_unreachable_blocks)
+        .register("merge-blocks", "ir", 1, merge_blocks, requires=["unreachable-blocks"])
+        .register("dead-temps", "ir", 2, remove_dead_temps)
+    )
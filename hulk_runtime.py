@@ -0,0 +1,30 @@
+import os
+import subprocess
+
+# el runtime de C que usa el codigo generado esta en runtime/: hulk_runtime.h, hulk_runtime.c, hulk_vector.c y hulk_memo.c.
+# Se puede copiar dentro de cada programa (solo las partes que usa) o compilar una vez como libhulk_runtime.a y enlazarlo
+RUNTIME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runtime")
+RUNTIME_LIBRARY = os.path.join(RUNTIME_DIR, "libhulk_runtime.a")
+RUNTIME_INCLUDE = '#include "hulk_runtime.h"\n'
+
+
+def read(name):
+    with open(os.path.join(RUNTIME_DIR, name)) as f:
+        return f.read()
+
+
+def source(name):
+    "un .c del runtime sin su #include, para pegarlo despues del encabezado"
+    return read(name).replace(RUNTIME_INCLUDE, "", 1)
+
+
+RUNTIME_HEADER = read("hulk_runtime.h")
+RUNTIME_SOURCE = source("hulk_runtime.c")
+VECTOR_SOURCE = source("hulk_vector.c")
+MEMO_SOURCE = source("hulk_memo.c")
+
+
+def build_runtime():
+    "compila libhulk_runtime.a si no existe o si cambio alguna fuente del runtime, devuelve su ruta"
+    subprocess.run(["make", "-s", "-C", RUNTIME_DIR], check=True)
+    return RUNTIME_LIBRARY
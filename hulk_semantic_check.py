@@ -15,15 +15,20 @@ from misc import (
     assign_name_getter,
     typeof,
     create_Hierarchy_graph,
-    func_conforms
+    func_conforms,
+    ast_walk,
 )
+import copy
 import io
+import multiprocessing
+import pickle
 
 # endregion
 
 import visitor
 
 from hulk_ast import (
+    Node,
     Program,
     FunctionDef,
     FunctionCall,
@@ -88,7 +93,7 @@ class ScopeBuilder:
         for function in node.functions:
             function: FunctionDef
             function.variable_scope = node.variable_scope
-            self.visit(function)
+            yield function
         self.on_function = False
 
         self.on_type = True
@@ -96,7 +101,7 @@ class ScopeBuilder:
             if not type_str in ["Number", "String", "Boolean", "Vector"]:
                 node.global_definitions[type_str].variable_scope = node.variable_scope
                 self.current = type_str
-                self.visit(node.global_definitions[type_str])
+                yield node.global_definitions[type_str]
         self.current = ""
         self.on_type = False
     
@@ -104,12 +109,12 @@ class ScopeBuilder:
         for protocol in node.protocol_hierarchy["Empty"].children:
             node.global_definitions[protocol].variable_scope = node.variable_scope
             self.current = protocol
-            self.visit(node.global_definitions[protocol])
+            yield node.global_definitions[protocol]
         self.current = ""
 
         if node.global_exp:
             node.global_exp.variable_scope = node.variable_scope
-            self.visit(node.global_exp)
+            yield node.global_exp
         else:
             self.errors.append(("Missing Global Expression"))
 
@@ -127,7 +132,7 @@ class ScopeBuilder:
         for child in node.protocol_hierarchy[node.id.name].children:
             node.global_definitions[child].variable_scope = node.variable_scope
             self.current = child
-            self.visit(node.global_definitions[child])
+            yield node.global_definitions[child]
         
         
     @visitor.when(TypeDef)
@@ -143,7 +148,7 @@ class ScopeBuilder:
 
         if node.inherits:
             node.inherits.variable_scope = node.variable_scope.copy()
-            self.visit(node.inherits)
+            yield node.inherits
 
         for assign in node.variables:
             assign: Assign
@@ -171,7 +176,7 @@ class ScopeBuilder:
         for assign in node.variables:
             assign: Assign
             assign.variable_scope = node.variable_scope
-            self.visit(assign)
+            yield assign
         
         functions_scope = node.variable_scope.copy()
         for key in functions_scope.copy():
@@ -193,13 +198,13 @@ class ScopeBuilder:
                     method.variable_scope["base/"+str(len(method.params.param_list))] = node.global_definitions[
                         node.inherits.id.name
                     ].variable_scope[method_name]
-            self.visit(method)
+            yield method
         self.on_function = False
 
         for child in node.hierarchy_tree[node.id.name].children:
             node.global_definitions[child].variable_scope = node.variable_scope
             self.current = child
-            self.visit(node.global_definitions[child])
+            yield node.global_definitions[child]
             
         for method in node.functions:
             method: FunctionDef
@@ -218,37 +223,37 @@ class ScopeBuilder:
             node.variable_scope[param.name] = param
         self.check_params_different(node.params)
         node.body.variable_scope = node.variable_scope
-        self.visit(node.body)
+        yield node.body
 
     @visitor.when(Print)
     def visit(self, node: Print):
         node.value.variable_scope = node.variable_scope
-        self.visit(node.value)
+        yield node.value
 
     @visitor.when(Sqrt)
     def visit(self, node: Sqrt):
         node.value.variable_scope = node.variable_scope
-        self.visit(node.value)
+        yield node.value
 
     @visitor.when(Sin)
     def visit(self, node: Sin):
         node.value.variable_scope = node.variable_scope
-        self.visit(node.value)
+        yield node.value
 
     @visitor.when(Cos)
     def visit(self, node: Cos):
         node.value.variable_scope = node.variable_scope
-        self.visit(node.value)
+        yield node.value
 
     @visitor.when(Exp)
     def visit(self, node: Exp):
         node.value.variable_scope = node.variable_scope
-        self.visit(node.value)
+        yield node.value
 
     @visitor.when(Log)
     def visit(self, node: Log):
         node.value.variable_scope = node.variable_scope
-        self.visit(node.value)
+        yield node.value
 
     @visitor.when(ID)
     def visit(self, node: ID):
@@ -264,12 +269,12 @@ class ScopeBuilder:
     def visit(self, node: Params):
         for param in node.param_list:
             param.variable_scope = node.variable_scope
-            self.visit(param)
+            yield param
 
     @visitor.when(UnaryOp)
     def visit(self, node: UnaryOp):
         node.operand.variable_scope = node.variable_scope
-        self.visit(node.operand)
+        yield node.operand
 
     @visitor.when(BinOp)
     def visit(self, node: BinOp):
@@ -295,21 +300,21 @@ class ScopeBuilder:
             "@@",
         ]:
             node.left.variable_scope = node.variable_scope
-            self.visit(node.left)
+            yield node.left
             node.right.variable_scope = node.variable_scope
-            self.visit(node.right)
+            yield node.right
 
         elif node.op == ".":
             node.left.variable_scope = node.variable_scope
-            self.visit(node.left)
+            yield node.left
             if self.on_type and self.on_function:
                 if type(node.right) is FunctionCall:
                     node.right.params.variable_scope = node.variable_scope
-                    self.visit(node.right.params)
+                    yield node.right.params
             else:
                 if type(node.right) is FunctionCall:
                     node.right.params.variable_scope = node.variable_scope
-                    self.visit(node.right.params)
+                    yield node.right.params
                 else:
                     self.errors.append(
                         "Invalid access to private member '"
@@ -326,40 +331,37 @@ class ScopeBuilder:
                     + self.cf.add_line_column(node.right.name)
                 )
             node.left.variable_scope = node.variable_scope
-            self.visit(node.left)
+            yield node.left
         else:
             node.right.variable_scope = node.variable_scope
-            self.visit(node.right)
+            yield node.right
 
 
     @visitor.when(VectorExt)
     def visit(self, node: VectorExt):
-        self.errors.append("Not implemented VECTOR_EXT"+self.cf.add_line_column(node.tk))
         for item in node.items.param_list:
             item.variable_scope = node.variable_scope
-            self.visit(item)
+            yield item
 
     @visitor.when(VectorInt)
     def visit(self, node: VectorInt):
-        self.errors.append("Not implemented VECTOR_INT"+self.cf.add_line_column(node.tk))
         node.variable_scope = node.variable_scope.copy()
 
         node.iterable.variable_scope = node.variable_scope
-        self.visit(node.iterable)
+        yield node.iterable
 
         node.variable_scope[node.iterator.name] = node.iterator
 
         node.expression.variable_scope = node.variable_scope
-        self.visit(node.expression)
+        yield node.expression
 
     @visitor.when(VectorCall)
     def visit(self, node: VectorCall):
-        self.errors.append("Not implemented VECTOR_CALL"+self.cf.add_line_column(node.tk))
         node.id.variable_scope = node.variable_scope
-        self.visit(node.id)
+        yield node.id
 
         node.index.variable_scope = node.variable_scope
-        self.visit(node.index)
+        yield node.index
 
     @visitor.when(FunctionCall)
     def visit(self, node: FunctionCall):
@@ -388,7 +390,7 @@ class ScopeBuilder:
                         + self.cf.add_line_column(node.func_id.name)
                     )
         node.params.variable_scope = node.variable_scope
-        self.visit(node.params)
+        yield node.params
 
     @visitor.when(TypeCall)
     def visit(self, node: TypeCall):
@@ -407,7 +409,7 @@ class ScopeBuilder:
                     + self.cf.add_line_column(node.id.name)
                 )
             node.params.variable_scope = node.variable_scope
-            self.visit(node.params)
+            yield node.params
         else:
             self.errors.append("Type " + node.id.name + " not defined")
 
@@ -415,44 +417,44 @@ class ScopeBuilder:
     def visit(self, node: ExpressionBlock):
         for exp in node.exp_list:
             exp.variable_scope = node.variable_scope
-            self.visit(exp)
+            yield exp
 
     @visitor.when(Assign)
     def visit(self, node: Assign):
         self.check_annotation(node.name)
         node.value.variable_scope = node.variable_scope
-        self.visit(node.value)
+        yield node.value
 
     @visitor.when(If)
     def visit(self, node: If):
         for case_item in node.case_list:
             case_item.variable_scope = node.variable_scope
-            self.visit(case_item)
+            yield case_item
 
     @visitor.when(While)
     def visit(self, node: While):
         node.condition.variable_scope = node.variable_scope
-        self.visit(node.condition)
+        yield node.condition
         node.body.variable_scope = node.variable_scope
-        self.visit(node.body)
+        yield node.body
 
     @visitor.when(Case)
     def visit(self, node: Case):
         node.condition.variable_scope = node.variable_scope
-        self.visit(node.condition)
+        yield node.condition
         node.body.variable_scope = node.variable_scope
-        self.visit(node.body)
+        yield node.body
 
     @visitor.when(Let)
     def visit(self, node: Let):
         node.assign[0].variable_scope = node.variable_scope
-        self.visit(node.assign[0])
+        yield node.assign[0]
         node.variable_scope = node.variable_scope.copy()
         assig_name = assign_name_getter(node.assign[0])
         node.variable_scope[assig_name] = node.assign[0].name
 
         node.body.variable_scope = node.variable_scope
-        self.visit(node.body)
+        yield node.body
 
     def get_global_definitions(self, ast_input: Program):
         ast_input.global_definitions["Object"] = "void"
@@ -629,8 +631,15 @@ class ScopeBuilder:
             prms.add(param.name)
 
     def trasspass_params_to_children(self, ast: Program, name: str, visited):
+        "en preorden con una pila, la jerarquia puede ser muy profunda"
         forb = ["Object", "String", "Number", "Boolean", "Vector"]
+        stack = [name]
+        while stack:
+            name = stack.pop()
+            self.trasspass_params_to_type(ast, name, visited, forb)
+            stack.extend(reversed(ast.hierarchy_tree[name].children))
 
+    def trasspass_params_to_type(self, ast: Program, name: str, visited, forb):
         if name in visited:
             self.errors.append(
                 "Error in type definition: "
@@ -658,9 +667,6 @@ class ScopeBuilder:
                         new_params.append(ID(i.name, ""))
                     child_inst.inherits.params.param_list = new_params
 
-        for child in ast.hierarchy_tree[name].children:
-            self.trasspass_params_to_children(ast, child, visited)
-
 
 class TypeInfChk:
     def __init__(self) -> None:
@@ -679,6 +685,20 @@ class TypeInfChk:
 
     @visitor.when(Program)
     def visit(self, node: Program):
+        self.signatures(node)
+        if not infers_return_types(node):
+            # ninguna llamada necesita el cuerpo de la funcion: cada una se chequea una vez, en su unidad, como en el pool
+            self.visited_functions = {function.func_id.name for function in node.functions}
+        for type_str in type_roots(node):
+            self.check_type(node, type_str)
+        for function in node.functions:
+            self.check_function(node, function)
+
+        yield node.global_exp
+        node.static_type = node.global_exp.static_type
+
+    def signatures(self, node: Program):
+        "los tipos de los parametros de tipos y funciones y lo que devuelven las funciones, antes de mirar los cuerpos"
         if node.types:
             for typex in node.types:
                 typex : TypeDef
@@ -699,24 +719,25 @@ class TypeInfChk:
                 if function.func_id.annotated_type != ""
                 else "Object"
             )
-            
+            for param in function.params.param_list:
+                param: ID
+                param.static_type = (
+                    param.annotated_type if param.annotated_type != "" else "Object"
+                )
+
+    def check_type(self, node: Program, type_str):
+        "chequea el tipo y, dentro de su visita, todos sus descendientes"
         self.on_type = True
-        for type_str in node.hierarchy_tree["Object"].children:
-            if not type_str in ["Number", "String", "Boolean", "Vector"]:
-                self.current = type_str
-                self.visit(node.global_definitions[type_str])
+        self.current = type_str
+        self.visit(node.global_definitions[type_str])
         self.current = ""
         self.on_type = False
-        
-        for function in node.functions:
-            function: FunctionDef
-            func_expect = function.static_type
-            self.visit(function)
-            if not conforms(node, function.static_type, func_expect):
-                self.errors.append(f"Function '{function.func_id.name}' with annotated type '{func_expect}' returns expresion type '{function.static_type} '")
 
-        self.visit(node.global_exp)
-        node.static_type = node.global_exp.static_type
+    def check_function(self, node: Program, function: FunctionDef):
+        func_expect = function.static_type
+        self.visit(function)
+        if not conforms(node, function.static_type, func_expect):
+            self.errors.append(f"Function '{function.func_id.name}' with annotated type '{func_expect}' returns expresion type '{function.static_type} '")
 
     @visitor.when(TypeDef)
     def visit(self, node: TypeDef):
@@ -727,16 +748,16 @@ class TypeInfChk:
                 self.errors.append(f"Param '{param.name}' in type '{node.id.name}' is a protocol"+self.cf.add_line_column(param.name))
         
         if node.inherits:
-            self.visit(node.inherits)
+            yield node.inherits
 
         for assign in node.variables:
             assign: Assign
-            self.visit(assign)
+            yield assign
 
         self.on_function = True
         for method in node.functions:
             method: FunctionDef
-            self.visit(method)
+            yield method
             if node.inherits:
                 method_name = method_name_getter(method, True)
                 if method_name in node.global_definitions[node.inherits.id.name].variable_scope:
@@ -746,13 +767,13 @@ class TypeInfChk:
 
         for child in node.hierarchy_tree[node.id.name].children:
             self.current = child
-            self.visit(node.global_definitions[child])
+            yield node.global_definitions[child]
 
     @visitor.when(FunctionCall)
     def visit(self, node: FunctionCall):
         if node.func_id.name not in self.visited_functions:
             nmm = method_name_getter(node, False)
-            self.visit(node.global_definitions[nmm])
+            yield node.global_definitions[nmm]
         name = method_name_getter(node, False)
         func_def : FunctionDef = None
         if self.on_type and self.on_function:
@@ -777,7 +798,7 @@ class TypeInfChk:
             ):
                 expect = e_param.static_type
                 node.param_types.append(expect)
-                self.visit(r_param)
+                yield r_param
                 if not conforms(node, r_param.static_type, expect):
                     self.errors.append(
                         f"Function '{node.func_id.name}' param '{e_param.name}' expected '{expect}', but received '{r_param.static_type}'"
@@ -799,7 +820,7 @@ class TypeInfChk:
                 self.errors.append(f"Param '{param.name}' in function '{node.func_id.name}' is a protocol"+self.cf.add_line_column(param.name))
 
         expect = node.static_type
-        self.visit(node.body)
+        yield node.body
         if not conforms(node, node.body.static_type, expect):
             self.errors.append(
                 f"Function '{node.func_id.name}' expect return type '{expect}', but its body returns {node.body.static_type}"
@@ -813,14 +834,14 @@ class TypeInfChk:
 
     @visitor.when(Let)
     def visit(self, node: Let):
-        self.visit(node.assign[0])
-        self.visit(node.body)
+        yield node.assign[0]
+        yield node.body
         node.static_type = node.body.static_type
 
     @visitor.when(ExpressionBlock)
     def visit(self, node: ExpressionBlock):
         for exp in node.exp_list:
-            self.visit(exp)
+            yield exp
         if len(node.exp_list)>0:
             node.static_type = node.exp_list[-1].static_type
         else:
@@ -831,36 +852,36 @@ class TypeInfChk:
         case_types = []
         for case in node.case_list:
             case: Case
-            self.visit(case)
+            yield case
             case_types.append(case.static_type)
         node.static_type = LCA(node, *case_types)
 
     @visitor.when(While)
     def visit(self, node: While):
         condition_expect = "Boolean"
-        self.visit(node.condition)
+        yield node.condition
         if not conforms(node, node.condition.static_type, condition_expect):
             self.errors.append(f"Condition of while returned {node.condition.static_type} while expecting {condition_expect}"+self.cf.add_line_column(node.tk))
 
-        self.visit(node.body)
+        yield node.body
         node.static_type = node.body.static_type
         
     @visitor.when(Case)
     def visit(self, node: Case):
         condition_expect = "Boolean"
-        self.visit(node.condition)
+        yield node.condition
         if not conforms(node, node.condition.static_type, condition_expect):
             self.errors.append(
                 f"Expected 'Boolean' at '{node.branch}' but received '{node.condition.static_type}'"
                 + self.cf.add_line_column(node.branch)
             )
-        self.visit(node.body)
+        yield node.body
         node.static_type = node.body.static_type
 
     @visitor.when(Assign)
     def visit(self, node: Assign):
         expect = None if node.name.annotated_type == "" else node.name.annotated_type
-        self.visit(node.value)
+        yield node.value
         if expect:
             if not conforms(node, node.value.static_type, expect):
                 self.errors.append(
@@ -916,7 +937,7 @@ class TypeInfChk:
     ):
             expect = e_param.static_type
             node.param_types.append(expect)
-            self.visit(r_param)
+            yield r_param
             if not conforms(node, r_param.static_type, expect):
                 self.errors.append(
                     f"Function '{node.func_id.name}' param '{e_param.name}' expected '{expect}', but received '{r_param.static_type}'"
@@ -925,7 +946,7 @@ class TypeInfChk:
 
     @visitor.when(UnaryOp)
     def visit(self, node: UnaryOp):
-        self.visit(node.operand)
+        yield node.operand
         expect = "Boolean" if node.op == "!" else "Number"
         if not conforms(node, node.operand.static_type, expect):
             self.errors.append(
@@ -936,13 +957,13 @@ class TypeInfChk:
 
     @visitor.when(Print)
     def visit(self, node: Print):
-        self.visit(node.value)
+        yield node.value
         node.static_type = "Object"
 
     @visitor.when(Exp)
     def visit(self, node: Exp):
         expect = "Number"
-        self.visit(node.value)
+        yield node.value
         if not conforms(node, node.value.static_type, expect):
             self.errors.append(
                 f"EXP operation expect 'Number' argument, but received '{node.value.static_type}'"+self.cf.add_line_column(node.tk)
@@ -952,7 +973,7 @@ class TypeInfChk:
     @visitor.when(Sqrt)
     def visit(self, node: Sqrt):
         expect = "Number"
-        self.visit(node.value)
+        yield node.value
         if not conforms(node, node.value.static_type, expect):
             self.errors.append(
                 f"SQRT operation expect 'Number' argument, but received '{node.value.static_type}'"+self.cf.add_line_column(node.tk)
@@ -962,7 +983,7 @@ class TypeInfChk:
     @visitor.when(Sin)
     def visit(self, node: Sin):
         expect = "Number"
-        self.visit(node.value)
+        yield node.value
         if not conforms(node, node.value.static_type, expect):
             self.errors.append(
                 f"SIN operation expect 'Number' argument, but received '{node.value.static_type}'"+self.cf.add_line_column(node.tk)
@@ -972,7 +993,7 @@ class TypeInfChk:
     @visitor.when(Cos)
     def visit(self, node: Cos):
         expect = "Number"
-        self.visit(node.value)
+        yield node.value
         if not conforms(node, node.value.static_type, expect):
             self.errors.append(
                 f"COS operation expect 'Number' argument, but received '{node.value.static_type}'"+self.cf.add_line_column(node.tk)
@@ -982,8 +1003,8 @@ class TypeInfChk:
     @visitor.when(Log)
     def visit(self, node: Log):
         expect = "Number"
-        self.visit(node.base)
-        self.visit(node.value)
+        yield node.base
+        yield node.value
         if not (
             conforms(node, node.value.static_type, expect)
             and conforms(node, node.base.static_type, expect)
@@ -995,7 +1016,7 @@ class TypeInfChk:
     
     @visitor.when(VectorCall)
     def visit(self, node: VectorCall):
-        self.visit(node.id)
+        yield node.id
         node.static_type = node.id.static_type
         if node.static_type != "Vector":
             self.errors.append(
@@ -1004,26 +1025,28 @@ class TypeInfChk:
             )
         if node.static_type == "Vector":
             node.static_type = node.id.static_type.T
-        self.visit(node.index)
+        yield node.index
         if node.index.static_type != "Number":
             self.errors.append("Index of Vector call must be 'Number'"+self.cf.add_line_column(node.tk))
 
     @visitor.when(VectorInt)
     def visit(self, node: VectorInt):
         iter_expect = "Iterable"
-        self.visit(node.iterable)
+        yield node.iterable
         if not conforms(node, node.iterable.static_type, iter_expect):
             self.errors.append(f"Iterable {node.iterator.name} must be 'Iterable'"+self.cf.add_line_column(node.iterator.name)
                         )
         node.static_type = StringToken("Vector")
         
         binop = BinOp(node.iterable, ".", FunctionCall(ID("current", ""),Params([])))
-        self.visit(binop)
+        binop.parent = node
+        binop.right.parent = binop
+        yield binop
         
         range_value = binop.static_type
         
         node.iterator.static_type = range_value
-        self.visit(node.expression)
+        yield node.expression
         T = node.expression.static_type
         node.static_type.T = T
         
@@ -1031,7 +1054,7 @@ class TypeInfChk:
     def visit(self, node: VectorExt):
         typs = []
         for item in node.items.param_list:
-            self.visit(item)
+            yield item
             typs.append(item.static_type)
 
         # [[[1]],[[2]],[[4]]]
@@ -1064,8 +1087,8 @@ class TypeInfChk:
                 expect = ("Object", "Object")
                 expect_return = "String"
 
-            self.visit(node.left)
-            self.visit(node.right)
+            yield node.left
+            yield node.right
 
             if not (
                 conforms(node, node.left.static_type, expect[0])
@@ -1078,7 +1101,7 @@ class TypeInfChk:
             node.static_type = expect_return
 
         elif node.op in ["as", "is"]:
-            self.visit(node.left)
+            yield node.left
             expect = node.right.name
             # if not conforms(
             #     node, node.left.static_type, expect
@@ -1095,9 +1118,9 @@ class TypeInfChk:
             node.static_type = expect
 
         elif node.op == "AD":
-            self.visit(node.left)
+            yield node.left
             expect = node.left.static_type
-            self.visit(node.right)
+            yield node.right
             if not conforms(node, node.right.static_type, expect):
                 self.errors.append(
                     f"Cannot ':=' '{node.right.static_type}' to item with type '{expect}'"
@@ -1107,15 +1130,15 @@ class TypeInfChk:
             node.static_type = expect
 
         elif node.op == ".":
-            self.visit(node.left)
+            yield node.left
             context_from = node.left.static_type
             
             if context_from in set(node.global_definitions).difference(
                 set(["Number", "Boolean", "String", "Object"])
             ):
                 if context_from == "Vector":
-                    nn = FunctionDef(ID("next",""),Params([]), None)
-                    cc = FunctionDef(ID("current",""),Params([]), None)
+                    nn = FunctionDef(ID("next","Boolean"),Params([]), None)
+                    cc = FunctionDef(ID("current",node.left.static_type.T),Params([]), None)
                     nn.static_type = "Boolean"
                     cc.static_type = node.left.static_type.T
                     context = {
@@ -1140,7 +1163,7 @@ class TypeInfChk:
                 if name in context:
                     node.static_type = context[name].static_type
                     if type(node.right) is FunctionCall:
-                        function_definition:FunctionDef = node.global_definitions[context_from].variable_scope[name]
+                        function_definition:FunctionDef = context[name]
                         self.on_function = True
                         function_definition.static_type = (
                         function_definition.func_id.annotated_type
@@ -1159,7 +1182,7 @@ class TypeInfChk:
                         ):
                             expect = e_param.static_type
                             node.right.param_types.append(expect)
-                            self.visit(r_param)
+                            yield r_param
                             if not conforms(node, r_param.static_type, expect):
                                 self.errors.append(
                                     f"Function '{node.right.func_id.name}' param '{e_param.name}' expected '{expect}', but received '{r_param.static_type}'"
@@ -1183,13 +1206,134 @@ class TypeInfChk:
                     + self.cf.add_line_column(node.op)
                 )
             try:
-                node.right.static_type = node.global_definitions[context_from].variable_scope[name].static_type  
+                node.right.static_type = context[name].static_type
             except:
-                self.errors.append("ERROR DE DICCIONARIO"+self.add_line_column(node.op))
+                self.errors.append("ERROR DE DICCIONARIO"+self.cf.add_line_column(node.op))
             node.static_type = node.right.static_type
 
 
-def semantic_check(ast: Program, code):
+def type_roots(node: Program):
+    "los tipos que heredan directamente de Object; la visita de cada uno recorre sus descendientes"
+    return [
+        type_str for type_str in node.hierarchy_tree["Object"].children
+        if not type_str in ["Number", "String", "Boolean", "Vector"]
+    ]
+
+
+def type_subtree(node: Program, type_str):
+    "el tipo y sus descendientes en preorden"
+    found = []
+    stack = [type_str]
+    while stack:
+        type_str = stack.pop()
+        found.append(node.global_definitions[type_str])
+        stack.extend(reversed(node.hierarchy_tree[type_str].children))
+    return found
+
+
+# lo que chequean los procesos del pool: se arma antes de crearlo y los procesos lo heredan con fork
+parallel_ast = None
+parallel_units = []
+parallel_column_finder = None
+
+
+def check_units(ast: Program):
+    """cada tipo que hereda de Object con sus descendientes, cada funcion global y la expresion global,
+    en el orden en que los chequea TypeInfChk"""
+    return (
+        [("type", type_str) for type_str in type_roots(ast)]
+        + [("function", function) for function in ast.functions]
+        + [("global", ast.global_exp)]
+    )
+
+
+def attributes(node):
+    """los atributos con valor de un nodo, lo mismo que guarda pickle: los slots y el __dict__ si se creo.
+    Sin program_context, que es el del Program y cada proceso lo busca solo (ver Node.context)"""
+    state = node.__reduce_ex__(pickle.HIGHEST_PROTOCOL)[2]
+    found = {}
+    for part in state if type(state) is tuple else [state]:
+        if part:
+            found.update(part)
+    found.pop("program_context", None)
+    return found
+
+
+def snapshot(node):
+    "los atributos del nodo, con copia de las listas y diccionarios que el chequeo puede llenar sin reemplazarlos"
+    return {
+        name: copy.copy(value) if type(value) in [list, dict, set] else value for name, value in attributes(node).items()
+    }
+
+
+def changes(node, before):
+    """los atributos que el chequeo le puso o cambio al nodo. Se copian al ast del proceso principal;
+    un nodo no se puede copiar asi, seria otro objeto y no el de ese ast"""
+    changed = {}
+    for name, value in attributes(node).items():
+        if name in before and (before[name] is value or before[name] == value):
+            continue
+        for item in value.values() if type(value) is dict else value if type(value) in [list, tuple, set] else [value]:
+            if isinstance(item, Node):
+                raise TypeError(f"{type(node).__name__}.{name} points to a node, it can't be copied from a worker")
+        changed[name] = value
+    return changed
+
+
+def check_unit(index):
+    """chequea una unidad con las firmas ya puestas y sin visitar el cuerpo de otras funciones (cada una se
+    chequea en su unidad). Devuelve los errores y, en el orden de ast_walk, los atributos que el chequeo
+    le puso o cambio a cada nodo de la unidad"""
+    kind, value = parallel_units[index]
+    roots = type_subtree(parallel_ast, value) if kind == "type" else [value]
+    nodes = [item for root in roots for item in ast_walk(root)]
+    before = [snapshot(item) for item in nodes]
+    type_chk = TypeInfChk()
+    type_chk.cf = parallel_column_finder
+    type_chk.visited_functions = {function.func_id.name for function in parallel_ast.functions}
+    if kind == "type":
+        type_chk.check_type(parallel_ast, value)
+    elif kind == "function":
+        type_chk.check_function(parallel_ast, value)
+    else:
+        type_chk.visit(value)
+    return type_chk.errors, [changes(item, state) for item, state in zip(nodes, before)]
+
+
+def parallel_type_check(ast: Program, column_finder, workers):
+    """TypeInfChk repartido en un pool de procesos: las firmas se ponen aqui y cada proceso chequea los cuerpos
+    de sus unidades. Todo lo que el chequeo le pone a los nodos de cada unidad se copia al ast de este proceso
+    y los errores quedan en el orden de las unidades, sin importar cuantos procesos haya"""
+    global parallel_ast, parallel_units, parallel_column_finder
+    TypeInfChk().signatures(ast)
+    parallel_ast, parallel_units, parallel_column_finder = ast, check_units(ast), column_finder
+    try:
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            chunksize = max(1, len(parallel_units) // (workers * 4))
+            results = pool.map(check_unit, range(len(parallel_units)), chunksize)
+    finally:
+        units = parallel_units
+        parallel_ast, parallel_units, parallel_column_finder = None, [], None
+    errors = []
+    for (kind, value), (unit_errors, annotations) in zip(units, results):
+        errors.extend(unit_errors)
+        roots = type_subtree(ast, value) if kind == "type" else [value]
+        for item, changed in zip((item for root in roots for item in ast_walk(root)), annotations):
+            for name, attribute in changed.items():
+                setattr(item, name, attribute)
+    ast.static_type = ast.global_exp.static_type
+    return errors
+
+
+def infers_return_types(ast: Program):
+    "si alguna funcion o metodo anotado None toma su tipo del cuerpo"
+    methods = [method for type_def in ast.types for method in type_def.functions]
+    return any(function.func_id.annotated_type == "None" for function in ast.functions + methods)
+
+
+def semantic_check(ast: Program, code, workers=1):
+    """con workers > 1 los cuerpos de tipos y funciones se chequean en un pool de procesos (ver parallel_type_check);
+    solo si ninguna funcion infiere lo que devuelve de su cuerpo, que las demas unidades necesitarian"""
     errors = []
     column_finder = ColumnFinder()
     column_finder.code = code
@@ -1198,10 +1342,13 @@ def semantic_check(ast: Program, code):
     scope_visitor.visit(ast)
     errors.extend(scope_visitor.errors)
     if len(errors) == 0:
+        if workers > 1 and not infers_return_types(ast):
+            errors.extend(parallel_type_check(ast, column_finder, workers))
+            return ast, errors
         type_chk = TypeInfChk()
         type_chk.sb = scope_visitor
         type_chk.cf = column_finder
         type_chk.visit(ast)
         errors.extend(type_chk.errors)
 
-    return ast, errors
\ No newline at end of file
+    return ast, errors
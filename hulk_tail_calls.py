@@ -0,0 +1,98 @@
+import visitor
+from misc import get_descendancy_set, method_name_getter
+from hulk_ast import (
+    Program,
+    FunctionDef,
+    FunctionCall,
+    ExpressionBlock,
+    Let,
+    ID,
+    If,
+    TypeDef,
+    BinOp,
+)
+
+
+class TailCallMarker:
+    """marca las llamadas recursivas directas en posicion de cola para que CodeGen las convierta en ciclos.
+    el ciclo no apila marcos, pero cada vuelta sigue creando cajas para los argumentos y las comparaciones,
+    y esas cuentan para memory_limit: la profundidad sigue limitada, a unas 10000 vueltas en vez de 5000"""
+
+    def __init__(self):
+        self.current: FunctionDef = None
+        self.on_type: TypeDef = None
+
+    @visitor.on("node")
+    def visit(self, node):
+        pass
+
+    @visitor.when(Program)
+    def visit(self, node: Program):
+        for function in node.functions:
+            self.on_type = None
+            self.mark(function)
+
+        for type_def in node.types:
+            type_def: TypeDef
+            for method in type_def.functions:
+                # self.m(...) se despacha dinamicamente, solo es seguro si ningun descendiente redefine m
+                if self.overridden(node, type_def, method):
+                    continue
+                self.on_type = type_def
+                self.mark(method)
+        self.on_type = None
+        self.current = None
+
+    def mark(self, function: FunctionDef):
+        self.current = function
+        self.visit(function.body)
+
+    def overridden(self, program: Program, type_def: TypeDef, method: FunctionDef):
+        name = method_name_getter(method)
+        for desc in get_descendancy_set(program, type_def.id.name, set()):
+            if desc == type_def.id.name:
+                continue
+            for own_method in program.global_definitions[desc].functions:
+                if method_name_getter(own_method) == name:
+                    return True
+        return False
+
+    def is_self_call(self, call: FunctionCall):
+        return (
+            call.func_id.name == self.current.func_id.name
+            and len(call.params.param_list) == len(self.current.params.param_list)
+        )
+
+    @visitor.when(FunctionCall)
+    def visit(self, node: FunctionCall):
+        # dentro de un metodo una llamada sin receptor es a una funcion global
+        if self.on_type is None and self.is_self_call(node):
+            node.tail_call = True
+            self.current.tail_recursive = True
+
+    @visitor.when(BinOp)
+    def visit(self, node: BinOp):
+        if (
+            node.op == "."
+            and self.on_type is not None
+            and type(node.left) is ID
+            and node.left.name == "self"
+            and type(node.right) is FunctionCall
+            and self.is_self_call(node.right)
+        ):
+            node.right.tail_call = True
+            self.current.tail_recursive = True
+
+    @visitor.when(Let)
+    def visit(self, node: Let):
+        yield node.body
+
+    @visitor.when(ExpressionBlock)
+    def visit(self, node: ExpressionBlock):
+        if node.exp_list:
+            yield node.exp_list[-1]
+
+    @visitor.when(If)
+    def visit(self, node: If):
+        for case in node.case_list:
+            yield case.body
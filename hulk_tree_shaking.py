@@ -0,0 +1,96 @@
+from misc import ast_walk, method_name_getter
+from hulk_ast import (
+    Program,
+    FunctionDef,
+    FunctionCall,
+    TypeDef,
+    TypeCall,
+    VectorInt,
+    BinOp,
+)
+
+
+class TreeShaking:
+    """quita las funciones, tipos y metodos a los que no se llega desde la expresion global.
+    Un tipo se queda si se instancia, si alguna expresion o firma que se queda lo nombra o si es padre de otro que se queda.
+    Un metodo se queda si en el codigo alcanzable se llama algun metodo con su nombre y aridad, asi todos
+    los tipos de una jerarquia conservan los mismos metodos y sus structs siguen siendo compatibles"""
+
+    def __init__(self):
+        self.program: Program = None
+        self.functions = set()
+        self.types = set()
+        self.methods = set()
+        self.scanned = set()
+        self.pending = []
+
+    def run(self, program: Program):
+        self.program = program
+        functions = {method_name_getter(function): function for function in program.functions}
+        types = {type_def.id.name: type_def for type_def in program.types}
+
+        self.pending = [program.global_exp]
+        while True:
+            while self.pending:
+                self.scan(self.pending.pop(), functions, types)
+            kept = len(self.types)
+            for name in list(self.types):
+                self.keep_type(types[name], types)
+            if not self.pending and len(self.types) == kept:
+                break
+
+        removed = len(program.functions) + len(program.types)
+        program.functions = [function for function in program.functions if method_name_getter(function) in self.functions]
+        program.types = [type_def for type_def in program.types if type_def.id.name in self.types]
+        removed -= len(program.functions) + len(program.types)
+        for type_def in program.types:
+            kept = [method for method in type_def.functions if method_name_getter(method) in self.methods]
+            removed += len(type_def.functions) - len(kept)
+            type_def.functions = kept
+        return removed
+
+    def visit_body(self, body):
+        if body is not None and id(body) not in self.scanned:
+            self.scanned.add(id(body))
+            self.pending.append(body)
+
+    def scan(self, body, functions, types):
+        for node in ast_walk(body):
+            self.mention(getattr(node, "static_type", None), types)
+            if type(node) is TypeCall:
+                self.mention(node.id.name, types)
+            elif type(node) is BinOp and node.op == "." and type(node.right) is FunctionCall:
+                self.methods.add(method_name_getter(node.right))
+            elif type(node) is VectorInt:
+                # CodeGen recorre el iterable de una comprension con next() y current()
+                self.methods |= {"next/0", "current/0"}
+            elif type(node) is FunctionCall and node.func_id.name != "base":
+                key = method_name_getter(node)
+                if key in functions and key not in self.functions:
+                    self.functions.add(key)
+                    self.keep_signature(functions[key], types)
+                    self.visit_body(functions[key].body)
+
+    def mention(self, type_name, types):
+        if isinstance(type_name, str) and type_name in types:
+            self.types.add(type_name)
+
+    def keep_signature(self, function: FunctionDef, types):
+        self.mention(function.static_type, types)
+        for param in function.params.param_list:
+            self.mention(param.static_type, types)
+
+    def keep_type(self, type_def: TypeDef, types):
+        "los atributos, el padre y los metodos ya llamados de un tipo que se queda"
+        for param in type_def.params.param_list:
+            self.mention(param.static_type, types)
+        for var in type_def.variables:
+            self.mention(var.static_type, types)
+            self.visit_body(var.value)
+        if type_def.inherits:
+            self.mention(type_def.inherits.id.name, types)
+            self.visit_body(type_def.inherits)
+        for method in type_def.functions:
+            if method_name_getter(method) in self.methods:
+                self.keep_signature(method, types)
+                self.visit_body(method.body)
@@ -0,0 +1,127 @@
+"""recompila un .hulk cada vez que cambia alguna de sus declaraciones
+
+uso: python hulk_watch.py archivo.hulk [-o carpeta] [-O0|-O1|-O2] [--release]
+el C va dividido en carpeta (./out por defecto), asi make solo recompila las unidades que cambiaron.
+Solo el parseo y la compilacion del C son por declaracion: el chequeo y CodeGen recorren todo el programa en cada cambio
+"""
+import io
+import os
+import subprocess
+import sys
+import time
+
+from hulk_declarations import declarations
+from hulk_build import Toolchain, build
+from hulk_incremental import parse_program, DeclarationCache
+from hulk_parser import span_parser
+from hulk_semantic_check import semantic_check
+from hulk_code_gen import CodeGen
+from hulk_passes import standard_passes
+
+
+class Watcher:
+    """mira el archivo cada interval segundos y compara el hash de cada declaracion con el de la ultima compilacion.
+    Si solo cambiaron comentarios o espacios no hace nada; si no, genera el C de nuevo en otro proceso (el frontend
+    guarda estado global), parseando solo las declaraciones nuevas, y write_unit solo reescribe las unidades cuyo C cambio.
+    El proceso siguiente se lanza por adelantado y espera con el compilador ya importado"""
+
+    def __init__(self, path, output="./out", level=2, toolchain: Toolchain = None, interval=0.2):
+        self.path = path
+        self.output = output
+        self.level = level
+        self.toolchain = toolchain or Toolchain()
+        self.interval = interval
+        self.mtime = None
+        self.digests = {}
+        self.worker = None
+
+    def changes(self):
+        "nombres de las declaraciones agregadas, quitadas o cambiadas desde la ultima vez, None si el archivo no cambio"
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self.mtime:
+            return None
+        self.mtime = mtime
+        digests = {(item.kind, item.name): item.digest for item in declarations(io.open(self.path).read())}
+        changed = sorted(
+            name for (kind, name) in digests.keys() | self.digests.keys()
+            if digests.get((kind, name)) != self.digests.get((kind, name))
+        )
+        self.digests = digests
+        return changed
+
+    def spawn(self):
+        return subprocess.Popen(
+            [sys.executable, __file__, "--worker", self.path, self.output, str(self.level)], stdin=subprocess.PIPE, text=True
+        )
+
+    def rebuild(self):
+        "devuelve las unidades de C que se reescribieron, o None si el programa tiene errores"
+        start = time.time()
+        worker = self.worker or self.spawn()
+        worker.communicate("\n")
+        if worker.returncode == 0:
+            build(self.output, self.toolchain, split=True)
+        # con un solo nucleo el siguiente proceso competiria con gcc, se lanza despues
+        self.worker = self.spawn()
+        if worker.returncode != 0:
+            return None
+        return sorted(
+            name for name in os.listdir(self.output)
+            if name.endswith((".c", ".h")) and os.path.getmtime(os.path.join(self.output, name)) >= start
+        )
+
+    def run(self):
+        while True:
+            changed = self.changes()
+            if changed:
+                start = time.perf_counter()
+                units = self.rebuild()
+                elapsed = time.perf_counter() - start
+                if units is not None:
+                    names = ", ".join(changed) if len(changed) <= 8 else f"{len(changed)} declarations"
+                    rewrote = ", ".join(units) if len(units) <= 8 else f"{len(units)} units"
+                    print(f"changed: {names}; rewrote: {rewrote or 'nothing'}; built in {elapsed:.2f} s")
+            time.sleep(self.interval)
+
+    def stop(self):
+        if self.worker is not None:
+            self.worker.kill()
+
+
+def generate(path, output, level):
+    """solo se parsean las declaraciones que no estan en la cache de output; el chequeo es de todo el programa.
+    Guardar lo que el chequeo le pone a los nodos de cada declaracion no ahorra nada: volver a ponerlo recorre
+    los mismos nodos que TypeInfChk, y con 200 tipos y 200 funciones tardaba 54 ms contra 33 ms de chequear"""
+    code = io.open(path).read()
+    ast, errors = parse_program(code, DeclarationCache(os.path.join(output, ".declarations")))
+    if not errors:
+        ast, errors = semantic_check(ast, code)
+    if errors:
+        print(f"{path}: FOUND THE FOLLOWING ERRORS:", *errors, sep="\n - ")
+        return 1
+    CodeGen(standard_passes(level), output=output, split=True).visit(ast)
+    return 0
+
+
+def worker(path, output, level):
+    "espera una linea en stdin para generar, con el compilador ya importado y el parser armado"
+    span_parser()
+    if not sys.stdin.readline():
+        return 0
+    return generate(path, output, level)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--worker"]:
+        sys.exit(worker(sys.argv[2], sys.argv[3], int(sys.argv[4])))
+    level = 2
+    for arg in sys.argv:
+        if arg in ["-O0", "-O1", "-O2"]:
+            level = int(arg[2])
+    output = sys.argv[sys.argv.index("-o") + 1] if "-o" in sys.argv else "./out"
+    toolchain = Toolchain("release" if "--release" in sys.argv else "default")
+    watcher = Watcher(sys.argv[1], output, level, toolchain)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
@@ -1,29 +1,45 @@
 import graphviz
 from typing import List
 
+import hulk_ast
 from hulk_ast import (
-    nodes,
     Node,
+    Program,
     FunctionCall,
     FunctionDef,
     Params,
+    ExpressionBlock,
     Let,
     Assign,
     ID,
+    If,
+    Case,
     While,
     For,
     BinOp,
+    UnaryOp,
     TypeDef,
+    TypeCall,
     Protocol,
+    VectorExt,
+    VectorInt,
+    VectorCall,
+    Print,
+    Sqrt,
+    Sin,
+    Cos,
+    Exp,
+    Log,
 )
 
 class StringToken(str):
+    # un str no admite __slots__; T solo se guarda en el token si cambia, el de casi todos es el de la clase.
+    # Un diccionario nuevo ocupa 184 bytes; el que crea asignar atributos en __init__ ocupa 304
+    T = "Object"
+
     def __init__(self, strv) -> None:
         super().__init__()
-        self.strv = strv
-        self.lineno = 0
-        self.lexpos = 0
-        self.T = "Object"
+        self.__dict__ = {"lineno": 0, "lexpos": 0}
 
 class HierarchyNode:
     def __init__(self, name, parent, children, depth):
@@ -41,13 +57,133 @@ class ColumnFinder:
         except:
             return ""
 
-def refact_ast(nodes_dict : dict):
-    "esto convierte el for en el while equivalente y los let en los let con una sola asignacion concatenados equivalentes"
-    for_expressions : List[For] = list(filter(lambda x: type(x) is For, nodes_dict.keys()))
+# hijos de cada tipo de nodo, en el orden en que CodeGen los evalua
+CHILD_FIELDS = {
+    Program: ("functions", "types", "protocols", "global_exp"),
+    FunctionDef: ("params", "body"),
+    FunctionCall: ("params",),
+    Params: ("param_list",),
+    ExpressionBlock: ("exp_list",),
+    Let: ("assign", "body"),
+    Assign: ("name", "value"),
+    If: ("case_list",),
+    Case: ("condition", "body"),
+    While: ("condition", "body"),
+    For: ("iterator", "iterable", "body"),
+    TypeDef: ("params", "inherits", "variables", "functions"),
+    TypeCall: ("params",),
+    Protocol: ("functions",),
+    VectorExt: ("items",),
+    VectorInt: ("iterable", "iterator", "expression"),
+    VectorCall: ("index", "id"),
+    BinOp: ("left", "right"),
+    UnaryOp: ("operand",),
+    Print: ("value",),
+    Sqrt: ("value",),
+    Sin: ("value",),
+    Cos: ("value",),
+    Exp: ("value",),
+    Log: ("base", "value"),
+}
+
+def ast_children(node: Node):
+    "hijos directos de un nodo del ast"
+    for field in CHILD_FIELDS.get(type(node), ()):
+        value = getattr(node, field)
+        if type(value) is list:
+            for item in value:
+                if item is not None:
+                    yield item
+        elif value is not None:
+            yield value
+
+def ast_walk(node: Node):
+    "recorre el subarbol en preorden sin recursion"
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(list(ast_children(current))))
+
+def trampoline(generator):
+    """corre una funcion recursiva escrita como generador sin que crezca la pila de Python: donde se llamaria
+    a si misma hace 'resultado = yield f(...)' y trampoline corre ese generador igual y le manda lo que devuelve.
+    Una excepcion de la llamada interna se lanza en el yield del que la hizo"""
+    stack = [generator]
+    value = None
+    error = None
+    while True:
+        try:
+            call = stack[-1].send(value) if error is None else stack[-1].throw(error)
+        except StopIteration as stop:
+            value, error = stop.value, None
+        except Exception as exc:
+            value, error = None, exc
+        else:
+            stack.append(call)
+            value = None
+            continue
+        stack.pop()
+        if not stack:
+            if error is not None:
+                raise error
+            return value
+
+
+def number_nodes(program: Program):
+    """numera en preorden dentro de cada declaracion los nodos que dan nombre a funciones y variables del C
+    (los que tienen instance_id); el id lleva el nombre de la declaracion, como bin_op_fib_3. Asi los nombres
+    solo dependen del programa y editar una funcion no cambia el C de las demas.
+    Un nombre que coincide con una funcion del programa se salta"""
+    taken = {function.func_id.name for function in program.functions}
+    declarations = (
+        [(function.func_id.name, function) for function in program.functions]
+        + [(type_def.id.name, type_def) for type_def in program.types]
+        + [("main", program.global_exp)]
+    )
+    numbered = 0
+    for tag, declaration in declarations:
+        count = 0
+        for node in ast_walk(declaration):
+            if not hasattr(node, "instance_id"):
+                continue
+            prefix = node.name[: len(node.name) - len(str(node.instance_id))]
+            count += 1
+            while f"{prefix}{tag}_{count}" in taken:
+                count += 1
+            node.instance_id = f"{tag}_{count}"
+            node.name = f"{prefix}{node.instance_id}"
+        numbered += count
+    return numbered
+
+def ast_parents(node: Node):
+    "el padre de cada nodo del subarbol, por id"
+    return {id(child): parent for parent in ast_walk(node) for child in ast_children(parent)}
+
+def replace_child(parent: Node, old: Node, new: Node):
+    "pone new en el lugar que ocupa old entre los hijos de parent"
+    for field in CHILD_FIELDS.get(type(parent), ()):
+        value = getattr(parent, field)
+        if type(value) is list:
+            for index, item in enumerate(value):
+                if item is old:
+                    value[index] = new
+                    new.parent = parent
+                    return True
+        elif value is old:
+            setattr(parent, field, new)
+            new.parent = parent
+            return True
+    return False
+
+def refact_ast(*roots: Node):
+    "esto convierte el for en el while equivalente y los let en los let con una sola asignacion concatenados equivalentes, en los subarboles roots"
+    for_expressions : List[For] = [node for root in roots for node in ast_walk(root) if type(node) is For]
     
     for for_item in for_expressions:
         token = for_item.tk
-        nodes.pop(for_item)
+        if hulk_ast.registry is not None:
+            hulk_ast.registry.pop(for_item)
         condition_id_iter = ID ("iterable", "")
         func_call_next_id = ID("next", "")
         func_call_next_params = Params([])
@@ -63,6 +199,7 @@ def refact_ast(nodes_dict : dict):
         inner_let = Let([assign_inner_let], for_item.body)
         while_item = While(condition, inner_let)
         while_item.tk = token
+        while_item.for_let = inner_let
         neim = StringToken("iterable")
         neim.lineno=for_item.iterator.name.lineno
         neim.lexpos=for_item.iterator.name.lexpos
@@ -95,7 +232,7 @@ def refact_ast(nodes_dict : dict):
         # master_let.parent = for_item.parent
         for_item = master_let
 
-    let_expressions : List[Let] = list(filter(lambda x: type(x) is Let, nodes_dict.keys()))
+    let_expressions : List[Let] = [node for root in roots for node in ast_walk(root) if type(node) is Let]
 
     for let in let_expressions:
         if len(let.assign)<=1:
@@ -112,7 +249,6 @@ def refact_ast(nodes_dict : dict):
         current_let.body = end_body
         end_body.parent = current_let
         let.assign = let.assign[:1]
-    return nodes_dict
 
 def create_AST_graph(dict: dict, graph_name):
     "guarda el ast en un grafiquito guapo...si es muy grande se parte"
@@ -135,39 +271,48 @@ def create_Hierarchy_graph(dict: dict, graph_name):
     dot.render(directory="output")
     
 def set_depth(i_dict:dict, key: str, visited):
+    "en preorden, con una pila: la jerarquia puede ser tan profunda como el programa quiera"
     if key in visited:
         return "Error in type definition: "+key+" appeared in class hierarchy twice"
     visited.add(key)
-    for item in i_dict[key].children:
-        i_dict[item].depth = i_dict[key].depth + 1
-        curr = set_depth(i_dict, item, visited)
-        if curr:
-            return curr
-        else:
-            pass
+    stack = [(key, item) for item in reversed(i_dict[key].children)]
+    while stack:
+        parent, item = stack.pop()
+        i_dict[item].depth = i_dict[parent].depth + 1
+        if item in visited:
+            return "Error in type definition: "+item+" appeared in class hierarchy twice"
+        visited.add(item)
+        stack.extend((item, child) for child in reversed(i_dict[item].children))
         
 def get_descendancy(ast_node, name, descendancy):
-    if name in descendancy:
-        return descendancy
-    descendancy.append(name)
-    for child in ast_node.hierarchy_tree[name].children:
-        get_descendancy(ast_node, child, descendancy)
+    "name y sus descendientes en preorden"
+    stack = [name]
+    while stack:
+        name = stack.pop()
+        if name in descendancy:
+            continue
+        descendancy.append(name)
+        stack.extend(reversed(ast_node.hierarchy_tree[name].children))
     return descendancy
 
 def get_descendancy_set(ast_node, name, descendancy):
-    if name in descendancy:
-        return descendancy
-    descendancy.add(name)
-    for child in ast_node.hierarchy_tree[name].children:
-        get_descendancy_set(ast_node, child, descendancy)
+    stack = [name]
+    while stack:
+        name = stack.pop()
+        if name in descendancy:
+            continue
+        descendancy.add(name)
+        stack.extend(ast_node.hierarchy_tree[name].children)
     return descendancy
 
 def protocol_descendancy_set(ast_node: Node, name, descendancy):
-    if name in descendancy:
-        return descendancy
-    descendancy.add(name)
-    for child in ast_node.protocol_hierarchy[name].children:
-        protocol_descendancy_set(ast_node, child, descendancy)
+    stack = [name]
+    while stack:
+        name = stack.pop()
+        if name in descendancy:
+            continue
+        descendancy.add(name)
+        stack.extend(ast_node.protocol_hierarchy[name].children)
     return descendancy
 
 
@@ -267,22 +412,22 @@ def LCA_BI(i_dict:dict, A, B):
         return B
     if B == "None":
         return A
-    if i_dict[A].depth == i_dict[B].depth:
-        if A == B:
-            return A
-        else:
+    # dos tipos iguales estan a la misma profundidad
+    while A != B:
+        if i_dict[A].depth == i_dict[B].depth:
             A = i_dict[A].parent
             B = i_dict[B].parent
-            return LCA_BI(i_dict, A, B)
-    else:
-        if i_dict[A].depth > i_dict[B].depth:
+        elif i_dict[A].depth > i_dict[B].depth:
             A = i_dict[A].parent
-            return LCA_BI(i_dict, A, B)
         else:
             B = i_dict[B].parent
-            return LCA_BI(i_dict, A, B)
+    return A
         
 def LCA(ast_node, *params):
+    return trampoline(lca_steps(ast_node, params))
+
+def lca_steps(ast_node, params):
+    "LCA para trampoline: el de los elementos de unos Vector anidados se pide con yield"
     if len(params)<=0:
         return "Object"
     if len(params)>1:
@@ -298,7 +443,7 @@ def LCA(ast_node, *params):
         new_params = []
         for vec in params:
             new_params.append(vec.T)
-            vec_T = LCA(ast_node, *new_params)
+            vec_T = yield lca_steps(ast_node, tuple(new_params))
         lca.T = vec_T
     return lca
 
@@ -306,8 +451,13 @@ def typeof(ast_node: Node):
     return get_type_rec(ast_node.static_type)
 
 def get_type_rec(name : StringToken):
-    if name == "Vector":
-        name+=f"[{get_type_rec(name.T)}]"
+    "Vector[Vector[Number]]: los Vector anidados se recorren hasta el tipo de adentro y se envuelven de vuelta"
+    vectors = []
+    while name == "Vector":
+        vectors.append(name)
+        name = name.T
+    for vector in reversed(vectors):
+        name = vector + f"[{name}]"
     return name
         
         
@@ -0,0 +1,28 @@
+#include "hulk_runtime.h"
+
+//Memo tables helpers
+unsigned long int memo_hash_int(unsigned long int hash, unsigned int value) {
+    // los float enteros pequennos tienen los bits bajos en cero, hay que mezclar los altos hacia abajo
+    hash = (hash ^ value) * 0x9E3779B97F4A7C15UL;
+    return hash ^ (hash >> 32);
+}
+unsigned long int memo_hash_float(unsigned long int hash, float value) {
+    unsigned int bits;
+    memcpy(&bits, &value, sizeof(bits));
+    return memo_hash_int(hash, bits);
+}
+unsigned long int memo_hash_string(unsigned long int hash, const char* value) {
+    while (*value) {
+        hash = memo_hash_int(hash, (unsigned char)*value);
+        value++;
+    }
+    return hash;
+}
+int memo_same_float(float a, float b) {
+    return memcmp(&a, &b, sizeof(float)) == 0;
+}
+char* memo_copy_string(const char* value) {
+    char* copy = (char*)malloc(strlen(value) + 1);
+    strcpy(copy, value);
+    return copy;
+}
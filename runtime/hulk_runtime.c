@@ -0,0 +1,167 @@
+#include "hulk_runtime.h"
+
+unsigned long int memory_usage = 0;
+unsigned long int memory_limit = 1 * (16 * 1024 * 1024) / 8;
+//Concatenate two strings
+char* concatenate_strings(const char* str1, const char* str2) {
+    // Calculate the length needed for the concatenated string
+    size_t len1 = strlen(str1);
+    size_t len2 = strlen(str2);
+    size_t length = len1 + len2 + 1; // +1 for the null terminator
+
+    // Allocate memory for the concatenated string
+    memory_usage = memory_usage+(length * sizeof(char));
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        char* result = (char*)malloc(length * sizeof(char));
+    if (result == NULL) {
+        printf("Memory allocation failed");
+        exit(-1); // Exit if memory allocation fails
+    }
+
+    // Copy the first string and concatenate the second string
+    memcpy(result, str1, len1);
+    memcpy(result + len1, str2, len2 + 1); // Copy the null terminator as well
+
+    return result;
+}
+int check_types(char* value, char* type) {
+    if (strcmp(value, type) == 0) {
+        return 1;
+    }
+    return 0;
+}
+
+Object* new_Object() {
+    memory_usage = memory_usage+(sizeof(Object));    
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        Object* obj = (Object*)malloc(sizeof(Object));    
+    int string_len = strlen("Object");
+    memory_usage = memory_usage+((string_len + 1) * sizeof(char));
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        obj->type = (char*)malloc((string_len + 1) * sizeof(char));
+    strcpy(obj->type, "Object");
+    memory_usage = memory_usage+((string_len+1+30)*sizeof(char));
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        obj->string = (char*)malloc((string_len+1+30)*sizeof(char));
+    char memory_address_str[20]; // Assuming a maximum of 20 characters for the address string
+    sprintf(memory_address_str, "%p", (void *)obj);
+    strcpy(obj->string, concatenate_strings(concatenate_strings("<Object at ", memory_address_str), ">"));
+    return obj;
+}
+
+Boolean* new_Boolean(int value) {
+    memory_usage = memory_usage+(sizeof(Boolean));    
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        Boolean* obj = (Boolean*)malloc(sizeof(Boolean));    
+    int string_len = strlen("bool");
+    memory_usage = memory_usage+((string_len + 1) * sizeof(char));
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        obj->type = (char*)malloc((string_len + 1) * sizeof(char));
+    strcpy(obj->type, "bool");
+
+    obj->value = value;
+
+    if (value == 1) {
+        memory_usage = memory_usage+((strlen("TRUE")+1) * sizeof(char));
+        if (memory_usage > memory_limit) {
+            printf("STACK OVERFLOW");
+            exit(-1);
+        }
+                obj->string = (char *)malloc((strlen("TRUE")+1) * sizeof(char));
+        
+        strcpy(obj->string, "TRUE");
+    } else {
+        memory_usage = memory_usage+((strlen("FALSE")+1) * sizeof(char));
+        if (memory_usage > memory_limit) {
+            printf("STACK OVERFLOW");
+            exit(-1);
+        }
+                obj->string = (char *)malloc((strlen("FALSE")+1) * sizeof(char));
+        strcpy(obj->string, "FALSE");
+    }
+    
+    return obj;
+}
+
+
+Number* new_Number(float value) {
+    memory_usage = memory_usage+(sizeof(Number));    
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        Number* obj = (Number*)malloc(sizeof(Number));    
+    int string_len = strlen("Number");
+    memory_usage = memory_usage+((string_len + 1) * sizeof(char));
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        obj->type = (char*)malloc((string_len + 1) * sizeof(char));
+    strcpy(obj->type, "Number");
+    
+    obj->value = value;
+    char buff[32];
+    sprintf(buff, "%.7f", value);
+    int value_len = strlen(buff);
+    memory_usage = memory_usage+((value_len + 1) * sizeof(char));
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        obj->string = (char *)malloc((value_len + 1) * sizeof(char));
+    strcpy(obj->string, buff);
+    return obj;
+}
+
+
+String* new_String(char* value) {
+    memory_usage = memory_usage+(sizeof(String));    
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        String* obj = (String*)malloc(sizeof(String));    
+    int string_len = strlen("string");
+    memory_usage = memory_usage+((string_len + 1) * sizeof(char));
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        obj->type = (char*)malloc((string_len + 1) * sizeof(char));
+    strcpy(obj->type, "string");
+    int value_len = strlen(value);
+    memory_usage = memory_usage+((value_len + 1) * sizeof(char));
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        obj->value = (char*)malloc((value_len + 1) * sizeof(char));
+    strcpy(obj->value, value);
+    memory_usage = memory_usage+((value_len+1) * sizeof(char));
+    if (memory_usage > memory_limit) {
+        printf("STACK OVERFLOW");
+        exit(-1);
+    }
+        obj->string = (char *)malloc((value_len+1) * sizeof(char));
+    strcpy(obj->string,obj->value);
+    return obj;
+}
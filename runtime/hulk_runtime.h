@@ -0,0 +1,64 @@
+#ifndef HULK_RUNTIME_H
+#define HULK_RUNTIME_H
+// runtime de los programas HULK generados: tipos basicos, reserva de memoria con limite y Vector
+
+#include <stdio.h>
+#include <math.h>
+#include <stdlib.h>
+#include <string.h>
+
+# include <time.h>
+#include <sys/time.h>
+
+extern unsigned long int memory_usage;
+extern unsigned long int memory_limit;
+typedef struct {
+       char *type;
+       char* string;   
+}Object;
+typedef struct {
+    char* type;
+    char* string;
+    int value;
+} Boolean;
+typedef struct {
+    char* type;
+    char* string;
+    float value;
+} Number;
+typedef struct {
+    char* type;
+    char* string;
+    char* value;
+} String;
+typedef struct {
+    char* type;
+    char* string;
+    void** data;
+    float* values;
+    int unboxed;
+    int len;
+} Vector;
+
+// los Vector de Number y Boolean guardan los valores contiguos en values, sin un objeto por elemento
+#define VECTOR_BOXED 0
+#define VECTOR_NUMBER 1
+#define VECTOR_BOOLEAN 2
+
+char* concatenate_strings(const char* str1, const char* str2);
+int check_types(char* value, char* type);
+Object* new_Object();
+Boolean* new_Boolean(int value);
+Number* new_Number(float value);
+String* new_String(char* value);
+float vector_value(Vector* vector, int index);
+void* vector_get(Vector* vector, int index);
+
+// tablas memo de las funciones memoizadas
+unsigned long int memo_hash_int(unsigned long int hash, unsigned int value);
+unsigned long int memo_hash_float(unsigned long int hash, float value);
+unsigned long int memo_hash_string(unsigned long int hash, const char* value);
+int memo_same_float(float a, float b);
+char* memo_copy_string(const char* value);
+
+#endif
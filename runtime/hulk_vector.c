@@ -0,0 +1,12 @@
+#include "hulk_runtime.h"
+
+float vector_value(Vector* vector, int index) {
+    if (vector->unboxed) return vector->values[index];
+    return ((Number*)vector->data[index])->value;
+}
+
+void* vector_get(Vector* vector, int index) {
+    if (vector->unboxed == VECTOR_NUMBER) return new_Number(vector->values[index]);
+    if (vector->unboxed == VECTOR_BOOLEAN) return new_Boolean((int)vector->values[index]);
+    return vector->data[index];
+}
@@ -0,0 +1,45 @@
+"""cada nodo ve las tablas de su propio Program, aunque haya otro programa vivo en el proceso
+
+uso: python -m pytest test_ast.py
+"""
+from hulk_code_gen import CodeGen
+from hulk_parser import parse_whole
+from hulk_semantic_check import semantic_check
+
+FIRST = """
+type A(x: Number) {
+    x = x;
+    get(): Number => self.x;
+}
+print(new A(1).get());
+"""
+
+SECOND = """
+type B(y: Number) {
+    y = y;
+    get(): Number => self.y * 2;
+}
+print(new B(2).get());
+"""
+
+
+def checked(code):
+    ast, errors = parse_whole(code)
+    assert not errors, errors
+    ast, errors = semantic_check(ast, code)
+    assert not errors, errors
+    return ast
+
+
+def test_two_live_programs(tmp_path):
+    alone = tmp_path / "alone.c"
+    CodeGen(output=str(alone)).visit(checked(FIRST))
+
+    first = checked(FIRST)
+    second = checked(SECOND)
+    assert "A" in first.global_exp.global_definitions and "B" not in first.global_exp.global_definitions
+    assert "B" in second.global_exp.global_definitions and "A" not in second.global_exp.global_definitions
+    # el segundo se chequeo despues, el C del primero no puede cambiar por eso
+    after = tmp_path / "after.c"
+    CodeGen(output=str(after)).visit(first)
+    assert after.read_text() == alone.read_text()
@@ -0,0 +1,64 @@
+"""el C generado se compila con gcc y se corre; con -fsanitize=address una escritura fuera de un arreglo falla
+
+uso: python -m pytest test_codegen.py
+"""
+import os
+import subprocess
+
+from hulk_build import Toolchain, build
+from hulk_code_gen import CodeGen
+from hulk_parser import parse_whole
+from hulk_passes import standard_passes
+from hulk_semantic_check import semantic_check
+
+ITERABLE = """
+protocol Iterable {
+    next(): Boolean;
+    current(): Object;
+}
+"""
+
+# avanzar el contador de a 0.1 en float da una vuelta mas que (limit - counter) / 0.1
+FRACTIONAL_RANGE = ITERABLE + """
+type Frac(min: Number, max: Number) {
+    min = min;
+    max = max;
+    c = min - 0.1;
+    next(): Boolean => (self.c := self.c + 0.1) < self.max;
+    current(): Number => self.c;
+}
+let v = [x || x in new Frac(0, 1422)] in print(v[14222]);
+"""
+
+# sin el ciclo cada llamada deja su marco y sus cajas: a 10000 de profundidad se pasa de memory_limit
+LOOP_SUM = """
+function loopsum(n: Number, acc: Number): Number => if (n == 0) acc else loopsum(n - 1, acc + n);
+print(loopsum(10000, 0));
+"""
+
+
+def compile_and_run(code, tmp_path, level=2, sanitize=True):
+    ast, errors = parse_whole(code)
+    assert not errors, errors
+    ast, errors = semantic_check(ast, code)
+    assert not errors, errors
+    output = str(tmp_path / "out.c")
+    CodeGen(standard_passes(level), output=output).visit(ast)
+    cflags = ["-fsanitize=address"] if sanitize else []
+    binary = build(output, Toolchain("debug", cflags=cflags))
+    env = dict(os.environ, ASAN_OPTIONS="detect_leaks=0")
+    return subprocess.run([binary], capture_output=True, text=True, env=env)
+
+
+def test_comprehension_over_fractional_range(tmp_path):
+    result = compile_and_run(FRACTIONAL_RANGE, tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("1421.99")
+
+
+def test_tail_call_depth(tmp_path):
+    # la suma en float no da 50005000 exacto
+    looped = compile_and_run(LOOP_SUM, tmp_path, level=2, sanitize=False)
+    assert looped.stdout.startswith("5000"), looped.stdout
+    recursive = compile_and_run(LOOP_SUM, tmp_path, level=0, sanitize=False)
+    assert recursive.stdout.startswith("STACK OVERFLOW")
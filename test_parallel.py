@@ -0,0 +1,104 @@
+"""el chequeo de tipos y la generacion de C con workers > 1 tienen que dar lo mismo que sin pool
+
+uso: python -m pytest test_parallel.py
+"""
+from hulk_code_gen import CodeGen
+from hulk_parser import parse_whole
+from hulk_passes import standard_passes
+from hulk_semantic_check import semantic_check, infers_return_types, attributes
+from misc import ast_walk
+
+# tipos con metodos que llaman a funciones globales y al reves, con errores en tipos, funciones y la expresion global
+CHECKED = """
+function f(x: Number): Number => x + "a";
+function g(y: String): Number => f(y);
+function twice(x: Number): Number => x * 2;
+type A(a: Number) {
+    a = a;
+    m(): Boolean => self.a + 1;
+    k(z: Number): Number => g(z);
+    n(z: Number): Number => twice(z) + self.a;
+}
+type B(b: Number) inherits A(b) {
+    m(): Number => 3;
+    p(): Number => self.n(twice(1));
+}
+type C inherits B(2) {
+    q(s: String): String => s @@ twice(self.p());
+}
+function h(): Boolean => 5;
+{ print(f(true)); h(); print(new C().q("x")); }
+"""
+
+# cuatro niveles de herencia, con metodos redefinidos y heredados de mas arriba, y funciones para repartir
+GENERATED = """
+type A(a: Number) {
+    a = a;
+    getA(): Number => self.a;
+    name(): String => "A";
+}
+type B(b: Number) inherits A(b) {
+    b = b;
+    name(): String => "B";
+}
+type C inherits B(3) {
+    getC(): Number => self.getA() + 1;
+}
+type D inherits C {
+    name(): String => "D" @@ self.getC();
+}
+function f1(x: Number): Number => x + 1;
+function f2(x: Number): Number => x * 2;
+function f3(x: Number): Number => x - 3;
+{ print(new D().getA()); print(new D().name()); print(new C().getC() + f1(1) + f2(2) + f3(3)); }
+"""
+
+
+def plain(value):
+    "si value se puede comparar entre dos ast: no lleva nodos ni otros objetos del programa"
+    if type(value) in [list, tuple, set]:
+        return all(plain(item) for item in value)
+    if type(value) is dict:
+        return all(plain(key) and plain(item) for key, item in value.items())
+    return value is None or type(value) in [str, int, float, bool]
+
+
+def annotations(ast):
+    "lo que el chequeo deja en cada nodo, salvo los punteros a nodos y tablas, que no se comparan entre dos ast"
+    return [
+        (type(node).__name__, {name: value for name, value in attributes(node).items() if plain(value)})
+        for node in ast_walk(ast)
+    ]
+
+
+def check(code, workers):
+    ast, errors = parse_whole(code)
+    assert not errors, errors
+    assert workers == 1 or not infers_return_types(ast)
+    ast, errors = semantic_check(ast, code, workers)
+    return annotations(ast), errors
+
+
+def test_parallel_check_matches_serial():
+    serial, serial_errors = check(CHECKED, 1)
+    for workers in [2, 4]:
+        parallel, parallel_errors = check(CHECKED, workers)
+        assert parallel_errors == serial_errors
+        assert parallel == serial
+    assert serial_errors
+
+
+def generate(code, workers, output):
+    ast, errors = parse_whole(code)
+    assert not errors, errors
+    ast, errors = semantic_check(ast, code)
+    assert not errors, errors
+    CodeGen(standard_passes(2), output=str(output), workers=workers).visit(ast)
+    return output.read_text()
+
+
+def test_parallel_codegen_matches_serial(tmp_path):
+    serial = generate(GENERATED, 1, tmp_path / "serial.c")
+    # el reparto entre procesos cambia en cada corrida
+    for run in range(5):
+        assert generate(GENERATED, 4, tmp_path / f"parallel_{run}.c") == serial
@@ -39,37 +39,114 @@ def when(param_type):
     if not isinstance(dispatcher, Dispatcher):
       dispatcher = dispatcher.dispatcher
     dispatcher.add_target(param_type, fn)
-    def ff(*args, **kw):
-      return dispatcher(*args, **kw)
-    ff.dispatcher = dispatcher
-    return ff
+    return dispatcher.function()
   return f
 
 
+def no_target(*args, **kw):
+  return []
+
+
 class Dispatcher(object):
+  """elige el handler por la clase del argumento: la primera clase de su MRO con un handler registrado.
+  La eleccion se guarda por clase, asi cada clase se resuelve una sola vez; una clase sin handler
+  devuelve [] como antes.
+
+  Un handler de visit(self, node) puede ser un generador: en vez de llamar a self.visit(hijo) hace
+  'resultado = yield hijo' y trampoline visita al hijo sin recursion. Asi la pila de Python no crece
+  con la profundidad del ast"""
+
   def __init__(self, param_name, fn):
     frame = inspect.currentframe().f_back.f_back
     top_level = frame.f_locals == frame.f_globals
-    self.param_index = self.__argspec(fn).args.index(param_name)
+    argspec = self.__argspec(fn)
+    self.param_index = argspec.args.index(param_name)
+    # visit(self, node) sin mas argumentos, el caso de todos los visitors del compilador
+    self.method = argspec.args == argspec.args[:1] + [param_name] and not argspec.varargs and not argspec.varkw
     self.param_name = param_name
     self.targets = {}
+    self.cache = {}
+    # clase -> (handler, si es un generador), lo que usa trampoline con cada nodo que le dan
+    self.steps = {}
 
   def __call__(self, *args, **kw):
     typ = args[self.param_index].__class__
-    d = self.targets.get(typ)
-    if d is not None:
-      return d(*args, **kw)
+    handler = self.cache.get(typ)
+    if handler is None:
+      handler = self.resolve(typ)
+    return handler(*args, **kw)
+
+  def function(self):
+    "el visit de la clase: una funcion que consulta la tabla directamente, sin pasar por __call__"
+    cache = self.cache
+    resolve = self.resolve
+    index = self.param_index
+    if self.method:
+      def ff(instance, node):
+        return (cache.get(node.__class__) or resolve(node.__class__))(instance, node)
     else:
-      issub = issubclass
-      t = self.targets
-      ks = t.keys()
-      ans = [t[k](*args, **kw) for k in ks if issub(typ, k)]
-      if len(ans) == 1:
-        return ans.pop()
-      return ans
+      def ff(*args, **kw):
+        handler = cache.get(args[index].__class__) or resolve(args[index].__class__)
+        return handler(*args, **kw)
+    ff.dispatcher = self
+    return ff
+
+  def resolve(self, typ):
+    handler = next((self.targets[base] for base in typ.__mro__ if base in self.targets), no_target)
+    generates = self.method and inspect.isgeneratorfunction(handler)
+    self.steps[typ] = (handler, generates)
+    self.cache[typ] = self.driver(handler) if generates else handler
+    return self.cache[typ]
+
+  def step(self, typ):
+    self.resolve(typ)
+    return self.steps[typ]
 
   def add_target(self, typ, target):
     self.targets[typ] = target
+    self.cache.clear()
+    self.steps.clear()
+
+  def driver(self, handler):
+    "un handler generador llamado desde fuera de un trampolin: su visita entera corre en uno nuevo"
+    trampoline = self.trampoline
+    def drive(instance, node):
+      return trampoline(instance, handler(instance, node))
+    return drive
+
+  def trampoline(self, instance, generator):
+    """corre el generador de un handler con una pila explicita: cada nodo que da se visita con su handler
+    y lo que devuelve esa visita se le manda de vuelta; si ese handler tambien es un generador se apila.
+    Una excepcion de un hijo se lanza dentro del padre en su yield, como si la hubiera lanzado self.visit"""
+    steps = self.steps
+    step = self.step
+    stack = [generator]
+    value = None
+    error = None
+    while True:
+      current = stack[-1]
+      try:
+        node = current.send(value) if error is None else current.throw(error)
+      except StopIteration as stop:
+        value, error = stop.value, None
+      except Exception as exc:
+        value, error = None, exc
+      else:
+        value, error = None, None
+        handler, generates = steps.get(node.__class__) or step(node.__class__)
+        if generates:
+          stack.append(handler(instance, node))
+        else:
+          try:
+            value = handler(instance, node)
+          except Exception as exc:
+            error = exc
+        continue
+      stack.pop()
+      if not stack:
+        if error is not None:
+          raise error
+        return value
 
   @staticmethod
   def __argspec(fn):